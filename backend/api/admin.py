@@ -11,12 +11,14 @@ try:
     from backend.db.users import (
         list_all_users, approve_user, reject_user, is_admin, get_user_by_id
     )
+    from backend.services.execution import run_blocking
 except ImportError:
     from auth.middleware import get_current_user
     from auth.models import UserResponse
     from db.users import (
         list_all_users, approve_user, reject_user, is_admin, get_user_by_id
     )
+    from services.execution import run_blocking
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -49,7 +51,7 @@ async def get_all_users(
     Returns:
         List of all users
     """
-    users = list_all_users(include_pending=include_pending)
+    users = await run_blocking(list_all_users, include_pending=include_pending)
     return [UserResponse(**user) for user in users]
 
 
@@ -64,7 +66,7 @@ async def get_pending_users(admin_user: dict = Depends(require_admin)):
     Returns:
         List of pending users
     """
-    all_users = list_all_users(include_pending=True)
+    all_users = await run_blocking(list_all_users, include_pending=True)
     pending = [u for u in all_users if not u.get("approved", False)]
     return [UserResponse(**user) for user in pending]
 
@@ -87,13 +89,13 @@ async def approve_user_endpoint(
     Raises:
         HTTPException: If user not found or approval fails
     """
-    if not approve_user(user_id):
+    if not await run_blocking(approve_user, user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found or could not be approved"
         )
     
-    user = get_user_by_id(user_id)
+    user = await run_blocking(get_user_by_id, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,7 +123,7 @@ async def reject_user_endpoint(
     Raises:
         HTTPException: If user not found or rejection fails
     """
-    if not reject_user(user_id):
+    if not await run_blocking(reject_user, user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found or could not be rejected"
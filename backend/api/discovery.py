@@ -2,15 +2,17 @@
 API de Descoberta Automática de Páginas de Lançamento.
 
 Módulos disponíveis:
-  - DuckDuckGo  → /api/discovery/duckduckgo
-  - YouTube     → /api/discovery/youtube
+  - DuckDuckGo  → /api/discovery/duckduckgo (e /duckduckgo/stream, SSE)
+  - YouTube     → /api/discovery/youtube (quota do dia em /youtube/quota)
   - Telegram    → /api/discovery/telegram
 
 Cada módulo é independente e pode ser usado separadamente.
 """
 
+import asyncio
 import json
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -18,14 +20,28 @@ try:
     from backend.auth.middleware import get_current_user
     from backend.db.pages import add_page
     from backend.db.settings import get_setting, save_setting
+    from backend.services.execution import run_blocking, run_network
+    from backend.services.jobs import job_manager, JobContext
+    from backend.services.discovery.quick_collect import collect_url_now
+    from backend.models import JobResponse
+    from backend.api.jobs import job_response
 except ImportError:
     from auth.middleware import get_current_user
     from db.pages import add_page
     from db.settings import get_setting, save_setting
+    from services.execution import run_blocking, run_network
+    from services.jobs import job_manager, JobContext
+    from services.discovery.quick_collect import collect_url_now
+    from models import JobResponse
+    from api.jobs import job_response
 
 router = APIRouter(tags=["discovery"])
 
 
+def _sse(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 # ─── GESTÃO DE KEYWORDS CUSTOMIZADAS ─────────────────────────────────────────
 
 VALID_MODULES = {"ddg", "youtube", "facebook"}
@@ -58,7 +74,7 @@ async def get_custom_queries(
     if module not in VALID_MODULES:
         raise HTTPException(status_code=400, detail=f"Módulo inválido. Use: {VALID_MODULES}")
     user_id = current_user["id"]
-    return {"module": module, "queries": _load_custom_queries(user_id, module)}
+    return {"module": module, "queries": await run_blocking(_load_custom_queries, user_id, module)}
 
 
 @router.post("/custom-queries")
@@ -70,7 +86,7 @@ async def save_custom_queries(
         raise HTTPException(status_code=400, detail=f"Módulo inválido. Use: {VALID_MODULES}")
     user_id = current_user["id"]
     cleaned = [q.strip() for q in request.queries if q.strip()]
-    _save_custom_queries(user_id, request.module, cleaned)
+    await run_blocking(_save_custom_queries, user_id, request.module, cleaned)
     return {"success": True, "module": request.module, "total": len(cleaned)}
 
 
@@ -88,7 +104,7 @@ async def add_discovered_page(
 ):
     """Adiciona uma página descoberta ao monitoramento do usuário."""
     user_id = current_user["id"]
-    added = add_page(request.url, request.name, user_id)
+    added = await run_blocking(add_page, request.url, request.name, user_id)
     if added:
         return {"success": True, "message": "Página adicionada ao monitoramento"}
     return {"success": False, "message": "Página já existe no monitoramento"}
@@ -116,6 +132,8 @@ class DiscoveredPage(BaseModel):
     signals: List[str] = []
     whatsapp_links: List[str] = []
     verified: bool = False
+    verified_at: Optional[str] = None
+    cached: bool = False   # verificação veio do cache (ver verified_at)
     added: bool = False
     query: Optional[str] = None
     # Campos de IA (preenchidos quando use_ai=True)
@@ -131,6 +149,7 @@ class DuckDuckGoResponse(BaseModel):
     pages_added: int
     pages: List[DiscoveredPage]
     message: str
+    cache: dict = {}   # acertos de cache: buscas e verificações
 
 
 @router.get("/duckduckgo/queries")
@@ -143,99 +162,268 @@ async def get_ddg_queries(current_user: dict = Depends(get_current_user)):
     return {"queries": DEFAULT_QUERIES}
 
 
+def _ai_config(user_id: int, use_ai: bool) -> Optional[dict]:
+    """Configuração de IA do usuário, se a classificação foi pedida e está ativa"""
+    if not use_ai:
+        return None
+    try:
+        from backend.api.settings import _get_ai_config
+    except ImportError:
+        from api.settings import _get_ai_config
+    ai_cfg = _get_ai_config(user_id)
+    return ai_cfg if ai_cfg.get("api_key") and ai_cfg.get("enabled") else None
+
+
+async def _classify_pages(pages: List[dict], ai_cfg: Optional[dict]) -> List[dict]:
+    if ai_cfg is None or not pages:
+        return pages
+    try:
+        from backend.services.ai.classifier import classify_batch
+    except ImportError:
+        from services.ai.classifier import classify_batch
+    return await run_network(
+        classify_batch,
+        pages,
+        api_key=ai_cfg["api_key"],
+        provider=ai_cfg.get("provider", "gemini"),
+        min_confidence=ai_cfg.get("min_confidence", 0.65),
+    )
+
+
+async def _ddg_result_page(page: dict, request: DuckDuckGoRequest, user_id: int) -> DiscoveredPage:
+    """Adiciona a página (auto_add) e monta o item da resposta"""
+    ai = page.get("ai", {})
+    ai_status = page.get("ai_status")
+
+    # Com IA ativa: auto_add só aprova os "approved"
+    added = False
+    if request.auto_add:
+        if not request.use_ai or ai_status == "approved":
+            added = await run_blocking(add_page, page["url"], page["name"], user_id)
+
+    return DiscoveredPage(
+        url=page["url"],
+        name=page["name"],
+        has_whatsapp=page.get("has_whatsapp"),
+        has_form=page.get("has_form"),
+        url_score=page.get("url_score", 0),
+        landing_score=page.get("landing_score", 0),
+        total_score=page.get("total_score", 0),
+        signals=page.get("signals", []),
+        whatsapp_links=page.get("whatsapp_links", []),
+        verified=page.get("verified", False),
+        verified_at=page.get("verified_at"),
+        cached=page.get("cached", False),
+        added=added,
+        query=page.get("query"),
+        ai_status=ai_status,
+        ai_confidence=ai.get("confidence"),
+        ai_niche=ai.get("niche"),
+        ai_reasoning=ai.get("reasoning"),
+    )
+
+
+def _cache_note(cache_stats: dict) -> str:
+    """Trecho da mensagem com o que veio do cache (vazio se nada veio)"""
+    parts = []
+    queries = cache_stats.get("queries_cached", 0) + cache_stats.get("queries_fetched", 0)
+    if cache_stats.get("queries_cached"):
+        parts.append(f"{cache_stats['queries_cached']}/{queries} buscas")
+    checks = cache_stats.get("verifications_cached", 0) + cache_stats.get("verifications_fetched", 0)
+    if cache_stats.get("verifications_cached"):
+        parts.append(f"{cache_stats['verifications_cached']}/{checks} verificações")
+    return f" | cache: {', '.join(parts)}" if parts else ""
+
+
+def _ddg_message(pages_found: int, pages_added: int, auto_add: bool, cache_stats: dict) -> str:
+    msg = f"DuckDuckGo: {pages_found} páginas de captura encontradas"
+    if auto_add:
+        msg += f" | {pages_added} adicionadas"
+    return msg + _cache_note(cache_stats)
+
+
+async def _ddg_queries(request: DuckDuckGoRequest, user_id: int) -> Optional[List[str]]:
+    # Mescla: queries do request → customizadas do banco → padrão
+    queries = list(request.queries or [])
+    queries += await run_blocking(_load_custom_queries, user_id, "ddg")
+    return queries or None  # None usa DEFAULT_QUERIES do módulo
+
+
 @router.post("/duckduckgo", response_model=DuckDuckGoResponse)
 async def run_duckduckgo_discovery(
     request: DuckDuckGoRequest,
     current_user: dict = Depends(get_current_user),
 ):
-    """Descobre páginas de lançamento via DuckDuckGo (sem API key)."""
+    """
+    Descobre páginas de lançamento via DuckDuckGo (sem API key).
+    Responde com todas as páginas no fim; /duckduckgo/stream entrega cada uma
+    assim que é verificada.
+    """
     try:
-        from backend.services.discovery.page_discovery import discover_pages
+        from backend.services.discovery.page_discovery import stream_discovered_pages
+        from backend.services.discovery.cache import new_run_stats
     except ImportError:
-        from services.discovery.page_discovery import discover_pages
+        from services.discovery.page_discovery import stream_discovered_pages
+        from services.discovery.cache import new_run_stats
 
     user_id = current_user["id"]
-
-    # Mescla: queries do request → customizadas do banco → padrão
-    queries = request.queries or []
-    queries += _load_custom_queries(user_id, "ddg")
-    if not queries:
-        queries = None  # usa DEFAULT_QUERIES do módulo
+    queries = await _ddg_queries(request, user_id)
+    cache_stats = new_run_stats()
 
     try:
-        pages = discover_pages(
-            queries=queries,
-            max_results_per_query=request.max_results_per_query,
-            verify=request.verify,
-            only_with_whatsapp=request.only_with_whatsapp,
-        )
+        pages = [
+            page async for page in stream_discovered_pages(
+                queries=queries,
+                max_results_per_query=request.max_results_per_query,
+                verify=request.verify,
+                only_with_whatsapp=request.only_with_whatsapp,
+                stats=cache_stats,
+            )
+        ]
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na descoberta: {str(e)}")
 
     # Classificação IA (opcional)
-    ai_cfg = None
-    if request.use_ai:
-        try:
-            from backend.api.settings import _get_ai_config
-            from backend.services.ai.classifier import classify_batch
-        except ImportError:
-            from api.settings import _get_ai_config
-            from services.ai.classifier import classify_batch
-        ai_cfg = _get_ai_config(user_id)
-        if ai_cfg.get("api_key") and ai_cfg.get("enabled"):
-            pages = classify_batch(
-                pages,
-                api_key=ai_cfg["api_key"],
-                provider=ai_cfg.get("provider", "gemini"),
-                min_confidence=ai_cfg.get("min_confidence", 0.65),
-            )
-
-    pages_added = 0
-    result_pages = []
+    ai_cfg = await run_blocking(_ai_config, user_id, request.use_ai)
+    pages = await _classify_pages(pages, ai_cfg)
 
-    for page in pages:
-        ai = page.get("ai", {})
-        ai_status = page.get("ai_status")
-
-        # Com IA ativa: auto_add só aprova os "approved"
-        added = False
-        if request.auto_add:
-            if not request.use_ai or ai_status == "approved":
-                added = add_page(page["url"], page["name"], user_id)
-                if added:
-                    pages_added += 1
-
-        result_pages.append(DiscoveredPage(
-            url=page["url"],
-            name=page["name"],
-            has_whatsapp=page.get("has_whatsapp"),
-            has_form=page.get("has_form"),
-            url_score=page.get("url_score", 0),
-            landing_score=page.get("landing_score", 0),
-            total_score=page.get("total_score", 0),
-            signals=page.get("signals", []),
-            whatsapp_links=page.get("whatsapp_links", []),
-            verified=page.get("verified", False),
-            added=added,
-            query=page.get("query"),
-            ai_status=ai_status,
-            ai_confidence=ai.get("confidence"),
-            ai_niche=ai.get("niche"),
-            ai_reasoning=ai.get("reasoning"),
-        ))
-
-    msg = f"DuckDuckGo: {len(pages)} páginas de captura encontradas"
-    if request.auto_add:
-        msg += f" | {pages_added} adicionadas"
+    result_pages = [await _ddg_result_page(page, request, user_id) for page in pages]
+    pages_added = sum(1 for page in result_pages if page.added)
 
     return DuckDuckGoResponse(
         success=True,
         pages_found=len(pages),
         pages_added=pages_added,
         pages=result_pages,
-        message=msg,
+        message=_ddg_message(len(pages), pages_added, request.auto_add, cache_stats),
+        cache=cache_stats,
+    )
+
+
+_STREAM_END = object()
+
+
+async def _batched(stream, size: int, flush_after: float):
+    """
+    Agrupa as páginas do stream em lotes de até size; um lote incompleto sai
+    flush_after segundos depois da sua primeira página (ou no fim do stream).
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for page in stream:
+                await queue.put(page)
+            await queue.put(_STREAM_END)
+        except Exception as e:
+            await queue.put(e)
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(pump())
+    batch: List[dict] = []
+    deadline = 0.0
+    try:
+        while True:
+            try:
+                timeout = max(0.0, deadline - loop.time()) if batch else None
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield batch
+                batch = []
+                continue
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if not batch:
+                deadline = loop.time() + flush_after
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def _ddg_event_stream(
+    stream, request: DuckDuckGoRequest, user_id: int, ai_cfg: Optional[dict], cache_stats: dict
+):
+    # Com IA, as páginas saem em lotes: uma chamada de classify_batch por lote
+    if ai_cfg is not None:
+        try:
+            from backend.services.ai.classifier import AI_BATCH_SIZE, AI_STREAM_FLUSH_SECONDS
+        except ImportError:
+            from services.ai.classifier import AI_BATCH_SIZE, AI_STREAM_FLUSH_SECONDS
+        batches = _batched(stream, AI_BATCH_SIZE, AI_STREAM_FLUSH_SECONDS)
+    else:
+        batches = _batched(stream, 1, 0.0)
+
+    pages_found = 0
+    pages_added = 0
+    try:
+        async for batch in batches:
+            for page in await _classify_pages(batch, ai_cfg):
+                item = await _ddg_result_page(page, request, user_id)
+                pages_found += 1
+                pages_added += int(item.added)
+                yield _sse("page", item.model_dump())
+    except Exception as e:
+        yield _sse("error", {"detail": f"Erro na descoberta: {str(e)}"})
+        return
+    finally:
+        await batches.aclose()
+        await stream.aclose()
+    yield _sse("done", {
+        "success": True,
+        "pages_found": pages_found,
+        "pages_added": pages_added,
+        "message": _ddg_message(pages_found, pages_added, request.auto_add, cache_stats),
+        "cache": cache_stats,
+    })
+
+
+@router.post("/duckduckgo/stream")
+async def stream_duckduckgo_discovery(
+    request: DuckDuckGoRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Stream SSE da descoberta DuckDuckGo: um evento 'page' (DiscoveredPage)
+    por página assim que é verificada, e 'done' com o resumo no fim.
+    Fechar a conexão cancela as buscas e verificações restantes.
+    """
+    try:
+        from backend.services.discovery.page_discovery import stream_discovered_pages, _load_ddgs
+        from backend.services.discovery.cache import new_run_stats
+    except ImportError:
+        from services.discovery.page_discovery import stream_discovered_pages, _load_ddgs
+        from services.discovery.cache import new_run_stats
+
+    try:
+        _load_ddgs()
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    user_id = current_user["id"]
+    queries = await _ddg_queries(request, user_id)
+    ai_cfg = await run_blocking(_ai_config, user_id, request.use_ai)
+    cache_stats = new_run_stats()
+    stream = stream_discovered_pages(
+        queries=queries,
+        max_results_per_query=request.max_results_per_query,
+        verify=request.verify,
+        only_with_whatsapp=request.only_with_whatsapp,
+        stats=cache_stats,
+    )
+    return StreamingResponse(
+        _ddg_event_stream(stream, request, user_id, ai_cfg, cache_stats),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -248,6 +436,7 @@ class YoutubeRequest(BaseModel):
     filter_tutorials: bool = True
     only_with_links: bool = False
     use_ai: bool = False   # classifica landing_urls de cada vídeo com IA
+    incremental: bool = True   # só vídeos publicados depois da última busca do usuário
 
 
 class YoutubeVideoResult(BaseModel):
@@ -275,6 +464,8 @@ class YoutubeResponse(BaseModel):
     pages_added: int
     results: List[YoutubeVideoResult]
     message: str
+    cache: dict = {}   # buscas que vieram do cache
+    quota: dict = {}   # quota da chave hoje, gasto desta busca e buscas adiadas
 
 
 @router.get("/youtube/queries")
@@ -287,6 +478,22 @@ async def get_youtube_queries(current_user: dict = Depends(get_current_user)):
     return {"queries": YT_DEFAULT_QUERIES}
 
 
+@router.get("/youtube/quota")
+async def get_youtube_quota(current_user: dict = Depends(get_current_user)):
+    """Quota da YouTube API gasta hoje pela chave do usuário e buscas que ainda cabem."""
+    try:
+        from backend.services.discovery.youtube_discovery import get_quota_usage
+        from backend.db.settings import get_youtube_api_key
+    except ImportError:
+        from services.discovery.youtube_discovery import get_quota_usage
+        from db.settings import get_youtube_api_key
+
+    api_key = (await run_blocking(get_youtube_api_key, current_user["id"])).strip()
+    if not api_key:
+        raise HTTPException(status_code=400, detail="Chave da YouTube API não configurada.")
+    return await run_blocking(get_quota_usage, api_key)
+
+
 @router.post("/youtube", response_model=YoutubeResponse)
 async def run_youtube_discovery(
     request: YoutubeRequest,
@@ -295,13 +502,15 @@ async def run_youtube_discovery(
     """Descobre vídeos de lançamento no YouTube e extrai links WhatsApp."""
     try:
         from backend.services.discovery.youtube_discovery import discover_from_youtube
+        from backend.services.discovery.cache import new_run_stats
         from backend.db.settings import get_youtube_api_key
     except ImportError:
         from services.discovery.youtube_discovery import discover_from_youtube
+        from services.discovery.cache import new_run_stats
         from db.settings import get_youtube_api_key
 
     user_id = current_user["id"]
-    api_key = get_youtube_api_key(user_id).strip()
+    api_key = (await run_blocking(get_youtube_api_key, user_id)).strip()
 
     if not api_key:
         raise HTTPException(
@@ -311,49 +520,44 @@ async def run_youtube_discovery(
 
     # Mescla: queries do request → customizadas do banco → padrão
     queries = list(request.queries or [])
-    queries += _load_custom_queries(user_id, "youtube")
+    queries += await run_blocking(_load_custom_queries, user_id, "youtube")
     if not queries:
         queries = None  # usa YT_DEFAULT_QUERIES do módulo
 
+    cache_stats = new_run_stats()
+    quota: dict = {}
     try:
-        videos = discover_from_youtube(
+        videos = await run_network(
+            discover_from_youtube,
             api_key=api_key,
             queries=queries,
             max_results_per_query=request.max_results_per_query,
             filter_tutorials=request.filter_tutorials,
             only_with_links=request.only_with_links,
+            stats=cache_stats,
+            user_id=user_id,
+            incremental=request.incremental,
+            quota=quota,
         )
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
 
-    # Classificação IA nas landing URLs de cada vídeo (opcional)
-    if request.use_ai:
-        try:
-            from backend.api.settings import _get_ai_config
-            from backend.services.ai.classifier import classify_page as ai_classify
-        except ImportError:
-            from api.settings import _get_ai_config
-            from services.ai.classifier import classify_page as ai_classify
-        ai_cfg = _get_ai_config(user_id)
-        if ai_cfg.get("api_key") and ai_cfg.get("enabled"):
-            for v in videos:
-                if v["landing_urls"]:
-                    # Classifica a primeira landing URL do vídeo
-                    url_to_classify = v["landing_urls"][0]
-                    ai_result = ai_classify(
-                        url=url_to_classify,
-                        title=v["title"],
-                        api_key=ai_cfg["api_key"],
-                        provider=ai_cfg.get("provider", "gemini"),
-                        user_id=user_id,
-                    )
-                    v["ai_status"]     = "approved" if (ai_result.get("is_capture_page") and ai_result.get("confidence", 0) >= ai_cfg.get("min_confidence", 0.65)) else (
-                                         "rejected" if (ai_result.get("is_capture_page") is False and ai_result.get("confidence", 0) >= ai_cfg.get("min_confidence", 0.65)) else "review")
-                    v["ai_confidence"] = ai_result.get("confidence")
-                    v["ai_niche"]      = ai_result.get("niche")
-                    v["ai_reasoning"]  = ai_result.get("reasoning")
+    # Classificação IA nas landing URLs de cada vídeo (opcional, em lotes)
+    ai_cfg = await run_blocking(_ai_config, user_id, request.use_ai)
+    to_classify = [v for v in videos if v["landing_urls"]]
+    if ai_cfg is not None and to_classify:
+        # Classifica a primeira landing URL de cada vídeo
+        classified = await _classify_pages(
+            [{"url": v["landing_urls"][0], "name": v["title"]} for v in to_classify], ai_cfg
+        )
+        for v, page in zip(to_classify, classified):
+            ai = page["ai"]
+            v["ai_status"]     = page["ai_status"]
+            v["ai_confidence"] = ai.get("confidence")
+            v["ai_niche"]      = ai.get("niche")
+            v["ai_reasoning"]  = ai.get("reasoning")
 
     pages_added = 0
     results = []
@@ -366,7 +570,7 @@ async def run_youtube_discovery(
             url = v["landing_urls"][0]
             # Com IA: só adiciona se aprovado ou sem IA ativa
             if not request.use_ai or ai_status == "approved":
-                if add_page(url, v["title"][:100], user_id):
+                if await run_blocking(add_page, url, v["title"][:100], user_id):
                     added_urls.append(url)
                     pages_added += 1
 
@@ -395,6 +599,9 @@ async def run_youtube_discovery(
     if request.use_ai:
         approved = sum(1 for r in results if r.ai_status == "approved")
         msg += f" | IA: {approved} aprovados"
+    msg += _cache_note(cache_stats)
+    if quota.get("deferred_queries"):
+        msg += f" | {len(quota['deferred_queries'])} busca(s) adiada(s): quota do dia no limite"
 
     return YoutubeResponse(
         success=True,
@@ -402,6 +609,8 @@ async def run_youtube_discovery(
         pages_added=pages_added,
         results=results,
         message=msg,
+        cache=cache_stats,
+        quota=quota,
     )
 
 
@@ -431,43 +640,33 @@ class QuickCollectResponse(BaseModel):
     message: str
 
 
-@router.post("/quick", response_model=QuickCollectResponse)
-async def quick_collect(
-    request: QuickCollectRequest,
-    current_user: dict = Depends(get_current_user),
-):
+async def run_quick_collect_job(job: JobContext) -> dict:
     """
-    Coleta imediata de uma ou mais URLs submetidas pelo usuário.
-    Adiciona às páginas monitoradas e scrapa em busca de grupos WhatsApp.
-    Ideal para URLs recebidas via Telegram ou outras fontes.
+    Executa um job 'quick_collect' (fila interativa): coleta as URLs do
+    payload uma a uma, com um evento por URL
+    Resultado: QuickCollectResponse
     """
-    try:
-        from backend.services.discovery.quick_collect import collect_url_now
-    except ImportError:
-        from services.discovery.quick_collect import collect_url_now
-
-    if not request.urls:
-        raise HTTPException(status_code=400, detail="Informe pelo menos uma URL.")
-
-    user_id = current_user["id"]
+    payload = job.payload
+    urls = payload.get("urls") or []
+    job.set_total(len(urls))
     results = []
     total_links = 0
 
-    for url in request.urls:
-        url = url.strip()
-        if not url.startswith("http"):
-            url = "https://" + url
+    for url in urls:
+        if job.cancelled():
+            break
 
-        result = collect_url_now(
+        result = await run_network(
+            collect_url_now,
             url=url,
-            user_id=user_id,
-            source_name=request.source_name,
-            add_to_pages=request.add_to_pages,
+            user_id=job.user_id,
+            source_name=payload.get("source_name"),
+            add_to_pages=payload.get("add_to_pages", True),
             send_telegram=True,
         )
 
         total_links += result.get("links_found", 0)
-        results.append(QuickCollectResult(
+        item = QuickCollectResult(
             url=result["url"],
             name=result["name"],
             page_added=result.get("page_added", False),
@@ -475,17 +674,55 @@ async def quick_collect(
             links=result.get("links", []),
             success=result["success"],
             message=result["message"],
-        ))
+        )
+        results.append(item)
+        job.page_done(url=item.url, name=item.name, status="ok" if item.success else "error",
+                      links_found=item.links_found, error=None if item.success else item.message)
 
-    msg = f"{len(request.urls)} URL(s) processada(s) — {total_links} grupo(s) WhatsApp encontrado(s)"
+    msg = f"{len(results)} URL(s) processada(s) — {total_links} grupo(s) WhatsApp encontrado(s)"
 
     return QuickCollectResponse(
         success=True,
-        urls_processed=len(request.urls),
+        urls_processed=len(results),
         total_links_found=total_links,
         results=results,
         message=msg,
+    ).model_dump()
+
+
+job_manager.register("quick_collect", run_quick_collect_job)
+
+
+@router.post("/quick", response_model=JobResponse, status_code=202)
+async def quick_collect(
+    request: QuickCollectRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Coleta imediata de uma ou mais URLs submetidas pelo usuário.
+    Adiciona às páginas monitoradas e scrapa em busca de grupos WhatsApp.
+    Ideal para URLs recebidas via Telegram ou outras fontes.
+    Roda como job na fila interativa, à frente das coletas em massa;
+    o resultado (QuickCollectResponse) fica em /api/jobs/{id}.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="Informe pelo menos uma URL.")
+
+    urls = []
+    for url in request.urls:
+        url = url.strip()
+        if not url.startswith("http"):
+            url = "https://" + url
+        urls.append(url)
+
+    job = await run_blocking(
+        job_manager.submit,
+        "quick_collect",
+        {"urls": urls, "source_name": request.source_name, "add_to_pages": request.add_to_pages},
+        lane="interactive",
+        user_id=current_user["id"],
     )
+    return job_response(job)
 
 
 # ─── MÓDULO: FACEBOOK AD LIBRARY (SELENIUM + IA) ─────────────────────────────
@@ -532,10 +769,8 @@ async def run_facebook_library_discovery(
     """
     try:
         from backend.services.discovery.facebook_discovery import discover_from_facebook_library
-        from backend.api.settings import _get_ai_config
     except ImportError:
         from services.discovery.facebook_discovery import discover_from_facebook_library
-        from api.settings import _get_ai_config
 
     user_id = current_user["id"]
 
@@ -543,15 +778,15 @@ async def run_facebook_library_discovery(
     ai_provider = "gemini"
     ai_min_conf = 0.65
 
-    if request.use_ai:
-        ai_cfg = _get_ai_config(user_id)
-        if ai_cfg.get("enabled") and ai_cfg.get("api_key"):
-            ai_key = ai_cfg["api_key"]
-            ai_provider = ai_cfg.get("provider", "gemini")
-            ai_min_conf = ai_cfg.get("min_confidence", 0.65)
+    ai_cfg = await run_blocking(_ai_config, user_id, request.use_ai)
+    if ai_cfg is not None:
+        ai_key = ai_cfg["api_key"]
+        ai_provider = ai_cfg.get("provider", "gemini")
+        ai_min_conf = ai_cfg.get("min_confidence", 0.65)
 
     try:
-        pages = discover_from_facebook_library(
+        pages = await run_network(
+            discover_from_facebook_library,
             queries=request.queries,
             scroll_times=request.scroll_times,
             max_ads_per_query=request.max_ads_per_query,
@@ -575,7 +810,7 @@ async def run_facebook_library_discovery(
 
         added = False
         if request.auto_add and status == "approved":
-            added = add_page(page["url"], page["name"], user_id)
+            added = await run_blocking(add_page, page["url"], page["name"], user_id)
             if added:
                 pages_added += 1
 
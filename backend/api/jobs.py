@@ -0,0 +1,144 @@
+"""
+Rotas da API para a fila de jobs de coleta
+Endpoints: /api/jobs, /api/jobs/{id}, /api/jobs/{id}/cancel, /api/jobs/{id}/events (SSE)
+"""
+
+import asyncio
+import json
+import time
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+try:
+    from backend.auth.middleware import get_current_user
+    from backend.models import JobResponse
+    from backend.db.jobs import list_jobs, list_job_events, FINAL_STATUSES
+    from backend.services.jobs import job_manager
+    from backend.services.execution import run_blocking
+except ImportError:
+    from auth.middleware import get_current_user
+    from models import JobResponse
+    from db.jobs import list_jobs, list_job_events, FINAL_STATUSES
+    from services.jobs import job_manager
+    from services.execution import run_blocking
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Intervalo entre leituras de eventos novos no stream
+STREAM_POLL_INTERVAL = 0.5
+# Comentário SSE periódico para o proxy não derrubar a conexão ociosa
+STREAM_HEARTBEAT_INTERVAL = 15.0
+
+
+def job_response(job: dict) -> JobResponse:
+    return JobResponse(**{
+        **job,
+        "created_at": str(job["created_at"]) if job.get("created_at") else None,
+        "started_at": str(job["started_at"]) if job.get("started_at") else None,
+        "finished_at": str(job["finished_at"]) if job.get("finished_at") else None,
+    })
+
+
+async def _get_visible_job(job_id: int, current_user: dict) -> dict:
+    """Job do usuário atual (admin vê todos, inclusive os do agendador)"""
+    job = await run_blocking(job_manager.get_job, job_id)
+    if job is None or (job.get("user_id") != current_user["id"] and not current_user.get("is_admin")):
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+def _sse(event_type: str, seq: Optional[int], data: dict) -> str:
+    lines = [f"id: {seq}"] if seq is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _event_stream(job_id: int, after_seq: int):
+    """
+    Eventos do job a partir de after_seq até o fim dele
+    Job rodando neste processo: lidos da memória; senão, do banco
+    """
+    last_sent = time.monotonic()
+    while True:
+        events = job_manager.live_events(job_id, after_seq)
+        if events is None:
+            events = await run_blocking(list_job_events, job_id, after_seq)
+
+        for event in events:
+            after_seq = event["seq"]
+            yield _sse(event["type"], event["seq"], {
+                "job_id": job_id, "created_at": event.get("created_at"), **(event.get("data") or {}),
+            })
+            if event["type"] == "done":
+                return
+
+        if events:
+            last_sent = time.monotonic()
+        elif job_manager.live_events(job_id, after_seq) is None:
+            # Terminou sem evento 'done' (cancelado na fila, excedeu tentativas)
+            job = await run_blocking(job_manager.get_job, job_id)
+            if job is None or job["status"] in FINAL_STATUSES:
+                pending = await run_blocking(list_job_events, job_id, after_seq)
+                if not pending:
+                    yield _sse("done", None, {
+                        "job_id": job_id,
+                        "status": job["status"] if job else "failed",
+                        "error": job.get("error") if job else "Job não encontrado",
+                    })
+                    return
+                continue
+
+        if time.monotonic() - last_sent >= STREAM_HEARTBEAT_INTERVAL:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+
+@router.get("", response_model=List[JobResponse])
+async def get_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+):
+    """Lista os jobs mais recentes do usuário atual (admin vê todos)"""
+    user_id = None if current_user.get("is_admin") else current_user["id"]
+    jobs = await run_blocking(list_jobs, user_id, limit)
+    return [job_response(job_manager.snapshot(job)) for job in jobs]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(job_id: int, current_user: dict = Depends(get_current_user)):
+    """Status, progresso e resultado de um job"""
+    return job_response(await _get_visible_job(job_id, current_user))
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: int, current_user: dict = Depends(get_current_user)):
+    """
+    Cancela um job: na fila, é cancelado na hora; em execução, para antes
+    da próxima página e salva o que já foi coletado
+    """
+    await _get_visible_job(job_id, current_user)
+    job = await run_blocking(job_manager.cancel, job_id)
+    return job_response(job)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: int,
+    after: int = Query(0, ge=0),
+    last_event_id: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Stream SSE dos eventos do job (queued, started, progress, page, done)
+    Reconexões continuam do Last-Event-ID (ou do parâmetro after)
+    """
+    await _get_visible_job(job_id, current_user)
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+    return StreamingResponse(
+        _event_stream(job_id, after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -3,68 +3,89 @@ Rotas da API para gerenciamento de links coletados
 Endpoints: /api/links, /api/stats
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import List, Optional
+import asyncio
+import os
 try:
     from backend.auth.middleware import get_current_user
-    from backend.db.connection import list_links
+    from backend.db.connection import list_links_page, get_link_stats
+    from backend.db.pages import count_pages
     from backend.models import LinkResponse
+    from backend.main import LAST_RUN_FILE
+    from backend.services.execution import run_blocking
 except ImportError:
     from auth.middleware import get_current_user
-    from db.connection import list_links
+    from db.connection import list_links_page, get_link_stats
+    from db.pages import count_pages
     from models import LinkResponse
+    from main import LAST_RUN_FILE
+    from services.execution import run_blocking
 
 router = APIRouter(tags=["links"])
 
-from backend.main import LAST_RUN_FILE
+MAX_PAGE_SIZE = 1000
 
 @router.get("/links", response_model=List[LinkResponse])
-async def get_links(limit: int = 1000, current_user: dict = Depends(get_current_user)):
+async def get_links(
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="id do último link da página anterior"),
+    current_user: dict = Depends(get_current_user),
+):
     """
-    Retorna a lista de links coletados do usuário atual
-    Parâmetro limit controla quantos links retornar (padrão: 1000)
+    Retorna os links coletados do usuário atual, do mais novo para o mais antigo
+    Paginação keyset: passe em cursor o valor do header X-Next-Cursor da
+    resposta anterior; o header não vem na última página
     """
     try:
         user_id = current_user["id"]
-        rows = list_links(limit, user_id=user_id)
-        links = [
-            LinkResponse(url=row[0], source=row[1], found_at=row[2])
+        rows, next_cursor = await run_blocking(list_links_page, user_id=user_id, limit=limit, cursor=cursor)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = str(next_cursor)
+        return [
+            LinkResponse(
+                id=row.get("id"),
+                url=row["url"],
+                source=row["source"] or "",
+                found_at=row["found_at"],
+                link_type=row.get("link_type"),
+                is_relaunch=row.get("is_relaunch"),
+            )
             for row in rows
         ]
-        return links
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar links: {str(e)}")
 
 
+def _read_last_run(user_id: int) -> str:
+    """Lê a última execução (por usuário)"""
+    user_last_run_file = f"{LAST_RUN_FILE}.{user_id}"
+    if os.path.exists(user_last_run_file):
+        try:
+            with open(user_last_run_file, "r", encoding="utf-8") as f:
+                return f.read()
+        except:
+            pass
+    return "Nunca executado"
+
+
 @router.get("/stats")
 async def get_stats(current_user: dict = Depends(get_current_user)):
     """Retorna estatísticas do usuário atual"""
     try:
         user_id = current_user["id"]
-        links = list_links(10000, user_id=user_id)
-        from backend.db.pages import load_pages
-        pages = load_pages(user_id)
-        
-        # Calcula estatísticas
-        total_links = len(links)
-        unique_links = len(set(link[0] for link in links))
-        campaigns = len(set(link[1] for link in links if link[1]))
-        total_pages = len(pages)
-        
-        # Lê última execução (por usuário)
-        last_run = "Nunca executado"
-        user_last_run_file = f"{LAST_RUN_FILE}.{user_id}"
-        if os.path.exists(user_last_run_file):
-            try:
-                with open(user_last_run_file, "r", encoding="utf-8") as f:
-                    last_run = f.read()
-            except:
-                pass
+        # Agregações feitas no banco, sem trazer as linhas; as três leituras em paralelo
+        link_stats, total_pages, last_run = await asyncio.gather(
+            run_blocking(get_link_stats, user_id),
+            run_blocking(count_pages, user_id),
+            run_blocking(_read_last_run, user_id),
+        )
         
         return {
-            "total_links": total_links,
-            "unique_links": unique_links,
-            "campaigns": campaigns,
+            "total_links": link_stats["total_links"],
+            "unique_links": link_stats["unique_links"],
+            "campaigns": link_stats["campaigns"],
             "total_pages": total_pages,
             "last_run": last_run
         }
@@ -76,7 +97,7 @@ async def get_stats(current_user: dict = Depends(get_current_user)):
 async def delete_all_user_links(current_user: dict = Depends(get_current_user)):
     """Deleta todos os links do usuário logado"""
     from backend.db.connection import delete_all_links
-    success = delete_all_links(current_user["id"])
+    success = await run_blocking(delete_all_links, current_user["id"])
     if not success:
         raise HTTPException(status_code=500, detail="Erro ao deletar todos os links.")
     return {"success": True, "message": "Todos os links foram apagados."}
@@ -86,7 +107,7 @@ async def delete_all_user_links(current_user: dict = Depends(get_current_user)):
 async def delete_single_link(url: str, current_user: dict = Depends(get_current_user)):
     """Deleta um link específico do usuário logado"""
     from backend.db.connection import delete_link
-    success = delete_link(url, current_user["id"])
+    success = await run_blocking(delete_link, url, current_user["id"])
     if not success:
         raise HTTPException(status_code=404, detail="Link não encontrado ou erro ao deletar.")
     return {"success": True, "message": "Link excluído."}
@@ -1,24 +1,80 @@
-from fastapi import APIRouter, HTTPException, Depends
+"""
+Rotas da API para os logs de operação
+Endpoints: /api/logs/recent, /api/logs/stream (SSE)
+"""
+
+import asyncio
+import json
+import time
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from backend.auth.middleware import get_current_user
-from backend.main import LOGS_FILE
-import os
+from backend.main import LOGS_FILE, log_writer
+from backend.services.execution import run_blocking
+from backend.services.log_pipeline import tail_lines, snapshot, follow
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
+# Intervalo entre leituras do fim do arquivo no stream
+STREAM_POLL_INTERVAL = 0.5
+# Comentário SSE periódico para o proxy não derrubar a conexão ociosa
+STREAM_HEARTBEAT_INTERVAL = 15.0
+
+
+def _sse(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.get("/recent")
-async def get_recent_logs(lines: int = 50, current_user: dict = Depends(get_current_user)):
+async def get_recent_logs(
+    lines: int = Query(50, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user),
+):
     """
     Retorna as últimas linhas do arquivo de log.
-    Utilizado pelo LogConsole para exibição em tempo real.
+    Lidas de trás para frente a partir do fim do arquivo (custo independe do tamanho).
     """
-    if not os.path.exists(LOGS_FILE):
-        return {"logs": []}
-    
     try:
-        with open(LOGS_FILE, "r", encoding="utf-8") as f:
-            # Pega as últimas 'lines' linhas
-            all_lines = f.readlines()
-            recent = all_lines[-lines:] if len(all_lines) > lines else all_lines
-            return {"logs": [line.strip() for line in recent]}
+        return {"logs": await run_blocking(tail_lines, LOGS_FILE, lines)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao ler logs: {str(e)}")
+
+
+async def _log_stream(lines: int):
+    """As últimas linhas e, depois, cada linha nova gravada por qualquer worker"""
+    # Tail e posição da mesma leitura: nenhuma linha se perde ou se repete
+    recent, position = await run_blocking(snapshot, LOGS_FILE, lines)
+    yield _sse("snapshot", {"logs": recent})
+    last_sent = time.monotonic()
+    while True:
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+        new_lines, position = await run_blocking(follow, LOGS_FILE, position)
+        for line in new_lines:
+            yield _sse("log", {"line": line})
+        if new_lines:
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= STREAM_HEARTBEAT_INTERVAL:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+
+
+@router.get("/stream")
+async def stream_logs(
+    lines: int = Query(50, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Stream SSE dos logs: um evento 'snapshot' com as últimas linhas e um
+    evento 'log' por linha nova. Utilizado pelo LogConsole em vez de polling.
+    """
+    return StreamingResponse(
+        _log_stream(lines),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stats")
+async def get_log_stats(current_user: dict = Depends(get_current_user)):
+    """Fila de escrita, rotações e tamanho do arquivo de log deste processo"""
+    return await run_blocking(log_writer.stats)
@@ -0,0 +1,128 @@
+"""
+Rotas de métricas internas
+Endpoints: /api/metrics/http, /api/metrics/group-metadata, /api/metrics/auth-cache,
+/api/metrics/execution, /api/metrics/jobs, /api/metrics/scheduler,
+/api/metrics/recrawl, /api/metrics/collection, /api/metrics/notifications,
+/api/metrics/known-links, /api/metrics/config, /api/metrics/discovery
+"""
+
+from fastapi import APIRouter, Depends
+try:
+    from backend.auth.middleware import get_current_user
+    from backend.services.http_client import get_pool_stats
+    from backend.services.collectors.group_metadata import get_cache_stats as get_group_metadata_stats
+    from backend.db.users import get_user_cache_stats
+    from backend.services.execution import get_execution_stats
+    from backend.services.jobs import get_job_stats
+    from backend.services.scheduler import get_scheduler_stats
+    from backend.services.recrawl import get_recrawl_stats
+    from backend.services.collectors.engine import get_engine_stats
+    from backend.services.notifications.telegram import get_dispatcher_stats
+    from backend.db.known_links import get_known_link_stats
+    from backend.db.settings import get_settings_cache_stats
+    from backend.services.discovery.page_discovery import get_discovery_stats
+    from backend.services.discovery.cache import get_discovery_cache_stats
+    from backend.services.discovery.facebook_discovery import get_facebook_harvest_stats
+    from backend.services.ai.classifier import get_classifier_stats
+    from backend.services.execution import run_blocking
+except ImportError:
+    from auth.middleware import get_current_user
+    from services.http_client import get_pool_stats
+    from services.collectors.group_metadata import get_cache_stats as get_group_metadata_stats
+    from db.users import get_user_cache_stats
+    from services.execution import get_execution_stats
+    from services.jobs import get_job_stats
+    from services.scheduler import get_scheduler_stats
+    from services.recrawl import get_recrawl_stats
+    from services.collectors.engine import get_engine_stats
+    from services.notifications.telegram import get_dispatcher_stats
+    from db.known_links import get_known_link_stats
+    from db.settings import get_settings_cache_stats
+    from services.discovery.page_discovery import get_discovery_stats
+    from services.discovery.cache import get_discovery_cache_stats
+    from services.discovery.facebook_discovery import get_facebook_harvest_stats
+    from services.ai.classifier import get_classifier_stats
+    from services.execution import run_blocking
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("/http")
+async def get_http_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna o estado dos pools de conexão HTTP compartilhados"""
+    return get_pool_stats()
+
+
+@router.get("/group-metadata")
+async def get_group_metadata_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna o uso do cache de nomes de grupos"""
+    return get_group_metadata_stats()
+
+
+@router.get("/auth-cache")
+async def get_auth_cache_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna o uso do cache de usuários autenticados"""
+    return get_user_cache_stats()
+
+
+@router.get("/execution")
+async def get_execution_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna o uso dos pools de execução, o limitador do bcrypt e o atraso do event loop"""
+    return get_execution_stats()
+
+
+@router.get("/jobs")
+async def get_job_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna a fila de jobs por prioridade: na fila, concluídos, espera e duração médias"""
+    return get_job_stats()
+
+
+@router.get("/scheduler")
+async def get_scheduler_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna as tarefas agendadas e as últimas execuções: atraso, duração e se invadiram o próximo horário"""
+    return await run_blocking(get_scheduler_stats)
+
+
+@router.get("/recrawl")
+async def get_recrawl_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna a fila de recoleta adaptativa: páginas, próximas vencidas e limites de intervalo"""
+    return get_recrawl_stats()
+
+
+@router.get("/collection")
+async def get_collection_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna páginas pedidas x buscas feitas: quantas buscas a deduplicação entre usuários evitou"""
+    return get_engine_stats()
+
+
+@router.get("/notifications")
+async def get_notification_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna a fila de notificações do Telegram: enviadas, pendentes, novas tentativas e chats pausados"""
+    return get_dispatcher_stats()
+
+
+@router.get("/known-links")
+async def get_known_link_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna o índice de links já salvos: convites em memória e quantos a coleta deixou de reprocessar"""
+    return get_known_link_stats()
+
+
+@router.get("/config")
+async def get_config_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna o uso do cache do config.json e das configurações por usuário"""
+    try:
+        from backend.main import config_store
+    except ImportError:
+        from main import config_store
+    return {"config_file": config_store.stats(), "settings": get_settings_cache_stats()}
+
+
+@router.get("/discovery")
+async def get_discovery_metrics(current_user: dict = Depends(get_current_user)):
+    """Retorna as buscas DuckDuckGo e Facebook, a classificação por IA e os caches da descoberta"""
+    return {
+        "duckduckgo": get_discovery_stats(),
+        "facebook": get_facebook_harvest_stats(),
+        "ai": get_classifier_stats(),
+        "cache": get_discovery_cache_stats(),
+    }
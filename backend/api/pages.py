@@ -8,9 +8,11 @@ from typing import List
 try:
     from backend.auth.middleware import get_current_user
     from backend.db.pages import load_pages, add_page, delete_page
+    from backend.services.execution import run_blocking
 except ImportError:
     from auth.middleware import get_current_user
     from db.pages import load_pages, add_page, delete_page
+    from services.execution import run_blocking
 try:
     from backend.models import PageRequest, PageResponse
 except ImportError:
@@ -24,7 +26,7 @@ async def get_pages(current_user: dict = Depends(get_current_user)):
     """Retorna todas as páginas cadastradas para monitoramento do usuário atual"""
     try:
         user_id = current_user["id"]
-        pages = load_pages(user_id)
+        pages = await run_blocking(load_pages, user_id)
         return [PageResponse(**page) for page in pages]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar páginas: {str(e)}")
@@ -37,7 +39,7 @@ async def create_page(page: PageRequest, current_user: dict = Depends(get_curren
         user_id = current_user["id"]
         
         # Tenta adicionar a página
-        if not add_page(page.url, page.name, user_id):
+        if not await run_blocking(add_page, page.url, page.name, user_id):
             raise HTTPException(status_code=400, detail="URL já cadastrada")
         
         write_log(f"Página adicionada: {page.name} ({page.url}) - User: {user_id}")
@@ -54,7 +56,7 @@ async def delete_page_route(url: str, current_user: dict = Depends(get_current_u
     try:
         user_id = current_user["id"]
         
-        if not delete_page(url, user_id):
+        if not await run_blocking(delete_page, url, user_id):
             raise HTTPException(status_code=404, detail="Página não encontrada")
         
         write_log(f"Página excluída: {url} - User: {user_id}")
@@ -11,6 +11,7 @@ try:
         update_user_profile, update_user_password, get_user_by_id, get_user_by_email
     )
     from backend.auth.jwt import verify_password
+    from backend.services.execution import run_blocking
 except ImportError:
     from auth.middleware import get_current_user
     from auth.models import UserResponse, UpdateProfileRequest, ChangePasswordRequest
@@ -18,6 +19,7 @@ except ImportError:
         update_user_profile, update_user_password, get_user_by_id, get_user_by_email
     )
     from auth.jwt import verify_password
+    from services.execution import run_blocking
 
 router = APIRouter(prefix="/api/profile", tags=["profile"])
 
@@ -56,7 +58,8 @@ async def update_my_profile(
     """
     user_id = current_user["id"]
     
-    success = update_user_profile(
+    success = await run_blocking(
+        update_user_profile,
         user_id=user_id,
         name=profile_data.name,
         email=profile_data.email
@@ -69,7 +72,7 @@ async def update_my_profile(
         )
     
     # Get updated user
-    updated_user = get_user_by_id(user_id)
+    updated_user = await run_blocking(get_user_by_id, user_id)
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -100,21 +103,21 @@ async def change_password(
     user_id = current_user["id"]
     
     # Verify current password
-    user = get_user_by_email(current_user["email"])
+    user = await run_blocking(get_user_by_email, current_user["email"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    if not verify_password(password_data.current_password, user["hashed_password"]):
+    if not await run_blocking(verify_password, password_data.current_password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Current password is incorrect"
         )
     
     # Update password
-    success = update_user_password(user_id, password_data.new_password)
+    success = await run_blocking(update_user_password, user_id, password_data.new_password)
     
     if not success:
         raise HTTPException(
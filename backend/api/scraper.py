@@ -1,144 +1,351 @@
 """
 Rotas da API para execução do scraper
 Endpoints: /api/scraper/run, /api/scraper/last-run
+
+A coleta roda como job (ver services/jobs.py): /run só enfileira e
+devolve o job; o progresso sai em /api/jobs/{id}/events
 """
 
 from fastapi import APIRouter, HTTPException, Depends
 try:
     from backend.auth.middleware import get_current_user
-    from backend.models import ScraperResponse
+    from backend.models import ScraperResponse, JobResponse
     from backend.main import (
         write_log, 
         LAST_RUN_FILE,
-        collect_from_page,
-        normalize_whatsapp_link,
-        is_group_link,
-        save_links,
-        send_telegram_message
+        send_telegram_links
     )
+    from backend.db.connection import save_link_entries
+    from backend.db.pages import load_pages, update_page_check
+    from backend.services.collectors.engine import CollectionEngine, canonical_page_url
+    from backend.services.collectors.group_metadata import resolve_group_names, get_cached_name, UNAVAILABLE
+    from backend.db.known_links import known_links
+    from backend.services.processing.cleaning import normalize_whatsapp_link, is_group_link
+    from backend.services.execution import run_blocking
+    from backend.services.jobs import job_manager, JobContext
+    from backend.db.users import list_all_users
+    from backend.api.jobs import job_response
+    from backend.services import recrawl
 except ImportError:
     from auth.middleware import get_current_user
-    from models import ScraperResponse
+    from models import ScraperResponse, JobResponse
     from main import (
         write_log, 
         LAST_RUN_FILE,
-        collect_from_page,
-        normalize_whatsapp_link,
-        is_group_link,
-        save_links,
-        send_telegram_message
+        send_telegram_links
     )
+    from db.connection import save_link_entries
+    from db.pages import load_pages, update_page_check
+    from services.collectors.engine import CollectionEngine, canonical_page_url
+    from services.collectors.group_metadata import resolve_group_names, get_cached_name, UNAVAILABLE
+    from db.known_links import known_links
+    from services.processing.cleaning import normalize_whatsapp_link, is_group_link
+    from services.execution import run_blocking
+    from services.jobs import job_manager, JobContext
+    from db.users import list_all_users
+    from api.jobs import job_response
+    from services import recrawl
 from datetime import datetime
+from typing import Dict, List, Optional
 import os
 
 router = APIRouter(prefix="/api/scraper", tags=["scraper"])
 
 
-@router.post("/run", response_model=ScraperResponse)
-async def run_scraper(current_user: dict = Depends(get_current_user)):
+def _clean_links(raw_links: List[str]) -> List[str]:
+    """Normaliza, filtra links de grupo e remove duplicatas"""
+    cleaned = []
+    for l in raw_links:
+        c = normalize_whatsapp_link(l)
+        if is_group_link(c):
+            cleaned.append(c)
+    return list(dict.fromkeys(cleaned))
+
+
+def _record_page_check(user_id: int, result: dict, outcome: str, validators: bool = True) -> None:
+    """Grava os validadores HTTP e, com a recoleta adaptativa ligada, o próximo horário da página"""
+    if not recrawl.RECRAWL_ADAPTIVE:
+        if validators:
+            update_page_check(result["url"], user_id, validators=result)
+        return
+    interval, next_check_at = recrawl.schedule_after_check(result["url"], result.get("check_interval"), outcome)
+    update_page_check(
+        result["url"],
+        user_id,
+        interval,
+        next_check_at,
+        changed=outcome in (recrawl.NEW_LINKS, recrawl.CHANGED),
+        validators=result if validators else None,
+    )
+
+
+def _filter_known_links(user_id: int, results: List[dict]) -> List[str]:
+    """Links das páginas que o usuário ainda não tem (bloqueante: pode reler o índice)"""
+    links = list(dict.fromkeys(link for r in results for link in r.get("cleaned", [])))
+    try:
+        return known_links.filter_new(user_id, links)
+    except Exception as e:
+        # Sem índice, o banco continua descartando os repetidos
+        write_log(f"⚠️ Índice de links indisponível (User: {user_id}): {e}")
+        return links
+
+
+def _process_user_results(
+    user_id: int,
+    results: List[dict],
+    group_names: Dict[str, str],
+    new_links: Optional[set] = None,
+) -> ScraperResponse:
     """
-    Executa o scraper em todas as páginas cadastradas do usuário atual
-    Retorna os links encontrados e estatísticas da execução
+    Salva e notifica os links coletados de um usuário
+    Só os links em new_links (os que o usuário ainda não tem) são gravados;
+    None grava todos. Executado fora do event loop (faz I/O bloqueante)
     """
-    try:
-        user_id = current_user["id"]
-        write_log(f"Iniciando coleta de links... User: {user_id}")
-        try:
-            from backend.db.pages import load_pages
-        except ImportError:
-            from db.pages import load_pages
-        pages = load_pages(user_id)
-        
-        if not pages:
-            return ScraperResponse(
+    all_found = []
+    entries = []
+    # Páginas não visitadas porque o job foi cancelado
+    pages_cancelled = sum(1 for r in results if r["status"] == "cancelled")
+    total_checked = len(results) - pages_cancelled
+    pages_skipped = 0
+    processed_pages = []
+
+    for result in results:
+        url = result["url"]
+        name = result["name"]
+
+        if result["status"] == "cancelled":
+            continue
+
+        if result.get("error"):
+            write_log(f"Erro ao coletar {url}: {result['error']}")
+            _record_page_check(user_id, result, recrawl.ERROR, validators=False)
+            continue
+
+        if result["status"] in ("not_modified", "unchanged"):
+            pages_skipped += 1
+            # 304 mantém os validadores; corpo igual pode vir com ETag novo
+            _record_page_check(user_id, result, recrawl.UNCHANGED, validators=result["status"] == "unchanged")
+            continue
+
+        for link in result["cleaned"]:
+            # Nome real do grupo: os links novos já foram resolvidos (mesmo sem
+            # nome); só os já conhecidos consultam o cache
+            if link in group_names:
+                real_name = group_names[link]
+            else:
+                real_name = get_cached_name(link) or UNAVAILABLE
+            display_name = f"{real_name} (via {name})" if real_name != UNAVAILABLE else name
+            if new_links is None or link in new_links:
+                entries.append((link, display_name))
+
+            all_found.append({
+                "url": link,
+                "source": display_name,
+                "found_at": datetime.utcnow().isoformat()
+            })
+        processed_pages.append(result)
+
+    # Uma única escrita no banco para todos os links do usuário;
+    # só os convites que ainda não existiam geram notificação
+    new_rows = save_link_entries(entries, user_id=user_id)
+
+    # Uma notificação por página com todos os convites novos dela
+    # (enfileirada: a coleta não espera o Telegram)
+    page_of_link: Dict[str, dict] = {}
+    for result in processed_pages:
+        for link in result["cleaned"]:
+            page_of_link.setdefault(link, result)
+    new_by_page: Dict[str, List[dict]] = {}
+    for row in new_rows:
+        page = page_of_link.get(row["url"])
+        real_name = group_names.get(row["url"], UNAVAILABLE)
+        new_by_page.setdefault(page["name"] if page else row["source"], []).append({
+            "url": row["url"],
+            "name": real_name if real_name != UNAVAILABLE else None,
+            "link_type": row.get("link_type", "group"),
+            "is_relaunch": row.get("is_relaunch", False),
+        })
+    for page_name, links in new_by_page.items():
+        send_telegram_links(page_name, links)
+
+    # Página que trouxe convite novo volta antes; só mudou o conteúdo, um pouco antes.
+    # Só grava os validadores depois que os links da página foram salvos
+    pages_with_new = {page_of_link[row["url"]]["url"] for row in new_rows if row["url"] in page_of_link}
+    for result in processed_pages:
+        outcome = recrawl.NEW_LINKS if result["url"] in pages_with_new else recrawl.CHANGED
+        _record_page_check(user_id, result, outcome)
+
+    # Registra última execução por usuário
+    msg = (
+        f"Coleta finalizada. Páginas verificadas: {total_checked}, "
+        f"sem mudança: {pages_skipped}, links encontrados: {len(all_found)}, novos: {len(new_rows)}"
+    )
+    if pages_cancelled:
+        msg += f", canceladas: {pages_cancelled}"
+    user_last_run_file = f"{LAST_RUN_FILE}.{user_id}"
+    with open(user_last_run_file, "w", encoding="utf-8") as f:
+        f.write(f"{datetime.utcnow().isoformat()} - {msg}")
+
+    write_log(f"{msg} - User: {user_id}")
+
+    return ScraperResponse(
+        success=True,
+        total_checked=total_checked,
+        links_found=len(all_found),
+        links=all_found,
+        message=msg,
+        pages_skipped=pages_skipped,
+    )
+
+
+async def run_scraper_for_users(
+    user_ids: List[int],
+    engine: Optional[CollectionEngine] = None,
+    job: Optional[JobContext] = None,
+    page_filter: Optional[Dict[int, List[str]]] = None,
+) -> Dict[int, ScraperResponse]:
+    """
+    Coleta as páginas de vários usuários em uma única passada do motor,
+    respeitando os limites globais e por host
+    Usado pelos jobs manuais e do agendador; com job, emite um evento por
+    página e para de buscar páginas quando o job é cancelado.
+    page_filter restringe a coleta às URLs listadas de cada usuário (recoleta adaptativa)
+    """
+    engine = engine or CollectionEngine()
+    responses: Dict[int, ScraperResponse] = {}
+    queued: List[dict] = []
+
+    for user_id in user_ids:
+        pages = await run_blocking(load_pages, user_id)
+        only = set(page_filter[user_id]) if page_filter and user_id in page_filter else None
+        user_pages = []
+        for page in pages:
+            url = str(page.get("url", "")).strip()
+            name = str(page.get("name", "")).strip()
+            if url and (only is None or url in only):
+                user_pages.append({
+                    "url": url,
+                    "name": name,
+                    "user_id": user_id,
+                    "etag": page.get("etag"),
+                    "last_modified": page.get("last_modified"),
+                    "content_hash": page.get("content_hash"),
+                    "check_interval": page.get("check_interval"),
+                })
+
+        if not user_pages:
+            responses[user_id] = ScraperResponse(
                 success=False,
                 total_checked=0,
                 links_found=0,
                 links=[],
                 message="Nenhuma página cadastrada"
             )
-        
-        all_found = []
-        total_checked = 0
-        
-        for page in pages:
-            url = str(page.get("url", "")).strip()
-            name = str(page.get("name", "")).strip()
-            
-            if not url:
-                continue
-            
-            total_checked += 1
-            write_log(f"Verificando página: {name} ({url}) - User: {user_id}")
-            
-            try:
-                links, has_form, is_thanks = collect_from_page(url)
-            except Exception as e:
-                write_log(f"Erro ao coletar {url}: {e}")
-                links = []
-            
-            # Processa e normaliza os links
-            cleaned = []
-            for l in links:
-                c = normalize_whatsapp_link(l)
-                if is_group_link(c):
-                    cleaned.append(c)
-            
-            # Remove duplicatas
-            cleaned = list(dict.fromkeys(cleaned))
-            
-            if cleaned:
-                # Importa o extrator de metadados
-                from backend.services.collectors.requests_collector import fetch_group_metadata
-                
-                # Salva no banco de dados associado ao usuário
-                for link in cleaned:
-                    # Tenta pegar o nome real do grupo
-                    real_name = fetch_group_metadata(link)
-                    display_name = f"{real_name} (via {name})" if real_name != "Nome Indisponível" else name
-                    
-                    save_links([link], source=display_name, user_id=user_id)
-                    
-                    all_found.append({
-                        "url": link,
-                        "source": display_name,
-                        "found_at": datetime.utcnow().isoformat()
-                    })
-                    send_telegram_message(link, display_name)
-        
-        # Registra última execução por usuário
-        msg = f"Coleta finalizada. Páginas verificadas: {total_checked}, links encontrados: {len(all_found)}"
-        user_last_run_file = f"{LAST_RUN_FILE}.{user_id}"
-        with open(user_last_run_file, "w", encoding="utf-8") as f:
-            f.write(f"{datetime.utcnow().isoformat()} - {msg}")
-        
-        write_log(f"{msg} - User: {user_id}")
-        
-        return ScraperResponse(
-            success=True,
-            total_checked=total_checked,
-            links_found=len(all_found),
-            links=all_found,
-            message=msg
+            continue
+
+        write_log(f"Iniciando coleta de links... User: {user_id} ({len(user_pages)} páginas)")
+        queued.extend(user_pages)
+
+    def page_done(result: dict) -> None:
+        result["cleaned"] = _clean_links(result.get("links", []))
+        if job is not None:
+            job.page_done(
+                url=result["url"],
+                name=result["name"],
+                user_id=result["user_id"],
+                status=result["status"],
+                links_found=len(result["cleaned"]),
+                error=result.get("error"),
+            )
+
+    if job is not None:
+        job.set_total(len(queued))
+    # Página monitorada por vários usuários é buscada uma vez só (ver engine.run)
+    fetches = len({canonical_page_url(page["url"]) for page in queued})
+    if fetches < len(queued):
+        write_log(f"Coleta compartilhada: {len(queued)} páginas, {fetches} buscas ({len(queued) - fetches} evitadas)")
+    results = await engine.run(
+        queued,
+        on_result=page_done,
+        should_cancel=job.cancelled if job is not None else None,
+    )
+
+    by_user: Dict[int, List[dict]] = {}
+    for result in results:
+        result.setdefault("cleaned", [])
+        by_user.setdefault(result["user_id"], []).append(result)
+
+    # Só os links que o usuário ainda não tem seguem para nome, gravação e notificação
+    new_by_user: Dict[int, set] = {}
+    for user_id, user_results in by_user.items():
+        new_by_user[user_id] = set(await run_blocking(_filter_known_links, user_id, user_results))
+    group_names = await resolve_group_names([link for links in new_by_user.values() for link in links])
+
+    for user_id, user_results in by_user.items():
+        responses[user_id] = await run_blocking(
+            _process_user_results, user_id, user_results, group_names, new_by_user[user_id],
+        )
+
+    return responses
+
+
+async def run_scraper_logic(user_id: int, engine: Optional[CollectionEngine] = None) -> ScraperResponse:
+    """Executa a coleta completa de um único usuário"""
+    responses = await run_scraper_for_users([user_id], engine=engine)
+    return responses[user_id]
+
+
+async def run_scrape_job(job: JobContext) -> dict:
+    """
+    Executa um job 'scrape': payload {"user_ids": [...]}; sem user_ids
+    (agendador), coleta para todos os usuários aprovados.
+    Com "pages": {"<user_id>": [url, ...]}, só essas páginas (recoleta adaptativa)
+    Resultado: {"users": {"<user_id>": ScraperResponse}}
+    """
+    user_ids = job.payload.get("user_ids")
+    if user_ids is None:
+        users = await run_blocking(list_all_users, False)
+        user_ids = [user["id"] for user in users]
+    pages = job.payload.get("pages")
+    page_filter = {int(user_id): urls for user_id, urls in pages.items()} if pages else None
+    responses = await run_scraper_for_users(user_ids, job=job, page_filter=page_filter)
+    return {"users": {str(user_id): r.model_dump() for user_id, r in responses.items()}}
+
+
+job_manager.register("scrape", run_scrape_job)
+
+
+@router.post("/run", response_model=JobResponse, status_code=202)
+async def run_scraper(current_user: dict = Depends(get_current_user)):
+    """
+    Enfileira a coleta de todas as páginas cadastradas do usuário atual
+    Retorna o job; um job manual ainda ativo do usuário é reaproveitado
+    """
+    user_id = current_user["id"]
+    try:
+        job = await run_blocking(
+            job_manager.submit, "scrape", {"user_ids": [user_id]},
+            lane="manual", user_id=user_id, dedupe=True,
         )
     except Exception as e:
-        write_log(f"Erro na coleta: {e}")
+        write_log(f"Erro ao enfileirar coleta: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao executar scraper: {str(e)}")
+    return job_response(job)
+
+
+def _read_last_run(user_id: int) -> str:
+    user_last_run_file = f"{LAST_RUN_FILE}.{user_id}"
+    if not os.path.exists(user_last_run_file):
+        return "Nunca executado"
+    with open(user_last_run_file, "r", encoding="utf-8") as f:
+        return f.read()
 
 
 @router.get("/last-run")
 async def get_last_run(current_user: dict = Depends(get_current_user)):
     """Retorna informações da última execução do scraper do usuário atual"""
     try:
-        user_id = current_user["id"]
-        user_last_run_file = f"{LAST_RUN_FILE}.{user_id}"
-        
-        if not os.path.exists(user_last_run_file):
-            return {"last_run": "Nunca executado"}
-        
-        with open(user_last_run_file, "r", encoding="utf-8") as f:
-            content = f.read()
-            return {"last_run": content}
+        return {"last_run": await run_blocking(_read_last_run, current_user["id"])}
     except Exception as e:
         return {"last_run": f"Erro ao ler: {str(e)}"}
 
@@ -6,17 +6,20 @@ Rotas de configuração de integrações.
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-import requests
 from datetime import datetime
 from pydantic import BaseModel
 try:
     from backend.auth.middleware import get_current_user
     from backend.models import TelegramConfig
     from backend.main import load_config, save_config, write_log
+    from backend.services import http_client
+    from backend.services.execution import run_blocking, run_network
 except ImportError:
     from auth.middleware import get_current_user
     from models import TelegramConfig
     from main import load_config, save_config, write_log
+    from services import http_client
+    from services.execution import run_blocking, run_network
 
 router = APIRouter(tags=["settings"])
 router_telegram = APIRouter(tags=["settings"])
@@ -82,7 +85,7 @@ async def set_telegram_webhook(current_user: dict = Depends(get_current_user)):
     api_url = f"https://api.telegram.org/bot{token}/setWebhook"
 
     try:
-        resp = requests.post(api_url, json={"url": webhook_url, "allowed_updates": ["message"]}, timeout=10)
+        resp = await run_blocking(http_client.post, api_url, json={"url": webhook_url, "allowed_updates": ["message"]}, timeout=10)
         data = resp.json()
         if data.get("ok"):
             write_log(f"Webhook Telegram ativado: {webhook_url}")
@@ -102,7 +105,7 @@ async def remove_telegram_webhook(current_user: dict = Depends(get_current_user)
     if not token:
         raise HTTPException(status_code=400, detail="Bot Telegram não configurado.")
     try:
-        resp = requests.post(f"https://api.telegram.org/bot{token}/deleteWebhook", timeout=10)
+        resp = await run_blocking(http_client.post, f"https://api.telegram.org/bot{token}/deleteWebhook", timeout=10)
         if resp.json().get("ok"):
             return {"success": True, "message": "Webhook removido com sucesso"}
         raise HTTPException(status_code=400, detail="Erro ao remover webhook")
@@ -131,7 +134,7 @@ async def test_telegram(current_user: dict = Depends(get_current_user)):
     payload = {"chat_id": chat_id, "text": msg, "parse_mode": "Markdown"}
 
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = await run_blocking(http_client.post, url, json=payload, timeout=10)
         response.raise_for_status()
         write_log("Teste de Telegram enviado")
         return {"success": True, "message": "Mensagem de teste enviada com sucesso!"}
@@ -186,7 +189,7 @@ async def validate_youtube_key(current_user: dict = Depends(get_current_user)):
     if not key:
         raise HTTPException(status_code=400, detail="Chave da YouTube API não configurada")
 
-    result = validate_api_key(key)
+    result = await run_blocking(validate_api_key, key)
     if not result["valid"]:
         raise HTTPException(status_code=400, detail=result["message"])
 
@@ -252,7 +255,7 @@ async def validate_ai_key(current_user: dict = Depends(get_current_user)):
     try:
         service = GeminiService(api_key=key)
         # Tenta uma resposta mínima
-        response = service.model.generate_content("hello")
+        response = await run_network(service.model.generate_content, "hello")
         if response.text:
             return {"success": True, "message": "Chave Gemini validada com sucesso!"}
         return {"success": False, "message": "Sem resposta da API"}
@@ -8,6 +8,10 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import os
+try:
+    from backend.services.execution import bcrypt_slot
+except ImportError:
+    from services.execution import bcrypt_slot
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production-minimum-32-chars")
@@ -33,7 +37,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     # This ensures consistency with get_password_hash
     if len(plain_password.encode('utf-8')) > 72:
         plain_password = plain_password.encode('utf-8')[:72].decode('utf-8', errors='ignore')
-    return pwd_context.verify(plain_password, hashed_password)
+    with bcrypt_slot():
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -67,7 +72,8 @@ def get_password_hash(password: str) -> str:
             password = password[:72]
     
     # Use hash method explicitly with string
-    return pwd_context.hash(password)
+    with bcrypt_slot():
+        return pwd_context.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
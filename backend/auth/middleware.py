@@ -8,10 +8,16 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 try:
     from backend.auth.jwt import decode_access_token
-    from backend.db.users import get_user_by_id, get_user_by_email
+    from backend.db.users import (
+        get_user_by_id, get_user_by_email, get_default_user, get_cached_user, DEFAULT_USER_KEY
+    )
+    from backend.services.execution import run_blocking
 except ImportError:
     from auth.jwt import decode_access_token
-    from db.users import get_user_by_id, get_user_by_email
+    from db.users import (
+        get_user_by_id, get_user_by_email, get_default_user, get_cached_user, DEFAULT_USER_KEY
+    )
+    from services.execution import run_blocking
 
 security = HTTPBearer(auto_error=False)
 
@@ -39,13 +45,8 @@ async def get_current_user_from_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Get user from database
-    try:
-        from backend.db.users import get_user_by_id
-    except ImportError:
-        from db.users import get_user_by_id
-
-    user = get_user_by_id(user_id)
+    # Get user from the cache; a miss goes to storage off the event loop
+    user = get_cached_user(user_id) or await run_blocking(get_user_by_id, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,31 +73,15 @@ async def get_current_user(
     except Exception:
         pass
         
-    # Fallback to default user logic
-    try:
-        from backend.db.users import list_all_users, get_user_by_id
-    except ImportError:
-        from db.users import list_all_users, get_user_by_id
-
+    # Fallback to default user logic (resolved once, then served from the user cache)
     try:
-        # 1. Try ID 1
-        user = get_user_by_id(1)
+        user = get_cached_user(DEFAULT_USER_KEY) or await run_blocking(get_default_user)
         if user:
             return user
-            
-        # 2. Try first approved user
-        users = list_all_users(include_pending=False)
-        if users:
-            return users[0]
-            
-        # 3. Try any user
-        users = list_all_users(include_pending=True)
-        if users:
-            return users[0]
     except Exception:
         pass
         
-    # 4. ULTIMATE FALLBACK: Return a mock admin user to prevent system failure
+    # ULTIMATE FALLBACK: Return a mock admin user to prevent system failure
     # This ensures the app is ALWAYS functional for single-user local/private use
     return {
         "id": 1, 
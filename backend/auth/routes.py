@@ -7,11 +7,15 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from backend.auth.models import UserRegister, UserLogin, TokenResponse, UserResponse
 try:
-    from backend.auth.middleware import get_current_user, create_access_token
+    from backend.auth.middleware import get_current_user
+    from backend.auth.jwt import create_access_token
     from backend.db.users import authenticate_user, create_user, get_user_by_email, get_user_by_id
+    from backend.services.execution import run_blocking
 except ImportError:
-    from auth.middleware import get_current_user, create_access_token
+    from auth.middleware import get_current_user
+    from auth.jwt import create_access_token
     from db.users import authenticate_user, create_user, get_user_by_email, get_user_by_id
+    from services.execution import run_blocking
 from datetime import timedelta
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -32,7 +36,8 @@ async def register(user_data: UserRegister):
     Raises:
         HTTPException: If email already exists or registration fails
     """
-    success, user_id, error_message = create_user(
+    success, user_id, error_message = await run_blocking(
+        create_user,
         email=user_data.email,
         password=user_data.password,
         name=user_data.name
@@ -44,7 +49,7 @@ async def register(user_data: UserRegister):
             detail=error_message or "Registration failed"
         )
     
-    user = get_user_by_id(user_id)
+    user = await run_blocking(get_user_by_id, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -68,7 +73,7 @@ async def login(user_data: UserLogin):
     Raises:
         HTTPException: If credentials are invalid or user not approved
     """
-    user = authenticate_user(user_data.email, user_data.password)
+    user = await run_blocking(authenticate_user, user_data.email, user_data.password)
     
     if not user:
         raise HTTPException(
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark do extrator de links: implementação anterior (dois parses com
+BeautifulSoup) contra o extrator de passada única com pré-filtro
+
+Uso:
+    python backend/benchmarks/bench_extractor.py [pasta_com_html] [--repeat N]
+    python backend/benchmarks/bench_extractor.py --record URL [URL ...]
+
+Sem argumentos usa backend/data/recorded_pages/*.html. O modo --record baixa
+as URLs informadas para essa pasta, para que o benchmark rode sempre sobre as
+mesmas páginas.
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+
+from backend.services.collectors.requests_collector import (
+    USER_AGENT,
+    extract_page_signals,
+    lxml_etree,
+)
+
+DEFAULT_DIR = os.path.join(ROOT, "backend", "data", "recorded_pages")
+
+
+def legacy_extract(html: str):
+    """Cópia da implementação anterior: um parse para has_form, outro para os links"""
+    soup = BeautifulSoup(html, 'html.parser')
+    has_form = bool(soup.find('form'))
+
+    soup = BeautifulSoup(html, 'html.parser')
+    links = set()
+    for a in soup.find_all('a', href=True):
+        href = a['href'].strip()
+        if 'whatsapp' in href.lower():
+            links.add(href)
+    for tag in soup.find_all(onclick=True):
+        for m in re.findall(r'(https?://[^\s\'\"]+)', tag['onclick']):
+            if 'whatsapp' in m.lower():
+                links.add(m)
+    for script in soup.find_all('script'):
+        s = script.string or ""
+        for m in re.findall(r'(https?://[^\s\'\"]*whatsapp[^\s\'\"]*)', s, re.IGNORECASE):
+            links.add(m)
+    return list(links), has_form
+
+
+def record(urls, folder):
+    from backend.services import http_client
+
+    os.makedirs(folder, exist_ok=True)
+    for url in urls:
+        try:
+            resp = http_client.get(url, headers={"User-Agent": USER_AGENT}, timeout=15)
+            resp.raise_for_status()
+        except Exception as e:
+            print(f"  erro  {url}: {e}")
+            continue
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12] + ".html"
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        print(f"  salvo {url} -> {name} ({len(resp.content)} bytes)")
+
+
+def bench(fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in docs:
+            fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", default=DEFAULT_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--record", nargs="+", metavar="URL")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.folder)
+        return
+
+    paths = sorted(glob.glob(os.path.join(args.folder, "*.html")))
+    if not paths:
+        print(f"Nenhuma página gravada em {args.folder}. Use --record URL ... primeiro.")
+        sys.exit(1)
+    docs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            docs.append(f.read())
+
+    mismatches = 0
+    for path, html in zip(paths, docs):
+        old_links, old_form = legacy_extract(html)
+        new_links, new_form = extract_page_signals(html)
+        if set(old_links) != set(new_links) or old_form != new_form:
+            mismatches += 1
+            print(f"  divergência em {os.path.basename(path)}")
+
+    total_bytes = sum(len(d.encode("utf-8")) for d in docs)
+    with_signal = sum(1 for d in docs if "whatsapp" in d.lower())
+    old_t = bench(legacy_extract, docs, args.repeat)
+    new_t = bench(extract_page_signals, docs, args.repeat)
+
+    print(f"Páginas: {len(docs)} ({total_bytes / 1024:.0f} KiB, {with_signal} com sinal de convite)")
+    print(f"Parser:  {'lxml' if lxml_etree is not None else 'html.parser'}")
+    print(f"Anterior:      {old_t * 1000:9.1f} ms")
+    print(f"Passada única: {new_t * 1000:9.1f} ms  ({old_t / new_t:.1f}x)")
+    print(f"Divergências:  {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
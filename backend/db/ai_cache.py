@@ -0,0 +1,65 @@
+"""
+Cache persistente da classificação por IA — Supabase PostgreSQL.
+Sem Supabase, usa o SQLite local (ver local_store.py).
+
+- ai_cache: análise da IA por URL canônica
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+from backend.db.supabase_client import get_client
+from backend.db import local_store
+
+# URLs por consulta (cabe na URL do PostgREST)
+IN_BATCH_SIZE = 50
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def get_analyses(urls: Iterable[str], max_age: Optional[float] = None) -> Dict[str, dict]:
+    """url -> análise, para as URLs já classificadas (mais novas que max_age segundos)."""
+    keys = list(dict.fromkeys(urls))
+    since = (_now() - timedelta(seconds=max_age)).isoformat() if max_age else ""
+    found: Dict[str, dict] = {}
+    client = get_client()
+    for i in range(0, len(keys), IN_BATCH_SIZE):
+        batch = keys[i : i + IN_BATCH_SIZE]
+        if client is None:
+            placeholders = ",".join("?" * len(batch))
+            rows = local_store.get_connection().execute(
+                f"SELECT url, analysis FROM ai_cache WHERE url IN ({placeholders}) AND created_at >= ?",
+                (*batch, since),
+            ).fetchall()
+        else:
+            query = client.table("ai_cache").select("url, analysis").in_("url", batch)
+            if since:
+                query = query.gte("created_at", since)
+            rows = query.execute().data or []
+        for row in rows:
+            analysis = row["analysis"]
+            found[row["url"]] = json.loads(analysis) if isinstance(analysis, str) else analysis
+    return found
+
+
+def save_analyses(analyses: Dict[str, dict]) -> None:
+    """Grava (ou substitui) as análises, por URL."""
+    if not analyses:
+        return
+    now_iso = _now().isoformat()
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO ai_cache (url, analysis, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET analysis = excluded.analysis, created_at = excluded.created_at",
+                [(url, json.dumps(analysis), now_iso) for url, analysis in analyses.items()],
+            )
+        return
+
+    client.table("ai_cache").upsert(
+        [{"url": url, "analysis": analysis, "created_at": now_iso} for url, analysis in analyses.items()],
+        on_conflict="url",
+    ).execute()
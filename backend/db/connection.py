@@ -1,37 +1,57 @@
 """
 Operações de banco de dados para links — Supabase PostgreSQL.
-Substitui a implementação SQLite anterior.
+Sem Supabase, usa o SQLite local (ver local_store.py).
 """
 
 from datetime import datetime, timezone, timedelta
-from typing import List, Tuple, Optional
+from typing import List, Optional, Set, Tuple
 from backend.db.supabase_client import get_client
+from backend.db import local_store
+from backend.services.processing.cleaning import canonical_invite_key
+from backend.db.known_links import known_links
 
 
-import json
-import os
+LINK_FIELDS = "id, url, source, found_at, link_type, is_relaunch"
 
-# Caminho para fallback local
-LOCAL_LINKS_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "links.json")
 
-def _load_local_links() -> List[dict]:
-    if not os.path.exists(LOCAL_LINKS_FILE):
-        return []
+def _log(message: str) -> None:
     try:
-        with open(LOCAL_LINKS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        try:
+            from backend.main import write_log
+        except ImportError:
+            from main import write_log
+        write_log(message)
     except Exception:
-        return []
+        print(message)
 
-def _save_local_links(links: List[dict]) -> None:
-    os.makedirs(os.path.dirname(LOCAL_LINKS_FILE), exist_ok=True)
-    try:
-        # Mantém apenas os últimos 500 links no modo local para não sobrecarregar
-        to_save = links[-500:]
-        with open(LOCAL_LINKS_FILE, "w", encoding="utf-8") as f:
-            json.dump(to_save, f, indent=4, ensure_ascii=True)
-    except Exception:
-        pass
+
+# Vira False se a função link_stats ainda não existe no Supabase (avisa uma vez)
+_stats_rpc_available = True
+
+
+def _list_local_links(limit: int, user_id: Optional[int], cursor: Optional[int] = None) -> List[dict]:
+    # Keyset: "id < cursor" usa a chave primária, custo constante em qualquer página
+    where, params = [], []
+    if user_id is not None:
+        where.append("user_id = ?")
+        params.append(user_id)
+    if cursor is not None:
+        where.append("id < ?")
+        params.append(cursor)
+    sql = f"SELECT {LINK_FIELDS} FROM links"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    rows = local_store.get_connection().execute(sql + " ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+    return [{**dict(r), "is_relaunch": bool(r["is_relaunch"])} for r in rows]
+
+
+def _local_link_stats(user_id: int) -> dict:
+    row = local_store.get_connection().execute(
+        "SELECT COUNT(*) AS total_links, COUNT(DISTINCT url) AS unique_links, "
+        "COUNT(DISTINCT NULLIF(source, '')) AS campaigns FROM links WHERE user_id = ?",
+        (user_id,),
+    ).fetchone()
+    return dict(row)
 
 def init_db():
     """
@@ -45,99 +65,247 @@ def init_db():
         except Exception as e:
             print(f"\n[AVISO] Erro ao inicializar admin no Supabase: {e}")
     else:
-        print("💡 [DB] Sistema operando em MODO LOCAL (SQLite desativado, usando JSON).")
+        local_store.init_local_db()
+        print(f"💡 [DB] Sistema operando em MODO LOCAL (SQLite em {local_store.LOCAL_DB_PATH}).")
 
 
-def save_links(links: List[str], source: str = "unknown", user_id: int = 1) -> None:
+def _link_type(link: str) -> str:
+    return 'community' if '/community/' in link.lower() else 'group'
+
+def _relaunch_sources(client, sources: List[str], now: datetime) -> Set[str]:
     """
-    Salva links coletados. Fallback para JSON se Supabase offline.
+    Fontes que já tinham links há mais de 3 dias (relançamento de grupo)
+    Uma consulta por fonte distinta do lote, não por link
+    """
+    three_days_ago = (now - timedelta(days=3)).isoformat()
+    relaunch = set()
+    for source in sources:
+        try:
+            old_links = client.table("links") \
+                .select("id") \
+                .eq("source", source) \
+                .lt("found_at", three_days_ago) \
+                .limit(1) \
+                .execute()
+            if old_links.data:
+                relaunch.add(source)
+        except Exception:
+            continue
+    return relaunch
+
+def save_link_entries(entries: List[Tuple[str, str]], user_id: int = 1) -> List[dict]:
+    """
+    Salva um lote de links (url, fonte) com uma única escrita.
+    No Supabase é um upsert com on_conflict em (user_id, invite_key) que ignora
+    convites já salvos; no modo local, INSERT OR IGNORE no mesmo índice único.
+    A deduplicação é pela chave canônica do convite (plataforma + código),
+    então variantes da mesma URL não viram linhas diferentes.
+
+    Returns:
+        Apenas as linhas realmente novas (url, source, found_at, ...)
     """
     client = get_client()
     now = datetime.now(timezone.utc)
     now_iso = now.isoformat()
 
+    # Remove duplicatas dentro do próprio lote
+    batch = {}
+    for link, source in entries:
+        key = canonical_invite_key(link)
+        if key and key not in batch:
+            batch[key] = (link, source)
+
+    if not batch:
+        return []
+
     if client is None:
-        local_links = _load_local_links()
-        for link in links:
-            if not any(l["url"] == link for l in local_links):
-                local_links.append({
+        three_days_ago = (now - timedelta(days=3)).isoformat()
+        new_rows = []
+        # Uma transação para o lote inteiro; o índice único (user_id, invite_key)
+        # descarta convites já salvos
+        with local_store.transaction() as conn:
+            relaunch = {
+                source for source in {source for _, source in batch.values()}
+                if conn.execute(
+                    "SELECT 1 FROM links WHERE source = ? AND found_at < ? LIMIT 1",
+                    (source, three_days_ago),
+                ).fetchone()
+            }
+            for key, (link, source) in batch.items():
+                row = {
                     "url": link,
+                    "invite_key": key,
                     "source": source,
                     "found_at": now_iso,
-                    "link_type": 'community' if '/community/' in link.lower() else 'group',
-                    "is_relaunch": False
-                })
-        _save_local_links(local_links)
-        return
+                    "user_id": user_id,
+                    "link_type": _link_type(link),
+                    "is_relaunch": source in relaunch,
+                }
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO links (user_id, url, invite_key, source, found_at, link_type, is_relaunch) "
+                    "VALUES (:user_id, :url, :invite_key, :source, :found_at, :link_type, :is_relaunch)",
+                    row,
+                )
+                if cur.rowcount:
+                    new_rows.append(row)
+        known_links.add(user_id, [row["invite_key"] for row in new_rows])
+        return new_rows
 
     # Lógica Supabase
-    is_relaunch = False
+    relaunch = _relaunch_sources(client, sorted({source for _, source in batch.values()}), now)
+    rows = [{
+        "url": link,
+        "invite_key": key,
+        "source": source,
+        "found_at": now_iso,
+        "user_id": user_id,
+        "link_type": _link_type(link),
+        "is_relaunch": source in relaunch,
+    } for key, (link, source) in batch.items()]
+
     try:
-        three_days_ago = (now - timedelta(days=3)).isoformat()
-        old_links = client.table("links") \
-            .select("id") \
-            .eq("source", source) \
-            .lt("found_at", three_days_ago) \
-            .limit(1) \
+        # ON CONFLICT DO NOTHING: a resposta traz só as linhas inseridas
+        result = client.table("links") \
+            .upsert(rows, on_conflict="user_id,invite_key", ignore_duplicates=True) \
             .execute()
-        
-        if old_links.data:
-            is_relaunch = True
-    except Exception:
-        pass
+        new_rows = result.data or []
+    except Exception as e:
+        # Sem a migração 002 (coluna invite_key / índice único) o upsert falha:
+        # salva um a um, como antes dela; erros daqui em diante sobem para o job
+        _log(f"⚠️ [DB] Upsert de {len(rows)} links falhou ({e}); salvando um a um (migração 002 aplicada?)")
+        new_rows = _insert_links_each(client, rows, user_id)
+    known_links.add(user_id, [row["invite_key"] for row in new_rows])
+    return new_rows
+
+
+def _insert_links_each(client, rows: List[dict], user_id: int) -> List[dict]:
+    """
+    Caminho anterior à migração 002: um insert por link, pulando as URLs que o
+    usuário já tem (sem o índice único o banco não rejeita repetidos).
+    """
+    urls = [row["url"] for row in rows]
+    existing = set()
+    for i in range(0, len(urls), 100):
+        result = client.table("links").select("url").eq("user_id", user_id).in_("url", urls[i:i + 100]).execute()
+        existing.update(r["url"] for r in result.data or [])
 
-    for link in links:
+    new_rows = []
+    for row in rows:
+        if row["url"] in existing:
+            continue
         try:
-            link_type = 'community' if '/community/' in link.lower() else 'group'
-            client.table("links").insert({
-                "url": link,
-                "source": source,
-                "found_at": now_iso,
-                "user_id": user_id,
-                "link_type": link_type,
-                "is_relaunch": is_relaunch,
-            }).execute()
+            client.table("links").insert(row).execute()
         except Exception:
-            continue
+            # Tabela sem a coluna invite_key
+            client.table("links").insert({k: v for k, v in row.items() if k != "invite_key"}).execute()
+        new_rows.append(row)
+    return new_rows
+
+
+def save_links(links: List[str], source: str = "unknown", user_id: int = 1) -> List[str]:
+    """
+    Salva links coletados de uma mesma fonte. Fallback para JSON se Supabase offline.
+
+    Returns:
+        URLs que ainda não existiam
+    """
+    new_rows = save_link_entries([(link, source) for link in links], user_id=user_id)
+    return [row["url"] for row in new_rows]
+
+
+def list_links_page(
+    user_id: Optional[int] = None,
+    limit: int = 100,
+    cursor: Optional[int] = None,
+) -> Tuple[List[dict], Optional[int]]:
+    """
+    Lista links do mais novo para o mais antigo com paginação keyset em id.
+
+    Args:
+        cursor: id do último link da página anterior (None = primeira página)
+
+    Returns:
+        (links, next_cursor); next_cursor é None na última página
+    """
+    client = get_client()
+    if client is None:
+        rows = _list_local_links(limit, user_id, cursor)
+    else:
+        try:
+            query = client.table("links").select(LINK_FIELDS)
+            if user_id is not None:
+                query = query.eq("user_id", user_id)
+            if cursor is not None:
+                query = query.lt("id", cursor)
+            rows = query.order("id", desc=True).limit(limit).execute().data or []
+        except Exception:
+            # Fallback local em caso de erro na query
+            rows = _list_local_links(limit, user_id, cursor)
+
+    next_cursor = rows[-1]["id"] if len(rows) == limit else None
+    return rows, next_cursor
 
 
 def list_links(limit: int = 100, user_id: Optional[int] = None) -> List[Tuple[str, str, str]]:
     """
-    Lista links. Fallback para JSON se Supabase offline.
+    Lista links (url, source, found_at). Fallback para o SQLite local se Supabase offline.
+    """
+    rows, _ = list_links_page(user_id=user_id, limit=limit)
+    return [(row["url"], row["source"], row["found_at"]) for row in rows]
+
+
+def get_link_stats(user_id: int) -> dict:
+    """
+    Totais de links do usuário calculados no banco (sem trazer as linhas).
+    No Supabase usa a função link_stats (migrations/004_link_stats.sql).
+
+    Returns:
+        {"total_links", "unique_links", "campaigns"}
     """
+    global _stats_rpc_available
     client = get_client()
     if client is None:
-        local_links = _load_local_links()
-        # Inverte e limita
-        results = local_links[::-1][:limit]
-        return [(l["url"], l["source"], l["found_at"]) for l in results]
+        return _local_link_stats(user_id)
 
+    if _stats_rpc_available:
+        try:
+            result = client.rpc("link_stats", {"p_user_id": user_id}).execute()
+            row = result.data[0] if isinstance(result.data, list) else result.data
+            return {
+                "total_links": int(row["total_links"]),
+                "unique_links": int(row["unique_links"]),
+                "campaigns": int(row["campaigns"]),
+            }
+        except Exception as e:
+            _stats_rpc_available = False
+            print(f"⚠️ [DB] link_stats indisponível ({e}); aplique migrations/004_link_stats.sql. Usando contagem parcial.")
+
+    # Sem a função no banco: total exato via count, distintos sobre uma amostra
     try:
-        query = client.table("links").select("url, source, found_at")
-        if user_id is not None:
-            query = query.eq("user_id", user_id)
-        result = query.order("id", desc=True).limit(limit).execute()
-        return [(row["url"], row["source"], row["found_at"]) for row in result.data]
+        total = client.table("links").select("id", count="exact").eq("user_id", user_id).limit(1).execute().count or 0
+        rows = client.table("links").select("url, source").eq("user_id", user_id) \
+            .order("id", desc=True).limit(10000).execute().data or []
+        return {
+            "total_links": total,
+            "unique_links": len({r["url"] for r in rows}),
+            "campaigns": len({r["source"] for r in rows if r.get("source")}),
+        }
     except Exception:
-        # Fallback local em caso de erro na query
-        local_links = _load_local_links()
-        results = local_links[::-1][:limit]
-        return [(l["url"], l["source"], l["found_at"]) for l in results]
+        return _local_link_stats(user_id)
 
 
 def delete_link(url: str, user_id: int) -> bool:
     """Deleta um link."""
     client = get_client()
     if client is None:
-        links = _load_local_links()
-        new_links = [l for l in links if l["url"] != url]
-        if len(new_links) < len(links):
-            _save_local_links(new_links)
-            return True
-        return False
+        with local_store.transaction() as conn:
+            cur = conn.execute("DELETE FROM links WHERE user_id = ? AND url = ?", (user_id, url))
+        known_links.forget(user_id)
+        return cur.rowcount > 0
 
     try:
         res = client.table("links").delete().eq("user_id", user_id).eq("url", url).execute()
+        known_links.forget(user_id)
         return bool(res.data)
     except Exception:
         return False
@@ -147,11 +315,14 @@ def delete_all_links(user_id: int) -> bool:
     """Deleta todos os links."""
     client = get_client()
     if client is None:
-        _save_local_links([])
+        with local_store.transaction() as conn:
+            conn.execute("DELETE FROM links WHERE user_id = ?", (user_id,))
+        known_links.forget(user_id)
         return True
 
     try:
         client.table("links").delete().eq("user_id", user_id).execute()
+        known_links.forget(user_id)
         return True
     except Exception:
         return False
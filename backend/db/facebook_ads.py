@@ -0,0 +1,121 @@
+"""
+Estado da sincronização da Facebook Ad Library — Supabase PostgreSQL.
+Sem Supabase, usa o SQLite local (ver local_store.py).
+
+- facebook_ads: ids de anúncios já processados (índice compartilhado)
+- facebook_watermarks: ad_delivery_start_time mais recente visto por termo
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Set
+from backend.db.supabase_client import get_client
+from backend.db import local_store
+
+# Ids por consulta (cabe na URL do PostgREST)
+IN_BATCH_SIZE = 100
+
+# Função save_facebook_watermarks (migrations/009_facebook_ads.sql)
+_watermark_rpc_available = True
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def get_known_ad_ids(ad_ids: Iterable[str]) -> Set[str]:
+    """Os ids, entre os informados, que já estão no índice."""
+    ids = list(dict.fromkeys(i for i in ad_ids if i))
+    known: Set[str] = set()
+    client = get_client()
+    for i in range(0, len(ids), IN_BATCH_SIZE):
+        batch = ids[i : i + IN_BATCH_SIZE]
+        if client is None:
+            placeholders = ",".join("?" * len(batch))
+            rows = local_store.get_connection().execute(
+                f"SELECT ad_id FROM facebook_ads WHERE ad_id IN ({placeholders})", batch
+            ).fetchall()
+        else:
+            rows = client.table("facebook_ads").select("ad_id").in_("ad_id", batch).execute().data or []
+        known.update(r["ad_id"] for r in rows)
+    return known
+
+
+def save_ads(ads: List[dict]) -> None:
+    """Registra anúncios processados ({ad_id, search_term, delivery_start})."""
+    if not ads:
+        return
+    now_iso = _now_iso()
+    rows = [
+        {
+            "ad_id": ad["ad_id"],
+            "search_term": ad.get("search_term"),
+            "delivery_start": ad.get("delivery_start") or None,
+            "first_seen_at": now_iso,
+        }
+        for ad in ads
+    ]
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO facebook_ads (ad_id, search_term, delivery_start, first_seen_at) "
+                "VALUES (:ad_id, :search_term, :delivery_start, :first_seen_at)",
+                rows,
+            )
+        return
+
+    client.table("facebook_ads").upsert(rows, on_conflict="ad_id", ignore_duplicates=True).execute()
+
+
+def get_watermarks(term_keys: List[str]) -> Dict[str, str]:
+    """term_key -> data (YYYY-MM-DD) do anúncio mais recente já visto."""
+    if not term_keys:
+        return {}
+    client = get_client()
+    if client is None:
+        placeholders = ",".join("?" * len(term_keys))
+        rows = local_store.get_connection().execute(
+            f"SELECT term_key, delivery_start FROM facebook_watermarks WHERE term_key IN ({placeholders})",
+            term_keys,
+        ).fetchall()
+        return {r["term_key"]: r["delivery_start"][:10] for r in rows}
+
+    rows = (
+        client.table("facebook_watermarks").select("term_key, delivery_start")
+        .in_("term_key", term_keys).execute().data
+    ) or []
+    return {r["term_key"]: r["delivery_start"][:10] for r in rows}
+
+
+def save_watermarks(marks: Dict[str, str]) -> None:
+    """Grava as novas marcas; uma marca gravada nunca volta para trás."""
+    global _watermark_rpc_available
+    if not marks:
+        return
+    now_iso = _now_iso()
+    rows = [{"term_key": key, "delivery_start": value, "updated_at": now_iso} for key, value in marks.items()]
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO facebook_watermarks (term_key, delivery_start, updated_at) "
+                "VALUES (:term_key, :delivery_start, :updated_at) "
+                "ON CONFLICT (term_key) DO UPDATE SET "
+                "delivery_start = MAX(delivery_start, excluded.delivery_start), updated_at = excluded.updated_at",
+                rows,
+            )
+        return
+
+    if _watermark_rpc_available:
+        try:
+            client.rpc("save_facebook_watermarks", {"p_rows": rows}).execute()
+            return
+        except Exception as e:
+            _watermark_rpc_available = False
+            print(f"⚠️ [DB] save_facebook_watermarks indisponível ({e}); aplique migrations/009_facebook_ads.sql.")
+
+    # Sem a função: só grava as marcas mais novas que as do banco (leitura seguida de upsert)
+    stored = get_watermarks(list(marks))
+    rows = [r for r in rows if r["delivery_start"][:10] > stored.get(r["term_key"], "")]
+    if rows:
+        client.table("facebook_watermarks").upsert(rows, on_conflict="term_key").execute()
@@ -0,0 +1,289 @@
+"""
+Jobs de coleta (fila persistente) — Supabase PostgreSQL.
+Sem Supabase, usa o SQLite local (ver local_store.py).
+O executor fica em services/jobs.py; aqui só o armazenamento.
+
+Vários processos (workers do gunicorn) compartilham a mesma tabela:
+claim_job só deixa um deles passar o job de 'queued' para 'running'.
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import List, Optional
+from backend.db.supabase_client import get_client
+from backend.db import local_store
+
+JOB_FIELDS = (
+    "id, user_id, kind, lane, status, payload, result, error, progress_done, progress_total, "
+    "cancel_requested, attempts, created_at, updated_at, started_at, finished_at"
+)
+# Campos guardados como JSON (texto no SQLite, jsonb no Supabase)
+JSON_FIELDS = ("payload", "result")
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("succeeded", "failed", "cancelled", "timed_out")
+# Linhas por página ao ler a fila do Supabase (limite padrão do PostgREST)
+PAGE_SIZE = 1000
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _load_json(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _job_row(row) -> dict:
+    job = dict(row)
+    for field in JSON_FIELDS:
+        job[field] = _load_json(job.get(field))
+    job["cancel_requested"] = bool(job.get("cancel_requested"))
+    return job
+
+
+def _local_values(fields: dict) -> dict:
+    values = dict(fields)
+    for field in JSON_FIELDS:
+        if field in values and values[field] is not None:
+            values[field] = json.dumps(values[field], ensure_ascii=False, default=str)
+    if "cancel_requested" in values:
+        values["cancel_requested"] = int(bool(values["cancel_requested"]))
+    return values
+
+
+def _local_update(job_id: int, fields: dict, where: str = "") -> bool:
+    values = _local_values(fields)
+    # Chamado só com nomes de coluna fixos (ver JOB_FIELDS)
+    assignments = ", ".join(f"{field} = :{field}" for field in values)
+    with local_store.transaction() as conn:
+        cur = conn.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = :id{where}",
+            {**values, "id": job_id},
+        )
+    return cur.rowcount > 0
+
+
+def create_job(kind: str, lane: str, payload: dict, user_id: Optional[int] = None) -> dict:
+    """Grava um job novo com status 'queued' e o retorna (com o ID)."""
+    now_iso = _now_iso()
+    row = {
+        "user_id": user_id,
+        "kind": kind,
+        "lane": lane,
+        "status": "queued",
+        "payload": payload,
+        "created_at": now_iso,
+        "updated_at": now_iso,
+    }
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (user_id, kind, lane, status, payload, created_at, updated_at) "
+                "VALUES (:user_id, :kind, :lane, :status, :payload, :created_at, :updated_at)",
+                _local_values(row),
+            )
+        return get_job(cur.lastrowid)
+
+    result = client.table("jobs").insert(row).execute()
+    return _job_row(result.data[0])
+
+
+def get_job(job_id: int) -> Optional[dict]:
+    """Busca um job pelo ID."""
+    client = get_client()
+    if client is None:
+        row = local_store.get_connection().execute(
+            f"SELECT {JOB_FIELDS} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return _job_row(row) if row else None
+
+    result = client.table("jobs").select(JOB_FIELDS).eq("id", job_id).limit(1).execute()
+    return _job_row(result.data[0]) if result.data else None
+
+
+def list_jobs(user_id: Optional[int] = None, limit: int = 20) -> List[dict]:
+    """Jobs mais recentes (de um usuário, ou de todos se user_id for None)."""
+    client = get_client()
+    if client is None:
+        query = f"SELECT {JOB_FIELDS} FROM jobs"
+        params: tuple = ()
+        if user_id is not None:
+            query += " WHERE user_id = ?"
+            params = (user_id,)
+        rows = local_store.get_connection().execute(
+            query + " ORDER BY id DESC LIMIT ?", params + (limit,)
+        ).fetchall()
+        return [_job_row(r) for r in rows]
+
+    query = client.table("jobs").select(JOB_FIELDS)
+    if user_id is not None:
+        query = query.eq("user_id", user_id)
+    result = query.order("id", desc=True).limit(limit).execute()
+    return [_job_row(r) for r in result.data]
+
+
+def list_queued_jobs() -> List[dict]:
+    """Jobs esperando execução, do mais antigo ao mais novo."""
+    client = get_client()
+    if client is None:
+        rows = local_store.get_connection().execute(
+            f"SELECT {JOB_FIELDS} FROM jobs WHERE status = 'queued' ORDER BY id"
+        ).fetchall()
+        return [_job_row(r) for r in rows]
+
+    jobs: List[dict] = []
+    last_id = 0
+    while True:
+        rows = (
+            client.table("jobs").select(JOB_FIELDS).eq("status", "queued")
+            .gt("id", last_id).order("id").limit(PAGE_SIZE).execute().data
+        ) or []
+        jobs.extend(_job_row(r) for r in rows)
+        if len(rows) < PAGE_SIZE:
+            return jobs
+        last_id = rows[-1]["id"]
+
+
+def find_active_job(kind: str, user_id: Optional[int], lane: str) -> Optional[dict]:
+    """Job do mesmo tipo/usuário/fila ainda na fila ou rodando (evita execução duplicada)."""
+    client = get_client()
+    if client is None:
+        row = local_store.get_connection().execute(
+            f"SELECT {JOB_FIELDS} FROM jobs WHERE kind = ? AND user_id IS ? AND lane = ? "
+            "AND status IN ('queued', 'running') ORDER BY id LIMIT 1",
+            (kind, user_id, lane),
+        ).fetchone()
+        return _job_row(row) if row else None
+
+    query = client.table("jobs").select(JOB_FIELDS).eq("kind", kind).eq("lane", lane)
+    query = query.is_("user_id", "null") if user_id is None else query.eq("user_id", user_id)
+    result = query.in_("status", list(ACTIVE_STATUSES)).order("id").limit(1).execute()
+    return _job_row(result.data[0]) if result.data else None
+
+
+def update_job(job_id: int, **fields) -> bool:
+    """Atualiza campos do job (status, result, error, progresso, datas) e o batimento."""
+    fields["updated_at"] = _now_iso()
+    client = get_client()
+    if client is None:
+        return _local_update(job_id, fields)
+
+    result = client.table("jobs").update(fields).eq("id", job_id).execute()
+    return bool(result.data)
+
+
+def claim_job(job_id: int, attempts: int) -> bool:
+    """
+    Passa o job de 'queued' para 'running' de forma atômica.
+    Retorna False se outro processo já o pegou (ou se foi cancelado).
+    """
+    now_iso = _now_iso()
+    fields = {"status": "running", "attempts": attempts, "started_at": now_iso, "updated_at": now_iso}
+    client = get_client()
+    if client is None:
+        return _local_update(job_id, fields, " AND status = 'queued'")
+
+    result = client.table("jobs").update(fields).eq("id", job_id).eq("status", "queued").execute()
+    return bool(result.data)
+
+
+def requeue_stale_jobs(stale_before_iso: str) -> int:
+    """
+    Devolve para a fila jobs 'running' sem batimento desde stale_before_iso
+    (o processo que os executava morreu ou foi reiniciado).
+    """
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running' AND updated_at < ?",
+                (_now_iso(), stale_before_iso),
+            )
+        return cur.rowcount
+
+    result = (
+        client.table("jobs").update({"status": "queued", "updated_at": _now_iso()})
+        .eq("status", "running").lt("updated_at", stale_before_iso).execute()
+    )
+    return len(result.data or [])
+
+
+def request_job_cancel(job_id: int) -> Optional[dict]:
+    """
+    Pede o cancelamento de um job.
+    Job na fila é cancelado na hora; job em execução para antes da próxima página.
+    Retorna o job atualizado (None se não existir).
+    """
+    job = get_job(job_id)
+    if job is None or job["status"] in FINAL_STATUSES:
+        return job
+    now_iso = _now_iso()
+    fields = {"status": "cancelled", "cancel_requested": True, "finished_at": now_iso, "updated_at": now_iso}
+    client = get_client()
+    if client is None:
+        cancelled = _local_update(job_id, fields, " AND status = 'queued'")
+    else:
+        result = client.table("jobs").update(fields).eq("id", job_id).eq("status", "queued").execute()
+        cancelled = bool(result.data)
+    if not cancelled:
+        # Já está rodando: o executor vê a marca e para
+        update_job(job_id, cancel_requested=True)
+    return get_job(job_id)
+
+
+def append_job_events(job_id: int, events: List[dict]) -> None:
+    """Grava um lote de eventos ({seq, type, data, created_at}) do job."""
+    if not events:
+        return
+    rows = [{"job_id": job_id, **event} for event in events]
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO job_events (job_id, seq, type, data, created_at) "
+                "VALUES (:job_id, :seq, :type, :data, :created_at)",
+                [{**r, "data": json.dumps(r.get("data"), ensure_ascii=False, default=str)} for r in rows],
+            )
+        return
+
+    client.table("job_events").upsert(rows, on_conflict="job_id,seq", ignore_duplicates=True).execute()
+
+
+def list_job_events(job_id: int, after_seq: int = 0, limit: int = 500) -> List[dict]:
+    """Eventos do job com seq > after_seq, em ordem."""
+    client = get_client()
+    if client is None:
+        rows = local_store.get_connection().execute(
+            "SELECT seq, type, data, created_at FROM job_events WHERE job_id = ? AND seq > ? "
+            "ORDER BY seq LIMIT ?",
+            (job_id, after_seq, limit),
+        ).fetchall()
+        return [{**dict(r), "data": _load_json(r["data"])} for r in rows]
+
+    result = (
+        client.table("job_events").select("seq, type, data, created_at")
+        .eq("job_id", job_id).gt("seq", after_seq).order("seq").limit(limit).execute()
+    )
+    return result.data
+
+
+def get_last_job_event_seq(job_id: int) -> int:
+    """Maior seq já gravado do job (0 se nenhum); um job retomado continua a sequência."""
+    client = get_client()
+    if client is None:
+        row = local_store.get_connection().execute(
+            "SELECT MAX(seq) AS seq FROM job_events WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return row["seq"] or 0
+
+    result = (
+        client.table("job_events").select("seq").eq("job_id", job_id)
+        .order("seq", desc=True).limit(1).execute()
+    )
+    return result.data[0]["seq"] if result.data else 0
@@ -0,0 +1,164 @@
+"""
+Índice em memória dos convites que cada usuário já tem salvos.
+Sem Supabase, lê do SQLite local (ver local_store.py).
+
+A coleta compara os links extraídos com o índice e só os novos seguem para
+nome do grupo, gravação e notificação. Cada convite ocupa um inteiro de 64
+bits (hash da chave canônica), e o índice de um usuário é relido quando a
+assinatura (quantidade, maior id) dos links dele no banco muda — por exemplo,
+quando outro processo apaga links. A assinatura é consultada no máximo uma vez
+a cada KNOWN_LINKS_CHECK_INTERVAL segundos por usuário.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from backend.db.supabase_client import get_client
+from backend.db import local_store
+from backend.services.processing.cleaning import canonical_invite_key
+
+# Linhas por página ao ler o índice do Supabase (limite padrão do PostgREST)
+PAGE_SIZE = 1000
+# Intervalo mínimo entre consultas da assinatura de um usuário (segundos)
+KNOWN_LINKS_CHECK_INTERVAL = float(os.getenv("KNOWN_LINKS_CHECK_INTERVAL", "60"))
+
+Signature = Tuple[int, Optional[int]]
+
+
+def _fingerprint(invite_key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(invite_key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _signature(user_id: int) -> Signature:
+    """(quantidade, maior id) dos links do usuário: muda a cada inserção ou exclusão"""
+    client = get_client()
+    if client is None:
+        row = local_store.get_connection().execute(
+            "SELECT COUNT(*) AS total, MAX(id) AS last_id FROM links WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row["total"], row["last_id"]
+
+    result = (
+        client.table("links").select("id", count="exact")
+        .eq("user_id", user_id).order("id", desc=True).limit(1).execute()
+    )
+    return result.count or 0, result.data[0]["id"] if result.data else None
+
+
+def _load_keys(user_id: int) -> Set[int]:
+    client = get_client()
+    if client is None:
+        rows = local_store.get_connection().execute(
+            "SELECT invite_key FROM links WHERE user_id = ?", (user_id,)
+        ).fetchall()
+        return {_fingerprint(r["invite_key"]) for r in rows}
+
+    keys: Set[int] = set()
+    last_id = 0
+    while True:
+        rows = (
+            client.table("links").select("id, invite_key")
+            .eq("user_id", user_id).gt("id", last_id).order("id").limit(PAGE_SIZE).execute().data
+        ) or []
+        keys.update(_fingerprint(r["invite_key"]) for r in rows if r.get("invite_key"))
+        if len(rows) < PAGE_SIZE:
+            return keys
+        last_id = rows[-1]["id"]
+
+
+class KnownLinkIndex:
+    """Convites conhecidos por usuário (thread-safe)"""
+
+    def __init__(self):
+        self._keys: Dict[int, Set[int]] = {}
+        self._signatures: Dict[int, Signature] = {}
+        # Quando a assinatura foi conferida e quantos links este processo gravou desde então
+        self._checked_at: Dict[int, float] = {}
+        self._added: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {"checked": 0, "known": 0, "new": 0, "loads": 0, "signature_checks": 0}
+
+    def _ensure(self, user_id: int) -> Set[int]:
+        with self._lock:
+            keys = self._keys.get(user_id)
+            if keys is not None and time.monotonic() - self._checked_at[user_id] < KNOWN_LINKS_CHECK_INTERVAL:
+                return keys
+        signature = _signature(user_id)
+        with self._lock:
+            self._stats["signature_checks"] += 1
+            previous = self._signatures.get(user_id)
+            if user_id in self._keys and previous is not None:
+                added = self._added.get(user_id, 0)
+                # Só as gravações deste processo: mais linhas e um id maior (ou nada mudou)
+                same = (
+                    signature[0] == previous[0] + added
+                    and (signature[1] == previous[1] if not added else (signature[1] or 0) > (previous[1] or 0))
+                )
+                if same:
+                    self._signatures[user_id] = signature
+                    self._checked_at[user_id] = time.monotonic()
+                    self._added[user_id] = 0
+                    return self._keys[user_id]
+        keys = _load_keys(user_id)
+        with self._lock:
+            self._keys[user_id] = keys
+            self._signatures[user_id] = signature
+            self._checked_at[user_id] = time.monotonic()
+            self._added[user_id] = 0
+            self._stats["loads"] += 1
+        return keys
+
+    def warm(self, user_ids: Iterable[int]) -> None:
+        """Carrega o índice dos usuários (startup)"""
+        for user_id in user_ids:
+            self._ensure(user_id)
+
+    def filter_new(self, user_id: int, links: List[str]) -> List[str]:
+        """Links cujo convite o usuário ainda não tem (na ordem recebida)"""
+        if not links:
+            return []
+        keys = self._ensure(user_id)
+        new = []
+        for link in links:
+            key = canonical_invite_key(link)
+            if key and _fingerprint(key) not in keys:
+                new.append(link)
+        with self._lock:
+            self._stats["checked"] += len(links)
+            self._stats["new"] += len(new)
+            self._stats["known"] += len(links) - len(new)
+        return new
+
+    def add(self, user_id: int, invite_keys: List[str]) -> None:
+        """Registra convites recém-gravados (conferidos na próxima consulta da assinatura)"""
+        with self._lock:
+            keys = self._keys.get(user_id)
+            if not invite_keys or keys is None:
+                return
+            keys.update(_fingerprint(key) for key in invite_keys)
+            self._added[user_id] = self._added.get(user_id, 0) + len(invite_keys)
+
+    def forget(self, user_id: int) -> None:
+        """Descarta o índice do usuário (relido no próximo uso)"""
+        with self._lock:
+            self._keys.pop(user_id, None)
+            self._signatures.pop(user_id, None)
+            self._checked_at.pop(user_id, None)
+            self._added.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "users": len(self._keys),
+                "keys": sum(len(keys) for keys in self._keys.values()),
+            }
+
+
+known_links = KnownLinkIndex()
+
+
+def get_known_link_stats() -> dict:
+    return known_links.stats()
@@ -0,0 +1,319 @@
+"""
+Armazenamento local — SQLite em modo WAL.
+Usado quando o Supabase não está configurado (ou está fora do ar).
+Substitui os arquivos links.json / pages.json, que eram reescritos inteiros
+a cada gravação e perdiam histórico.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+LOCAL_DB_PATH = os.path.abspath(
+    os.getenv("LOCAL_DB_PATH", os.path.join(os.path.dirname(__file__), "linkpulse.db"))
+)
+
+# Arquivos do modo local antigo, importados uma única vez
+LEGACY_LINKS_FILE = os.path.join(DATA_DIR, "links.json")
+LEGACY_PAGES_FILE = os.path.join(DATA_DIR, "pages.json")
+
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL UNIQUE,
+    hashed_password TEXT NOT NULL,
+    name TEXT,
+    is_admin INTEGER NOT NULL DEFAULT 0,
+    approved INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL DEFAULT 1,
+    url TEXT NOT NULL,
+    invite_key TEXT NOT NULL,
+    source TEXT,
+    found_at TEXT NOT NULL,
+    link_type TEXT NOT NULL DEFAULT 'group',
+    is_relaunch INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS links_user_invite_key_idx ON links (user_id, invite_key);
+CREATE INDEX IF NOT EXISTS links_user_id_idx ON links (user_id, id);
+CREATE INDEX IF NOT EXISTS links_source_found_at_idx ON links (source, found_at);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL DEFAULT 1,
+    url TEXT NOT NULL,
+    name TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    check_interval INTEGER,
+    next_check_at TEXT,
+    last_checked_at TEXT,
+    last_change_at TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS pages_user_url_idx ON pages (user_id, url);
+
+CREATE TABLE IF NOT EXISTS settings (
+    user_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    kind TEXT NOT NULL,
+    lane TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_user_id_idx ON jobs (user_id, id);
+
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS scheduler_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    scheduled_for TEXT NOT NULL,
+    next_run_at TEXT,
+    owner TEXT NOT NULL,
+    fired_at TEXT NOT NULL,
+    lag_seconds REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'claimed',
+    job_id INTEGER,
+    error TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS scheduler_runs_task_slot_idx ON scheduler_runs (task, scheduled_for);
+
+CREATE TABLE IF NOT EXISTS youtube_quota (
+    key_hash TEXT NOT NULL,
+    day TEXT NOT NULL,
+    units INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (key_hash, day)
+);
+
+CREATE TABLE IF NOT EXISTS youtube_watermarks (
+    user_id INTEGER NOT NULL,
+    query_key TEXT NOT NULL,
+    published_after TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, query_key)
+);
+
+CREATE TABLE IF NOT EXISTS youtube_videos (
+    video_id TEXT PRIMARY KEY,
+    description TEXT,
+    whatsapp_links TEXT NOT NULL DEFAULT '[]',
+    landing_urls TEXT NOT NULL DEFAULT '[]',
+    is_tutorial INTEGER NOT NULL DEFAULT 0,
+    first_seen_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS facebook_ads (
+    ad_id TEXT PRIMARY KEY,
+    search_term TEXT,
+    delivery_start TEXT,
+    first_seen_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS facebook_watermarks (
+    term_key TEXT PRIMARY KEY,
+    delivery_start TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ai_cache (
+    url TEXT PRIMARY KEY,
+    analysis TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+"""
+
+# Colunas adicionadas depois da criação da tabela (bancos antigos recebem via ALTER TABLE)
+ADDED_COLUMNS = {
+    "pages": {
+        "check_interval": "INTEGER",
+        "next_check_at": "TEXT",
+        "last_checked_at": "TEXT",
+        "last_change_at": "TEXT",
+    },
+}
+# Índices sobre colunas adicionadas: criados depois do ALTER TABLE
+POST_MIGRATION_SQL = """
+CREATE INDEX IF NOT EXISTS pages_next_check_at_idx ON pages (next_check_at);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _connect() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(LOCAL_DB_PATH), exist_ok=True)
+    # isolation_level=None: as transações são abertas explicitamente em transaction()
+    conn = sqlite3.connect(LOCAL_DB_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Em WAL, NORMAL só pode perder a última transação numa queda de energia,
+    # nunca corromper o banco
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Conexão da thread atual (uma por thread, reaproveitada)."""
+    init_local_db()
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _connect()
+        _local.conn = conn
+    return conn
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """
+    Transação de escrita (BEGIN IMMEDIATE): pega o lock de escrita logo no
+    início, então escritores concorrentes esperam em vez de falhar no commit.
+    """
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def init_local_db() -> None:
+    """Cria as tabelas, importa os JSON antigos e garante o admin padrão."""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        conn = _connect()
+        try:
+            conn.executescript(SCHEMA)
+            _add_missing_columns(conn)
+            conn.executescript(POST_MIGRATION_SQL)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            _ensure_local_admin(conn)
+            _import_legacy_json(conn)
+        finally:
+            conn.close()
+        _initialized = True
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column, definition in columns.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _ensure_local_admin(conn: sqlite3.Connection) -> None:
+    """Mesmo admin padrão do Supabase (ver users._ensure_admin_exists)."""
+    if conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+        return
+    from backend.auth.jwt import get_password_hash
+    conn.execute(
+        "INSERT INTO users (email, hashed_password, name, is_admin, approved, created_at) "
+        "VALUES (?, ?, ?, 1, 1, ?)",
+        ("admin@linkpulse.com", get_password_hash("admin123"), "Administrador", _now_iso()),
+    )
+
+
+def _read_legacy(path: str) -> list:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else []
+    except Exception:
+        return []
+
+
+def _import_legacy_json(conn: sqlite3.Connection) -> None:
+    """Importa links.json / pages.json do modo local antigo e os renomeia para .migrated."""
+    from backend.services.processing.cleaning import canonical_invite_key
+
+    if os.path.exists(LEGACY_LINKS_FILE):
+        rows = []
+        for l in _read_legacy(LEGACY_LINKS_FILE):
+            url = l.get("url")
+            key = l.get("invite_key") or canonical_invite_key(url or "")
+            if not url or not key:
+                continue
+            rows.append((
+                l.get("user_id") or 1, url, key, l.get("source"),
+                l.get("found_at") or _now_iso(), l.get("link_type") or "group",
+                1 if l.get("is_relaunch") else 0,
+            ))
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT OR IGNORE INTO links (user_id, url, invite_key, source, found_at, link_type, is_relaunch) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("COMMIT")
+        os.replace(LEGACY_LINKS_FILE, LEGACY_LINKS_FILE + ".migrated")
+        print(f"💡 [DB] {len(rows)} links importados de links.json para o SQLite local.")
+
+    if os.path.exists(LEGACY_PAGES_FILE):
+        rows = [
+            (p.get("user_id") or 1, p["url"], p.get("name"), p.get("etag"),
+             p.get("last_modified"), p.get("content_hash"), _now_iso())
+            for p in _read_legacy(LEGACY_PAGES_FILE) if p.get("url")
+        ]
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT OR IGNORE INTO pages (user_id, url, name, etag, last_modified, content_hash, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("COMMIT")
+        os.replace(LEGACY_PAGES_FILE, LEGACY_PAGES_FILE + ".migrated")
+        print(f"💡 [DB] {len(rows)} páginas importadas de pages.json para o SQLite local.")
@@ -0,0 +1,6 @@
+-- Validadores HTTP da última coleta de cada página monitorada.
+-- Permitem GET condicional (If-None-Match / If-Modified-Since) e
+-- pular a extração quando o corpo não mudou.
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS etag TEXT;
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS last_modified TEXT;
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS content_hash TEXT;
@@ -0,0 +1,12 @@
+-- Chave canônica do convite (plataforma + código), calculada no backend por
+-- canonical_invite_key(). Variantes da mesma URL (http/https, barra final,
+-- query string, /invite/) passam a ser o mesmo link.
+ALTER TABLE links ADD COLUMN IF NOT EXISTS invite_key TEXT;
+
+-- Linhas ainda sem chave (NULL) não conflitam no índice, então ele pode ser
+-- criado antes do preenchimento.
+CREATE UNIQUE INDEX IF NOT EXISTS links_user_invite_key_idx ON links (user_id, invite_key);
+
+-- Em seguida preencha os links existentes (e remova as duplicatas antigas) com
+-- as mesmas regras do backend:
+--     python backend/db/migrations/002_links_invite_key_backfill.py
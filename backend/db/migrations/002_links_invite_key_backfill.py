@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Preenche links.invite_key no Supabase (depois de 002_links_invite_key.sql)
+
+A chave vem de canonical_invite_key(), a mesma função usada ao gravar, então
+os links antigos batem com o índice de convites conhecidos. Quando dois links
+do mesmo usuário dão a mesma chave, fica o que já tinha chave ou, entre os
+antigos, o de menor id; os outros são apagados.
+
+Uso:
+    python backend/db/migrations/002_links_invite_key_backfill.py [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.db.supabase_client import get_client
+from backend.services.processing.cleaning import canonical_invite_key
+
+# Linhas por página (limite padrão do PostgREST) e ids por exclusão
+PAGE_SIZE = 1000
+DELETE_BATCH_SIZE = 100
+
+
+def _read_links(client) -> list:
+    rows = []
+    last_id = 0
+    while True:
+        page = (
+            client.table("links").select("id, user_id, url, invite_key")
+            .gt("id", last_id).order("id").limit(PAGE_SIZE).execute().data
+        ) or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        last_id = page[-1]["id"]
+
+
+def _delete(client, ids: list) -> None:
+    for i in range(0, len(ids), DELETE_BATCH_SIZE):
+        client.table("links").delete().in_("id", ids[i : i + DELETE_BATCH_SIZE]).execute()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="só mostra o que seria alterado")
+    args = parser.parse_args()
+
+    client = get_client()
+    if client is None:
+        print("Supabase não configurado (SUPABASE_URL/SUPABASE_KEY); o SQLite local já grava invite_key.")
+        return 1
+
+    rows = _read_links(client)
+    taken = {(r["user_id"], r["invite_key"]) for r in rows if r.get("invite_key")}
+    updates, duplicates, skipped = [], [], 0
+    for row in rows:
+        if row.get("invite_key"):
+            continue
+        key = canonical_invite_key(row.get("url") or "")
+        if not key:
+            skipped += 1
+            continue
+        if (row["user_id"], key) in taken:
+            duplicates.append(row["id"])
+        else:
+            taken.add((row["user_id"], key))
+            updates.append((row["id"], row["user_id"], key))
+
+    print(f"{len(rows)} links: {len(updates)} a preencher, {len(duplicates)} duplicados, {skipped} sem URL")
+    if args.dry_run:
+        return 0
+
+    # Duplicatas saem antes, para as novas chaves não baterem no índice único
+    _delete(client, duplicates)
+    for done, (link_id, user_id, key) in enumerate(updates, 1):
+        try:
+            client.table("links").update({"invite_key": key}).eq("id", link_id).execute()
+        except Exception:
+            # Outro processo pode ter gravado o mesmo convite enquanto o script rodava
+            holder = (
+                client.table("links").select("id").eq("user_id", user_id)
+                .eq("invite_key", key).limit(1).execute().data
+            )
+            if not holder:
+                raise
+            _delete(client, [link_id])
+        if done % 500 == 0:
+            print(f"  {done}/{len(updates)}")
+    print("Concluído.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+-- Configurações por usuário (chave/valor), usadas por db/settings.py
+-- (consultas personalizadas da descoberta, chave da YouTube API, etc.)
+CREATE TABLE IF NOT EXISTS settings (
+    user_id BIGINT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, key)
+);
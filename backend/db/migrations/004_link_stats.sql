@@ -0,0 +1,15 @@
+-- Estatísticas do dashboard calculadas no banco (GET /api/stats).
+-- Evita trazer todas as linhas de links só para contá-las.
+CREATE INDEX IF NOT EXISTS links_user_id_id_idx ON links (user_id, id DESC);
+
+CREATE OR REPLACE FUNCTION link_stats(p_user_id BIGINT)
+RETURNS TABLE (total_links BIGINT, unique_links BIGINT, campaigns BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        COUNT(*) AS total_links,
+        COUNT(DISTINCT url) AS unique_links,
+        COUNT(DISTINCT NULLIF(source, '')) AS campaigns
+    FROM links
+    WHERE user_id = p_user_id;
+$$;
@@ -0,0 +1,33 @@
+-- Fila persistente de coletas (ver db/jobs.py e services/jobs.py)
+-- Cada execução do scraper, do agendador ou da coleta rápida vira um job;
+-- os eventos por página ficam em job_events para o stream SSE
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    user_id BIGINT,
+    kind TEXT NOT NULL,
+    lane TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    payload JSONB,
+    result JSONB,
+    error TEXT,
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER NOT NULL DEFAULT 0,
+    cancel_requested BOOLEAN NOT NULL DEFAULT false,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    -- Batimento do processo que executa o job; parado há muito tempo = job órfão
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_user_id_idx ON jobs (user_id, id DESC);
+
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id BIGINT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    data JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (job_id, seq)
+);
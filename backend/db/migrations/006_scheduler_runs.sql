@@ -0,0 +1,16 @@
+-- Execuções do agendador (ver db/scheduler.py e services/scheduler.py)
+-- A linha de cada horário funciona como lease: com vários workers do
+-- gunicorn, só o processo que insere a linha (task, scheduled_for) roda o tick
+CREATE TABLE IF NOT EXISTS scheduler_runs (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    task TEXT NOT NULL,
+    scheduled_for TIMESTAMPTZ NOT NULL,
+    next_run_at TIMESTAMPTZ,
+    owner TEXT NOT NULL,
+    fired_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    lag_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'claimed',
+    job_id BIGINT,
+    error TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS scheduler_runs_task_slot_idx ON scheduler_runs (task, scheduled_for);
@@ -0,0 +1,8 @@
+-- Agenda adaptativa de cada página (ver services/recrawl.py)
+-- O intervalo diminui quando a página traz links novos ou muda de conteúdo
+-- e dobra quando nada muda; next_check_at ordena a fila de recoleta.
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS check_interval INTEGER;
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS next_check_at TIMESTAMPTZ;
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS last_checked_at TIMESTAMPTZ;
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS last_change_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS pages_next_check_at_idx ON pages (next_check_at);
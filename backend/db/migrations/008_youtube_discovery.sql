@@ -0,0 +1,44 @@
+-- Descoberta incremental no YouTube (ver services/discovery/youtube_discovery.py)
+-- Quota gasta por chave (hash, nunca a chave) e por dia do Pacífico, quando
+-- a quota da YouTube Data API é zerada
+CREATE TABLE IF NOT EXISTS youtube_quota (
+    key_hash TEXT NOT NULL,
+    day DATE NOT NULL,
+    units INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (key_hash, day)
+);
+
+-- Marca d'água de cada busca por usuário: o publishedAt mais recente já processado
+CREATE TABLE IF NOT EXISTS youtube_watermarks (
+    user_id BIGINT NOT NULL,
+    query_key TEXT NOT NULL,
+    published_after TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, query_key)
+);
+
+-- Vídeos já processados (compartilhado): os links extraídos da descrição
+-- completa, para não chamar videos.list de novo
+CREATE TABLE IF NOT EXISTS youtube_videos (
+    video_id TEXT PRIMARY KEY,
+    description TEXT,
+    whatsapp_links JSONB NOT NULL DEFAULT '[]',
+    landing_urls JSONB NOT NULL DEFAULT '[]',
+    is_tutorial BOOLEAN NOT NULL DEFAULT FALSE,
+    first_seen_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Grava marcas sem deixar uma execução que viu resultados mais antigos
+-- voltar a marca (a mais recente prevalece, como no SQLite)
+CREATE OR REPLACE FUNCTION save_youtube_watermarks(p_rows JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO youtube_watermarks (user_id, query_key, published_after, updated_at)
+    SELECT user_id, query_key, published_after, now()
+    FROM jsonb_to_recordset(p_rows) AS r(user_id BIGINT, query_key TEXT, published_after TIMESTAMPTZ)
+    ON CONFLICT (user_id, query_key) DO UPDATE SET
+        published_after = GREATEST(youtube_watermarks.published_after, excluded.published_after),
+        updated_at = excluded.updated_at;
+$$;
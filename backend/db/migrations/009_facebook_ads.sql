@@ -0,0 +1,29 @@
+-- Sincronização incremental da Facebook Ad Library (ver services/discovery/facebook_discovery.py)
+-- Anúncios já processados: cada sincronização só devolve ids novos
+CREATE TABLE IF NOT EXISTS facebook_ads (
+    ad_id TEXT PRIMARY KEY,
+    search_term TEXT,
+    delivery_start TIMESTAMPTZ,
+    first_seen_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Marca d'água de cada termo: o ad_delivery_start_time mais recente já visto
+CREATE TABLE IF NOT EXISTS facebook_watermarks (
+    term_key TEXT PRIMARY KEY,
+    delivery_start TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Grava marcas sem deixar um processo atrasado voltar a marca de um termo
+-- (a mais recente prevalece, como no SQLite)
+CREATE OR REPLACE FUNCTION save_facebook_watermarks(p_rows JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO facebook_watermarks (term_key, delivery_start, updated_at)
+    SELECT term_key, delivery_start, now()
+    FROM jsonb_to_recordset(p_rows) AS r(term_key TEXT, delivery_start TIMESTAMPTZ)
+    ON CONFLICT (term_key) DO UPDATE SET
+        delivery_start = GREATEST(facebook_watermarks.delivery_start, excluded.delivery_start),
+        updated_at = excluded.updated_at;
+$$;
@@ -0,0 +1,11 @@
+-- Cache persistente da classificação por IA (ver services/ai/classifier.py)
+-- Uma análise por URL canônica; análises com erro não são gravadas
+CREATE TABLE IF NOT EXISTS ai_cache (
+    url TEXT PRIMARY KEY,
+    analysis JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Bancos em que a tabela já existia sem chave única / data
+ALTER TABLE ai_cache ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT now();
+CREATE UNIQUE INDEX IF NOT EXISTS ai_cache_url_key ON ai_cache (url);
@@ -1,63 +1,84 @@
 """
 Operações de páginas — Supabase PostgreSQL.
-Substitui a implementação SQLite anterior.
+Sem Supabase, usa o SQLite local (ver local_store.py).
 """
 
-from typing import List
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 from backend.db.supabase_client import get_client
+from backend.db import local_store
 
+# Validadores HTTP guardados por página (ver migrations/001_pages_http_cache.sql)
+CACHE_FIELDS = ("etag", "last_modified", "content_hash")
+# Agenda adaptativa de recoleta (ver migrations/007_pages_recrawl.sql)
+SCHEDULE_FIELDS = ("check_interval", "next_check_at")
+# Falso depois que uma escrita mostrou que a migração 007 não foi aplicada no Supabase
+_schedule_columns_available = True
+# Linhas por página ao ler a agenda do Supabase (limite padrão do PostgREST)
+PAGE_SIZE = 1000
 
-import json
-import os
+def _load_local_pages(user_id: int) -> List[dict]:
+    rows = local_store.get_connection().execute(
+        "SELECT url, name, etag, last_modified, content_hash, check_interval, next_check_at "
+        "FROM pages WHERE user_id = ? ORDER BY id",
+        (user_id,),
+    ).fetchall()
+    return [dict(r) for r in rows]
 
-# Caminho para fallback local
-LOCAL_PAGES_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "pages.json")
-
-def _load_local_pages() -> List[dict]:
-    if not os.path.exists(LOCAL_PAGES_FILE):
-        return []
-    try:
-        with open(LOCAL_PAGES_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
-
-def _save_local_pages(pages: List[dict]) -> None:
-    os.makedirs(os.path.dirname(LOCAL_PAGES_FILE), exist_ok=True)
-    try:
-        with open(LOCAL_PAGES_FILE, "w", encoding="utf-8") as f:
-            json.dump(pages, f, indent=4, ensure_ascii=True)
-    except Exception:
-        pass
+def _add_local_page(url: str, name: str, user_id: int) -> bool:
+    with local_store.transaction() as conn:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO pages (user_id, url, name, created_at) VALUES (?, ?, ?, ?)",
+            (user_id, url, name, datetime.now(timezone.utc).isoformat()),
+        )
+    return cur.rowcount > 0
 
 def init_pages_table():
     """Compatibilidade: no Supabase a tabela é criada via SQL Editor."""
     pass
 
 
+def _page_row(row: dict) -> dict:
+    page = {"url": row["url"], "name": row["name"]}
+    for field in CACHE_FIELDS + SCHEDULE_FIELDS:
+        page[field] = row.get(field)
+    return page
+
+
 def load_pages(user_id: int) -> List[dict]:
-    """Carrega as páginas de um usuário."""
+    """Carrega as páginas de um usuário (com os validadores HTTP da última coleta)."""
     client = get_client()
     if client is None:
-        return _load_local_pages()
+        return [_page_row(p) for p in _load_local_pages(user_id)]
         
     try:
-        result = client.table("pages").select("url, name").eq("user_id", user_id).order("id").execute()
-        return [{"url": row["url"], "name": row["name"]} for row in result.data]
+        # select("*") funciona mesmo antes da migração das colunas de cache
+        result = client.table("pages").select("*").eq("user_id", user_id).order("id").execute()
+        return [_page_row(row) for row in result.data]
+    except Exception:
+        return [_page_row(p) for p in _load_local_pages(user_id)]
+
+
+def count_pages(user_id: int) -> int:
+    """Quantidade de páginas do usuário (contagem feita no banco)."""
+    client = get_client()
+    if client is None:
+        return local_store.get_connection().execute(
+            "SELECT COUNT(*) FROM pages WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+
+    try:
+        result = client.table("pages").select("id", count="exact").eq("user_id", user_id).limit(1).execute()
+        return result.count or 0
     except Exception:
-        return _load_local_pages()
+        return len(_load_local_pages(user_id))
 
 
 def add_page(url: str, name: str, user_id: int) -> bool:
     """Adiciona uma página para o usuário."""
     client = get_client()
     if client is None:
-        pages = _load_local_pages()
-        if any(p["url"] == url for p in pages):
-            return False
-        pages.append({"url": url, "name": name})
-        _save_local_pages(pages)
-        return True
+        return _add_local_page(url, name, user_id)
 
     try:
         client.table("pages").insert({
@@ -68,10 +89,7 @@ def add_page(url: str, name: str, user_id: int) -> bool:
         return True
     except Exception:
         # Fallback local em caso de erro no Supabase
-        pages = _load_local_pages()
-        if not any(p["url"] == url for p in pages):
-            pages.append({"url": url, "name": name})
-            _save_local_pages(pages)
+        _add_local_page(url, name, user_id)
         return False
 
 
@@ -79,15 +97,145 @@ def delete_page(url: str, user_id: int) -> bool:
     """Remove uma página do usuário."""
     client = get_client()
     if client is None:
-        pages = _load_local_pages()
-        new_pages = [p for p in pages if p["url"] != url]
-        if len(new_pages) < len(pages):
-            _save_local_pages(new_pages)
-            return True
-        return False
+        with local_store.transaction() as conn:
+            cur = conn.execute("DELETE FROM pages WHERE user_id = ? AND url = ?", (user_id, url))
+        return cur.rowcount > 0
 
     try:
         result = client.table("pages").delete().eq("url", url).eq("user_id", user_id).execute()
         return bool(result.data)
     except Exception:
         return False
+
+
+def update_page_check(
+    url: str,
+    user_id: int,
+    check_interval: Optional[int] = None,
+    next_check_at: Optional[str] = None,
+    changed: bool = False,
+    validators: Optional[Dict[str, Optional[str]]] = None,
+) -> bool:
+    """
+    Registra uma verificação da página: próximo horário e intervalo (se
+    vierem) e os validadores HTTP (etag, last_modified, content_hash).
+    Uma única escrita por página.
+    """
+    global _schedule_columns_available
+    client = get_client()
+    with_schedule = check_interval is not None and (client is None or _schedule_columns_available)
+    updates: Dict[str, object] = {}
+    if with_schedule:
+        now_iso = datetime.now(timezone.utc).isoformat()
+        updates.update({
+            "check_interval": check_interval,
+            "next_check_at": next_check_at,
+            "last_checked_at": now_iso,
+        })
+        if changed:
+            updates["last_change_at"] = now_iso
+    if validators is not None:
+        updates.update({field: validators.get(field) for field in CACHE_FIELDS})
+    if not updates:
+        return False
+
+    if client is None:
+        # Chamado só com nomes de coluna fixos (ver acima)
+        assignments = ", ".join(f"{field} = :{field}" for field in updates)
+        with local_store.transaction() as conn:
+            cur = conn.execute(
+                f"UPDATE pages SET {assignments} WHERE user_id = :user_id AND url = :url",
+                {**updates, "user_id": user_id, "url": url},
+            )
+        return cur.rowcount > 0
+
+    try:
+        result = client.table("pages").update(updates).eq("url", url).eq("user_id", user_id).execute()
+        return bool(result.data)
+    except Exception:
+        if not with_schedule or recrawl_columns_available():
+            return False
+    # Sem a migração 007 as colunas da agenda não existem: não tenta mais
+    # gravá-las neste processo e grava só os validadores
+    _schedule_columns_available = False
+    print("⚠️ [DB] Colunas da agenda de recoleta ausentes; aplique migrations/007_pages_recrawl.sql.")
+    if validators is None:
+        return False
+    try:
+        cache = {field: validators.get(field) for field in CACHE_FIELDS}
+        result = client.table("pages").update(cache).eq("url", url).eq("user_id", user_id).execute()
+        return bool(result.data)
+    except Exception:
+        return False
+
+
+def recrawl_columns_available() -> bool:
+    """False se a migração 007 (agenda adaptativa) ainda não foi aplicada no Supabase."""
+    client = get_client()
+    if client is None:
+        return True
+    try:
+        client.table("pages").select("next_check_at").limit(1).execute()
+        return True
+    except Exception:
+        return False
+
+
+def list_page_schedule(user_ids: List[int]) -> List[dict]:
+    """(user_id, url, next_check_at) de todas as páginas dos usuários; None = nunca verificada."""
+    if not user_ids:
+        return []
+    client = get_client()
+    if client is None:
+        placeholders = ", ".join("?" for _ in user_ids)
+        rows = local_store.get_connection().execute(
+            f"SELECT user_id, url, next_check_at FROM pages WHERE user_id IN ({placeholders})",
+            tuple(user_ids),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    pages: List[dict] = []
+    last_id = 0
+    while True:
+        rows = (
+            client.table("pages").select("id, user_id, url, next_check_at")
+            .in_("user_id", user_ids).gt("id", last_id).order("id").limit(PAGE_SIZE).execute().data
+        ) or []
+        pages.extend({"user_id": r["user_id"], "url": r["url"], "next_check_at": r["next_check_at"]} for r in rows)
+        if len(rows) < PAGE_SIZE:
+            return pages
+        last_id = rows[-1]["id"]
+
+
+def claim_due_pages(pages: List[Tuple[int, str]], now_iso: str, lease_until_iso: str) -> List[Tuple[int, str]]:
+    """
+    Reserva as páginas que ainda estão vencidas, empurrando next_check_at para
+    lease_until_iso (a coleta grava o horário real depois). Uma página que
+    outro processo já reservou ou coletou não volta.
+    """
+    claimed: List[Tuple[int, str]] = []
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            for user_id, url in pages:
+                cur = conn.execute(
+                    "UPDATE pages SET next_check_at = ? WHERE user_id = ? AND url = ? "
+                    "AND (next_check_at IS NULL OR next_check_at <= ?)",
+                    (lease_until_iso, user_id, url, now_iso),
+                )
+                if cur.rowcount:
+                    claimed.append((user_id, url))
+        return claimed
+
+    by_user: Dict[int, List[str]] = {}
+    for user_id, url in pages:
+        by_user.setdefault(user_id, []).append(url)
+    for user_id, urls in by_user.items():
+        result = (
+            client.table("pages").update({"next_check_at": lease_until_iso})
+            .eq("user_id", user_id).in_("url", urls)
+            .or_(f'next_check_at.is.null,next_check_at.lte."{now_iso}"')
+            .execute()
+        )
+        claimed.extend((user_id, row["url"]) for row in result.data or [])
+    return claimed
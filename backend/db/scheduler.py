@@ -0,0 +1,91 @@
+"""
+Execuções do agendador — Supabase PostgreSQL.
+Sem Supabase, usa o SQLite local (ver local_store.py).
+
+Cada horário de cada tarefa tem no máximo uma linha (task, scheduled_for):
+o processo que consegue inseri-la é o único que executa aquele tick.
+"""
+
+from datetime import datetime, timezone
+from typing import List, Optional
+from backend.db.supabase_client import get_client
+from backend.db import local_store
+
+RUN_FIELDS = "id, task, scheduled_for, next_run_at, owner, fired_at, lag_seconds, status, job_id, error"
+
+
+def slot_iso(moment: datetime) -> str:
+    """Horário normalizado (UTC, sem microssegundos): todos os processos geram a mesma chave."""
+    return moment.astimezone(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def claim_scheduler_run(
+    task: str,
+    scheduled_for: datetime,
+    owner: str,
+    next_run_at: Optional[datetime] = None,
+) -> Optional[dict]:
+    """
+    Tenta pegar o tick (task, scheduled_for).
+    Retorna a linha criada, ou None se outro processo já o pegou.
+    """
+    fired_at = datetime.now(timezone.utc)
+    row = {
+        "task": task,
+        "scheduled_for": slot_iso(scheduled_for),
+        "next_run_at": slot_iso(next_run_at) if next_run_at else None,
+        "owner": owner,
+        "fired_at": fired_at.isoformat(),
+        "lag_seconds": round(max(0.0, (fired_at - scheduled_for).total_seconds()), 3),
+        "status": "claimed",
+    }
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO scheduler_runs "
+                "(task, scheduled_for, next_run_at, owner, fired_at, lag_seconds, status) "
+                "VALUES (:task, :scheduled_for, :next_run_at, :owner, :fired_at, :lag_seconds, :status)",
+                row,
+            )
+        return {**row, "id": cur.lastrowid} if cur.rowcount else None
+
+    result = client.table("scheduler_runs").upsert(
+        row, on_conflict="task,scheduled_for", ignore_duplicates=True
+    ).execute()
+    return result.data[0] if result.data else None
+
+
+def finish_scheduler_run(run_id: int, status: str, job_id: Optional[int] = None, error: Optional[str] = None) -> None:
+    """Registra o desfecho do tick (submitted, skipped, failed) e o job criado."""
+    fields = {"status": status, "job_id": job_id, "error": error}
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.execute(
+                "UPDATE scheduler_runs SET status = :status, job_id = :job_id, error = :error WHERE id = :id",
+                {**fields, "id": run_id},
+            )
+        return
+
+    client.table("scheduler_runs").update(fields).eq("id", run_id).execute()
+
+
+def list_scheduler_runs(task: Optional[str] = None, limit: int = 20) -> List[dict]:
+    """Ticks mais recentes (de uma tarefa ou de todas)."""
+    client = get_client()
+    if client is None:
+        query = f"SELECT {RUN_FIELDS} FROM scheduler_runs"
+        params: tuple = ()
+        if task is not None:
+            query += " WHERE task = ?"
+            params = (task,)
+        rows = local_store.get_connection().execute(
+            query + " ORDER BY scheduled_for DESC LIMIT ?", params + (limit,)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    query = client.table("scheduler_runs").select(RUN_FIELDS)
+    if task is not None:
+        query = query.eq("task", task)
+    return query.order("scheduled_for", desc=True).limit(limit).execute().data
@@ -0,0 +1,88 @@
+"""
+Configurações por usuário (chave/valor) — Supabase PostgreSQL.
+Sem Supabase, usa o SQLite local (ver local_store.py).
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Optional
+from backend.db.supabase_client import get_client
+from backend.db import local_store
+from backend.storage.cache import TTLCache
+
+# Cache por (usuário, chave): as consultas customizadas e as chaves de API são
+# lidas a cada descoberta. save_setting invalida a chave; o TTL cobre
+# alterações feitas em outro processo
+SETTINGS_CACHE_TTL = int(os.getenv("SETTINGS_CACHE_TTL", "60"))
+SETTINGS_CACHE_SIZE = int(os.getenv("SETTINGS_CACHE_SIZE", "4096"))
+_settings_cache = TTLCache(maxsize=SETTINGS_CACHE_SIZE, ttl=SETTINGS_CACHE_TTL)
+# Marca "não existe" no cache (get do cache devolve None quando não há entrada)
+_MISSING = object()
+
+
+def _fetch_setting(user_id: int, key: str) -> Optional[str]:
+    client = get_client()
+    if client is None:
+        row = local_store.get_connection().execute(
+            "SELECT value FROM settings WHERE user_id = ? AND key = ?", (user_id, key)
+        ).fetchone()
+        return row["value"] if row else None
+
+    result = client.table("settings").select("value").eq("user_id", user_id).eq("key", key).limit(1).execute()
+    return result.data[0].get("value") if result.data else None
+
+
+def get_setting(user_id: int, key: str, default: Optional[str] = None) -> Optional[str]:
+    """Lê uma configuração do usuário (em cache)."""
+    cached = _settings_cache.get((user_id, key))
+    if cached is None:
+        try:
+            value = _fetch_setting(user_id, key)
+        except Exception:
+            # Erro de consulta não vai para o cache
+            return default
+        cached = _MISSING if value is None else value
+        _settings_cache.set((user_id, key), cached)
+    return default if cached is _MISSING else cached
+
+
+def save_setting(user_id: int, key: str, value: Optional[str]) -> bool:
+    """Grava (insere ou substitui) uma configuração do usuário."""
+    now_iso = datetime.now(timezone.utc).isoformat()
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO settings (user_id, key, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (user_id, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (user_id, key, value, now_iso),
+            )
+        _settings_cache.invalidate((user_id, key))
+        return True
+
+    try:
+        client.table("settings").upsert(
+            {"user_id": user_id, "key": key, "value": value, "updated_at": now_iso},
+            on_conflict="user_id,key",
+        ).execute()
+        return True
+    except Exception:
+        return False
+    finally:
+        _settings_cache.invalidate((user_id, key))
+
+
+def get_settings_cache_stats() -> dict:
+    return _settings_cache.stats()
+
+
+def get_youtube_api_key(user_id: int) -> str:
+    """Chave da YouTube Data API: a do usuário, senão a global do config.json."""
+    key = get_setting(user_id, "youtube_api_key")
+    if key:
+        return key
+    try:
+        from backend.main import load_config
+    except ImportError:
+        from main import load_config
+    return load_config().get("youtube", {}).get("api_key", "") or ""
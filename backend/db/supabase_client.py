@@ -1,20 +1,25 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
 load_dotenv()
 
 _client = None
+_warned_missing_config = False
 
 def get_client() -> Optional[Client]:
-    global _client
+    global _client, _warned_missing_config
     if _client is None:
         url = os.environ.get("SUPABASE_URL")
         # Support both naming conventions
         key = os.environ.get("SUPABASE_KEY") or os.environ.get("SUPABASE_SERVICE_KEY")
         
         if not url or not key:
-            print("⚠️ [DB] SUPABASE_URL ou SUPABASE_KEY não configurados. Usando modo de fallback local.")
+            # Chamado a cada consulta: avisa só uma vez
+            if not _warned_missing_config:
+                _warned_missing_config = True
+                print("⚠️ [DB] SUPABASE_URL ou SUPABASE_KEY não configurados. Usando modo de fallback local.")
             return None
             
         try:
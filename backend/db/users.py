@@ -1,11 +1,73 @@
 """
 Operações de usuários — Supabase PostgreSQL.
-Substitui a implementação SQLite anterior.
+Sem Supabase, usa o SQLite local (ver local_store.py).
 """
 
+import functools
+import os
+from datetime import datetime, timezone
 from typing import Optional, Tuple
 from backend.db.supabase_client import get_client
+from backend.db import local_store
 from backend.auth.jwt import get_password_hash, verify_password
+from backend.storage.cache import TTLCache
+
+USER_FIELDS = "id, email, name, is_admin, approved, created_at"
+
+# Cache dos usuários autenticados: cada request chama get_user_by_id.
+# As funções que alteram um usuário o invalidam; o TTL cobre alterações
+# feitas fora deste processo (outra instância, SQL Editor)
+USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# Chave do usuário padrão usado quando a requisição vem sem token
+DEFAULT_USER_KEY = "default"
+
+FALLBACK_ADMIN = {
+    "id": 1,
+    "email": "admin@linkpulse.com",
+    "name": "Administrador (Fallback)",
+    "is_admin": True,
+    "approved": True,
+}
+
+
+def invalidate_user(user_id: int) -> None:
+    """Remove o usuário (e o usuário padrão, que pode ser ele) do cache."""
+    _user_cache.invalidate(user_id)
+    _user_cache.invalidate(DEFAULT_USER_KEY)
+
+
+def _invalidates_user(func):
+    """Invalida o cache do usuário depois da escrita (mesmo se ela falhar)."""
+    @functools.wraps(func)
+    def wrapper(user_id: int, *args, **kwargs):
+        try:
+            return func(user_id, *args, **kwargs)
+        finally:
+            invalidate_user(user_id)
+    return wrapper
+
+
+def get_cached_user(key) -> Optional[dict]:
+    """Usuário já em cache (por ID ou DEFAULT_USER_KEY), sem tocar no banco."""
+    cached = _user_cache.get(key)
+    return dict(cached) if cached is not None else None
+
+
+def get_user_cache_stats() -> dict:
+    return _user_cache.stats()
+
+
+def _user_row(row) -> dict:
+    row = dict(row)
+    return {
+        "id": row["id"],
+        "email": row["email"],
+        "name": row.get("name"),
+        "is_admin": bool(row.get("is_admin", False)),
+        "approved": bool(row.get("approved", False)),
+    }
 
 
 def _ensure_admin_exists() -> None:
@@ -26,6 +88,9 @@ def _ensure_admin_exists() -> None:
 
 def init_users_table():
     """Compatibilidade: verifica conexão e garante admin padrão."""
+    if get_client() is None:
+        local_store.init_local_db()
+        return
     _ensure_admin_exists()
 
 
@@ -43,6 +108,24 @@ def create_user(
         (success, user_id, error_message)
     """
     client = get_client()
+    if client is None:
+        try:
+            if get_user_by_email(email) is not None:
+                return False, None, "Email already registered"
+            # bcrypt fora da transação: não segura o lock de escrita do SQLite
+            hashed_password = get_password_hash(password)
+            with local_store.transaction() as conn:
+                if conn.execute("SELECT 1 FROM users WHERE email = ?", (email.lower(),)).fetchone():
+                    return False, None, "Email already registered"
+                cur = conn.execute(
+                    "INSERT INTO users (email, hashed_password, name, is_admin, approved, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (email.lower(), hashed_password, name, int(is_admin), int(approved),
+                     datetime.now(timezone.utc).isoformat()),
+                )
+            return True, cur.lastrowid, None
+        except Exception as e:
+            return False, None, f"Error creating user: {str(e)}"
 
     existing = client.table("users").select("id").eq("email", email.lower()).execute()
     if existing.data:
@@ -67,6 +150,15 @@ def create_user(
 def get_user_by_email(email: str) -> Optional[dict]:
     """Busca usuário pelo email."""
     client = get_client()
+    if client is None:
+        row = local_store.get_connection().execute(
+            "SELECT id, email, hashed_password, name, is_admin, approved FROM users WHERE email = ?",
+            (email.lower(),),
+        ).fetchone()
+        if row is None:
+            return None
+        return {**_user_row(row), "hashed_password": row["hashed_password"]}
+
     result = client.table("users").select(
         "id, email, hashed_password, name, is_admin, approved"
     ).eq("email", email.lower()).execute()
@@ -84,50 +176,63 @@ def get_user_by_email(email: str) -> Optional[dict]:
     return None
 
 
+def _fetch_user_by_id(client, user_id: int) -> Optional[dict]:
+    if client is None:
+        row = local_store.get_connection().execute(
+            f"SELECT {USER_FIELDS} FROM users WHERE id = ?", (user_id,)
+        ).fetchone()
+        return _user_row(row) if row else None
+
+    result = client.table("users").select(
+        "id, email, name, is_admin, approved"
+    ).eq("id", user_id).execute()
+    return _user_row(result.data[0]) if result.data else None
+
+
 def get_user_by_id(user_id: int) -> Optional[dict]:
-    """Busca usuário pelo ID. Fallback para Admin fixo se offline."""
+    """Busca usuário pelo ID (com cache). Fallback para Admin fixo se o Supabase falhar."""
+    cached = get_cached_user(user_id)
+    if cached is not None:
+        return cached
+
     client = get_client()
+    try:
+        user = _fetch_user_by_id(client, user_id)
+    except Exception:
+        user = None
+
+    if user is not None:
+        _user_cache.set(user_id, user)
+        return dict(user)
     if client is None:
-        return {
-            "id": 1,
-            "email": "admin@linkpulse.com",
-            "name": "Administrador (Local)",
-            "is_admin": True,
-            "approved": True,
-        }
+        return None
+    # O fallback não vai para o cache: a falha pode ser passageira
+    return dict(FALLBACK_ADMIN)
 
-    try:
-        result = client.table("users").select(
-            "id, email, name, is_admin, approved"
-        ).eq("id", user_id).execute()
 
-        if result.data:
-            row = result.data[0]
-            return {
-                "id": row["id"],
-                "email": row["email"],
-                "name": row.get("name"),
-                "is_admin": bool(row.get("is_admin", False)),
-                "approved": bool(row.get("approved", False)),
-            }
-    except Exception:
-        pass
-        
-    return {
-        "id": 1,
-        "email": "admin@linkpulse.com",
-        "name": "Administrador (Fallback)",
-        "is_admin": True,
-        "approved": True,
-    }
+def get_default_user() -> Optional[dict]:
+    """
+    Usuário usado quando a requisição vem sem token (uso local/privado):
+    o ID 1, senão o primeiro aprovado, senão o primeiro cadastrado.
+    Resolvido uma vez e mantido no cache.
+    """
+    cached = get_cached_user(DEFAULT_USER_KEY)
+    if cached is not None:
+        return cached
+
+    user = get_user_by_id(1)
+    if not user:
+        users = list_all_users(include_pending=True)
+        approved = [u for u in users if u.get("approved")]
+        user = (approved or users or [None])[0]
+    if user:
+        _user_cache.set(DEFAULT_USER_KEY, user)
+        return dict(user)
+    return None
 
 
 def authenticate_user(email: str, password: str) -> Optional[dict]:
     """Autentica usuário com email e senha."""
-    client = get_client()
-    if client is None:
-        return get_user_by_id(1)
-
     user = get_user_by_email(email)
     if not user:
         return None
@@ -143,10 +248,14 @@ def authenticate_user(email: str, password: str) -> Optional[dict]:
 
 
 def list_all_users(include_pending: bool = True) -> list:
-    """Lista todos os usuários. Fallback para Admin fixo."""
+    """Lista todos os usuários. Fallback para Admin fixo se o Supabase falhar."""
     client = get_client()
     if client is None:
-        return [get_user_by_id(1)]
+        query = f"SELECT {USER_FIELDS} FROM users"
+        if not include_pending:
+            query += " WHERE approved = 1"
+        rows = local_store.get_connection().execute(query + " ORDER BY created_at DESC").fetchall()
+        return [{**_user_row(r), "created_at": r["created_at"]} for r in rows]
 
     try:
         query = client.table("users").select(
@@ -173,9 +282,12 @@ def list_all_users(include_pending: bool = True) -> list:
         return [get_user_by_id(1)]
 
 
+@_invalidates_user
 def approve_user(user_id: int) -> bool:
     """Aprova um usuário."""
     client = get_client()
+    if client is None:
+        return _update_local_user(user_id, approved=1)
     try:
         result = client.table("users").update({"approved": True}).eq("id", user_id).execute()
         return bool(result.data)
@@ -183,9 +295,14 @@ def approve_user(user_id: int) -> bool:
         return False
 
 
+@_invalidates_user
 def reject_user(user_id: int) -> bool:
     """Remove um usuário."""
     client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            cur = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        return cur.rowcount > 0
     try:
         result = client.table("users").delete().eq("id", user_id).execute()
         return bool(result.data)
@@ -193,6 +310,17 @@ def reject_user(user_id: int) -> bool:
         return False
 
 
+def _update_local_user(user_id: int, **updates) -> bool:
+    # Chamado só com nomes de coluna fixos (approved, name, email, hashed_password)
+    assignments = ", ".join(f"{field} = :{field}" for field in updates)
+    with local_store.transaction() as conn:
+        cur = conn.execute(
+            f"UPDATE users SET {assignments} WHERE id = :id", {**updates, "id": user_id}
+        )
+    return cur.rowcount > 0
+
+
+@_invalidates_user
 def update_user_profile(
     user_id: int,
     name: Optional[str] = None,
@@ -206,14 +334,17 @@ def update_user_profile(
         updates["name"] = name
 
     if email is not None:
-        existing = client.table("users").select("id").eq("email", email.lower()).execute()
-        if existing.data and existing.data[0]["id"] != user_id:
+        existing = get_user_by_email(email)
+        if existing and existing["id"] != user_id:
             return False
         updates["email"] = email.lower()
 
     if not updates:
         return False
 
+    if client is None:
+        return _update_local_user(user_id, **updates)
+
     try:
         result = client.table("users").update(updates).eq("id", user_id).execute()
         return bool(result.data)
@@ -221,9 +352,12 @@ def update_user_profile(
         return False
 
 
+@_invalidates_user
 def update_user_password(user_id: int, new_password: str) -> bool:
     """Atualiza senha do usuário."""
     client = get_client()
+    if client is None:
+        return _update_local_user(user_id, hashed_password=get_password_hash(new_password))
     try:
         hashed = get_password_hash(new_password)
         result = client.table("users").update({"hashed_password": hashed}).eq("id", user_id).execute()
@@ -0,0 +1,228 @@
+"""
+Estado da descoberta no YouTube — Supabase PostgreSQL.
+Sem Supabase, usa o SQLite local (ver local_store.py).
+
+- youtube_quota: unidades gastas por chave e por dia (ledger de quota)
+- youtube_watermarks: publishedAt mais recente já processado por (usuário, busca)
+- youtube_videos: vídeos já processados e os links extraídos da descrição
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from backend.db.supabase_client import get_client
+from backend.db import local_store
+
+VIDEO_FIELDS = "video_id, description, whatsapp_links, landing_urls, is_tutorial, first_seen_at"
+
+# Ids por consulta em youtube_videos (cabe na URL do PostgREST)
+IN_BATCH_SIZE = 100
+
+# Função save_youtube_watermarks (migrations/008_youtube_discovery.sql)
+_watermark_rpc_available = True
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+# ─── QUOTA ──────────────────────────────────────────────────────────────────
+
+def get_quota_units(key_hash: str, day: str) -> int:
+    """Unidades já gastas pela chave no dia."""
+    client = get_client()
+    if client is None:
+        row = local_store.get_connection().execute(
+            "SELECT units FROM youtube_quota WHERE key_hash = ? AND day = ?", (key_hash, day)
+        ).fetchone()
+        return row["units"] if row else 0
+
+    result = client.table("youtube_quota").select("units").eq("key_hash", key_hash).eq("day", day).limit(1).execute()
+    return result.data[0]["units"] if result.data else 0
+
+
+def reserve_quota_units(key_hash: str, day: str, units: int, budget: Optional[int]) -> Optional[int]:
+    """
+    Soma units ao dia da chave se o total não passar de budget (None = sem limite).
+    Retorna o novo total, ou None se a reserva foi recusada.
+
+    No SQLite a verificação e a soma são atômicas (BEGIN IMMEDIATE); no
+    Supabase é leitura seguida de upsert, então processos concorrentes podem
+    passar do orçamento por uma busca.
+    """
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            row = conn.execute(
+                "SELECT units FROM youtube_quota WHERE key_hash = ? AND day = ?", (key_hash, day)
+            ).fetchone()
+            spent = row["units"] if row else 0
+            if budget is not None and spent + units > budget:
+                return None
+            conn.execute(
+                "INSERT INTO youtube_quota (key_hash, day, units, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key_hash, day) DO UPDATE SET units = units + excluded.units, updated_at = excluded.updated_at",
+                (key_hash, day, units, _now_iso()),
+            )
+        return spent + units
+
+    spent = get_quota_units(key_hash, day)
+    if budget is not None and spent + units > budget:
+        return None
+    client.table("youtube_quota").upsert(
+        {"key_hash": key_hash, "day": day, "units": spent + units, "updated_at": _now_iso()},
+        on_conflict="key_hash,day",
+    ).execute()
+    return spent + units
+
+
+def set_quota_units(key_hash: str, day: str, units: int) -> None:
+    """Fixa o total do dia (a API avisou que a quota acabou)."""
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO youtube_quota (key_hash, day, units, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key_hash, day) DO UPDATE SET units = MAX(units, excluded.units), updated_at = excluded.updated_at",
+                (key_hash, day, units, _now_iso()),
+            )
+        return
+
+    client.table("youtube_quota").upsert(
+        {"key_hash": key_hash, "day": day, "units": units, "updated_at": _now_iso()},
+        on_conflict="key_hash,day",
+    ).execute()
+
+
+# ─── MARCAS D'ÁGUA ──────────────────────────────────────────────────────────
+
+def get_watermarks(user_id: int, query_keys: List[str]) -> Dict[str, str]:
+    """query_key -> published_after (ISO) das buscas do usuário que já rodaram."""
+    if not query_keys:
+        return {}
+    client = get_client()
+    if client is None:
+        placeholders = ",".join("?" * len(query_keys))
+        rows = local_store.get_connection().execute(
+            f"SELECT query_key, published_after FROM youtube_watermarks WHERE user_id = ? AND query_key IN ({placeholders})",
+            (user_id, *query_keys),
+        ).fetchall()
+        return {r["query_key"]: r["published_after"] for r in rows}
+
+    rows = (
+        client.table("youtube_watermarks").select("query_key, published_after")
+        .eq("user_id", user_id).in_("query_key", query_keys).execute().data
+    ) or []
+    return {r["query_key"]: r["published_after"] for r in rows}
+
+
+def save_watermarks(user_id: int, marks: Dict[str, str]) -> None:
+    """Grava as novas marcas; uma marca gravada nunca volta para trás."""
+    global _watermark_rpc_available
+    if not marks:
+        return
+    now_iso = _now_iso()
+    rows = [
+        {"user_id": user_id, "query_key": key, "published_after": value, "updated_at": now_iso}
+        for key, value in marks.items()
+    ]
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO youtube_watermarks (user_id, query_key, published_after, updated_at) "
+                "VALUES (:user_id, :query_key, :published_after, :updated_at) "
+                "ON CONFLICT (user_id, query_key) DO UPDATE SET "
+                "published_after = MAX(published_after, excluded.published_after), updated_at = excluded.updated_at",
+                rows,
+            )
+        return
+
+    if _watermark_rpc_available:
+        try:
+            client.rpc("save_youtube_watermarks", {"p_rows": rows}).execute()
+            return
+        except Exception as e:
+            _watermark_rpc_available = False
+            print(f"⚠️ [DB] save_youtube_watermarks indisponível ({e}); aplique migrations/008_youtube_discovery.sql.")
+
+    # Sem a função: só grava as marcas mais novas que as do banco (leitura seguida de upsert)
+    stored = get_watermarks(user_id, list(marks))
+    rows = [r for r in rows if r["query_key"] not in stored
+            or _parse_iso(r["published_after"]) > _parse_iso(stored[r["query_key"]])]
+    if rows:
+        client.table("youtube_watermarks").upsert(rows, on_conflict="user_id,query_key").execute()
+
+
+# ─── VÍDEOS JÁ PROCESSADOS ──────────────────────────────────────────────────
+
+def _video_from_row(row: dict) -> dict:
+    video = dict(row)
+    for field in ("whatsapp_links", "landing_urls"):
+        if isinstance(video.get(field), str):
+            video[field] = json.loads(video[field])
+    video["is_tutorial"] = bool(video.get("is_tutorial"))
+    return video
+
+
+def get_seen_videos(video_ids: Iterable[str]) -> Dict[str, dict]:
+    """video_id -> vídeo processado, para os ids que já estão no índice."""
+    ids = list(dict.fromkeys(video_ids))
+    found: Dict[str, dict] = {}
+    client = get_client()
+    for i in range(0, len(ids), IN_BATCH_SIZE):
+        batch = ids[i : i + IN_BATCH_SIZE]
+        if client is None:
+            placeholders = ",".join("?" * len(batch))
+            rows = [dict(r) for r in local_store.get_connection().execute(
+                f"SELECT {VIDEO_FIELDS} FROM youtube_videos WHERE video_id IN ({placeholders})", batch
+            ).fetchall()]
+        else:
+            rows = client.table("youtube_videos").select(VIDEO_FIELDS).in_("video_id", batch).execute().data or []
+        for row in rows:
+            found[row["video_id"]] = _video_from_row(row)
+    return found
+
+
+def save_seen_videos(videos: List[dict]) -> None:
+    """Registra vídeos processados (video_id, description, links, is_tutorial)."""
+    if not videos:
+        return
+    now_iso = _now_iso()
+    client = get_client()
+    if client is None:
+        with local_store.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO youtube_videos "
+                "(video_id, description, whatsapp_links, landing_urls, is_tutorial, first_seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        v["video_id"], v.get("description", ""),
+                        json.dumps(v.get("whatsapp_links", [])), json.dumps(v.get("landing_urls", [])),
+                        int(bool(v.get("is_tutorial"))), now_iso,
+                    )
+                    for v in videos
+                ],
+            )
+        return
+
+    client.table("youtube_videos").upsert(
+        [
+            {
+                "video_id": v["video_id"],
+                "description": v.get("description", ""),
+                "whatsapp_links": v.get("whatsapp_links", []),
+                "landing_urls": v.get("landing_urls", []),
+                "is_tutorial": bool(v.get("is_tutorial")),
+                "first_seen_at": now_iso,
+            }
+            for v in videos
+        ],
+        on_conflict="video_id",
+        ignore_duplicates=True,
+    ).execute()
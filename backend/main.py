@@ -5,16 +5,13 @@ API REST que integra com o sistema de coleta de links existente
 
 import os
 import sys
-import json
+import threading
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 from dotenv import load_dotenv
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-import pytz
 
 load_dotenv()
 
@@ -45,98 +42,130 @@ CONFIG_FILE = os.path.join(DATA_DIR, "config.json")
 LAST_RUN_FILE = os.path.join(DATA_DIR, "last_run.txt")
 LOGS_FILE = os.path.join(DATA_DIR, "logs.txt")
 
+# Logs gravados em lote por uma thread, com rotação por tamanho (ver services/log_pipeline.py)
+try:
+    from backend.services.log_pipeline import LogWriter
+except ImportError:
+    from services.log_pipeline import LogWriter
+log_writer = LogWriter(LOGS_FILE)
+
+# config.json em cache, relido quando outro processo o altera
+try:
+    from backend.storage.json_file import JsonFileStore
+except ImportError:
+    from storage.json_file import JsonFileStore
+config_store = JsonFileStore(CONFIG_FILE, default=lambda: {"telegram": {"bot_token": "", "chat_id": ""}})
+
 # ============================================================================
 # FUNÇÕES AUXILIARES
 # ============================================================================
 
 def load_config():
-    """Carrega a configuração do Telegram do arquivo JSON"""
-    if not os.path.exists(CONFIG_FILE):
-        return {"telegram": {"bot_token": "", "chat_id": ""}}
-    try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {"telegram": {"bot_token": "", "chat_id": ""}}
+    """
+    Carrega a configuração do arquivo JSON
+    Lida do disco só quando o arquivo muda (mtime); devolve uma cópia
+    """
+    return config_store.load()
 
 def save_config(config: dict):
-    """Salva a configuração no arquivo JSON"""
+    """Salva a configuração no arquivo JSON (arquivo temporário + rename)"""
     try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
+        config_store.save(config)
         return True
     except Exception as e:
         print(f"Erro ao salvar config: {e}")
         return False
 
 def write_log(message: str):
-    """Escreve uma mensagem no arquivo de logs"""
+    """Enfileira uma mensagem para o arquivo de logs (não espera a escrita)"""
     try:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(LOGS_FILE, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {message}\n")
+        log_writer.write(f"[{timestamp}] {message}")
     except Exception:
         pass
 
-def send_telegram_message(link: str, source: str, link_type: str = "group", is_relaunch: bool = False):
-    """Envia notificação para o Telegram usando o serviço especializado"""
+def send_telegram_links(source: str, links: List[dict]) -> int:
+    """
+    Enfileira os links novos de uma página (um resumo único ou um alerta por link)
+    O envio é feito em segundo plano; a coleta não espera o Telegram
+    """
     try:
-        # Import flexível para evitar erros de caminho
         try:
-            from backend.services.notifications.telegram import send_message
+            from backend.services.notifications.telegram import send_links
         except ImportError:
-            from services.notifications.telegram import send_message
-        return send_message(link, source, link_type, is_relaunch)
+            from services.notifications.telegram import send_links
+        return send_links(source, links)
     except Exception as e:
         write_log(f"Erro ao enviar Telegram: {e}")
-        return False
+        return 0
 
 # ============================================================================
 # AGENDADOR DE TAREFAS (SCHEDULER)
 # ============================================================================
 
-def run_automated_scrapers():
-    """Tarefa executada pelo scheduler para coletar links"""
+def run_automated_scrapers(deadline_at: Optional[datetime] = None):
+    """
+    Tarefa do agendador: enfileira a coleta de todos os usuários
+    Retorna o job (ou o job da execução anterior, se ainda estiver ativo)
+    """
     write_log("🕒 [Scheduler] Iniciando coleta automática de rotina...")
-    
+
     try:
-        # Tenta disparar a coleta automática via API interna ou DB
-        try:
-            from backend.db.users import list_all_users
-            from backend.db.pages import load_pages
-            from backend.api.scraper import run_scraper_logic
-        except ImportError:
-            from db.users import list_all_users
-            from db.pages import load_pages
-            from api.scraper import run_scraper_logic
-            
-        users = list_all_users(include_pending=False)
-        for user in users:
-            pages = load_pages(user["id"])
-            for page in pages:
-                try:
-                    run_scraper_logic(page["url"], page["name"], user["id"])
-                except Exception:
-                    continue
-        write_log("✅ [Scheduler] Coleta automática concluída.")
-    except Exception as e:
-        write_log(f"🚨 [Scheduler] Erro: {e}")
+        from backend.api.scraper import job_manager
+    except ImportError:
+        from api.scraper import job_manager
+
+    # Um único job para todos os usuários aprovados (uma passada do motor:
+    # o limite global e o limite por host valem para a rodada inteira).
+    # Fila 'scheduled': coletas rápidas e manuais passam na frente
+    job = job_manager.submit("scrape", {}, lane="scheduled", dedupe=True, deadline_at=deadline_at)
+    write_log(f"✅ [Scheduler] Coleta automática enfileirada (job #{job['id']}, {job['status']}).")
+    return job
+
+def run_adaptive_recrawl(deadline_at: Optional[datetime] = None):
+    """
+    Tarefa do agendador (a cada minuto): enfileira só as páginas vencidas,
+    cada uma no seu próprio intervalo (ver services/recrawl.py)
+    """
+    try:
+        from backend.services.recrawl import run_due_recrawl
+    except ImportError:
+        from services.recrawl import run_due_recrawl
+
+    job = run_due_recrawl(deadline_at)
+    if job is not None:
+        pages = sum(len(urls) for urls in job["payload"]["pages"].values()) if job.get("payload") else 0
+        write_log(f"🔁 [Scheduler] Recoleta adaptativa enfileirada (job #{job['id']}, {pages} páginas).")
+    return job
 
-# Inicializa o agendador
 try:
-    scheduler = BackgroundScheduler()
-    br_timezone = pytz.timezone('America/Sao_Paulo')
-    scheduler.add_job(
-        run_automated_scrapers,
-        CronTrigger(hour='8,14,20', minute='0', timezone=br_timezone),
-        id='automated_collect',
-        replace_existing=True
-    )
-    scheduler.start()
-    write_log("🚀 [Scheduler] Agendador iniciado (08:00, 14:00, 20:00 BRT)")
-except Exception as e:
-    print(f"Erro ao iniciar agendador: {e}")
-    write_log(f"Erro ao iniciar agendador: {e}")
+    from backend.services.scheduler import scheduler_service
+except ImportError:
+    from services.scheduler import scheduler_service
+
+
+def register_scheduler_tasks() -> str:
+    """
+    Registra as tarefas do agendador e retorna o modo registrado.
+    A recoleta adaptativa é opcional (RECRAWL_ADAPTIVE); sem as colunas da
+    migração 007 no Supabase, fica a coleta nos horários fixos.
+    Com vários workers, cada horário é executado por um único processo
+    (ver services/scheduler.py)
+    """
+    try:
+        from backend.services.recrawl import RECRAWL_ADAPTIVE
+        from backend.db.pages import recrawl_columns_available
+    except ImportError:
+        from services.recrawl import RECRAWL_ADAPTIVE
+        from db.pages import recrawl_columns_available
+    if RECRAWL_ADAPTIVE:
+        if recrawl_columns_available():
+            # Cada página no seu intervalo: o tick de cada minuto só pega as vencidas
+            scheduler_service.add_cron_task("adaptive_recrawl", run_adaptive_recrawl, minute='*')
+            return "recoleta adaptativa, a cada minuto"
+        write_log("⚠️ [Scheduler] RECRAWL_ADAPTIVE ativo, mas a migração 007 não foi aplicada; usando os horários fixos")
+    scheduler_service.add_cron_task("automated_collect", run_automated_scrapers, hour='8,14,20', minute='0')
+    return "08:00, 14:00, 20:00 BRT"
 
 # ============================
 # INICIALIZAÇÃO FASTAPI
@@ -152,6 +181,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor da paginação de /api/links
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Banco de dados
@@ -203,19 +234,22 @@ def include_pulse_routers(app_instance):
     
     # Lista de roteadores a importar e incluir com seus respectivos prefixos
     # Formato: (nome_module, router_attr_name, prefix)
+    # Roteadores que já declaram o próprio prefixo são montados com prefixo vazio
     routers_to_include = [
-        ('auth.routes', 'router', '/auth'),
+        ('auth.routes', 'router', ''),
         ('api.links', 'router', '/api'),
         ('api.pages', 'router', '/api'),
-        ('api.scraper', 'router', '/api'),
+        ('api.scraper', 'router', ''),
+        ('api.jobs', 'router', ''),
         ('api.settings', 'router', '/api'),
         ('api.settings', 'router_telegram', '/api/telegram'),
         ('api.settings', 'router_youtube', '/api/youtube'),
         ('api.settings', 'router_ai', '/api/ai'),
         ('api.discovery', 'router', '/api/discovery'),
-        ('api.logs', 'router', '/api'),
-        ('api.admin', 'router', '/api'),
-        ('api.profile', 'router', '/api'),
+        ('api.logs', 'router', ''),
+        ('api.admin', 'router', ''),
+        ('api.profile', 'router', ''),
+        ('api.metrics', 'router', ''),
     ]
 
     for module_name, attr_name, prefix in routers_to_include:
@@ -239,6 +273,83 @@ def include_pulse_routers(app_instance):
 
 include_pulse_routers(app)
 
+# Mede o atraso do event loop (ver /api/metrics/execution)
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    try:
+        from backend.services.execution import loop_lag_monitor
+    except ImportError:
+        from services.execution import loop_lag_monitor
+    loop_lag_monitor.start()
+
+# Executor da fila de jobs: retoma os jobs que ficaram na fila
+@app.on_event("startup")
+async def start_job_runner():
+    try:
+        from backend.services.jobs import job_manager
+    except ImportError:
+        from services.jobs import job_manager
+    job_manager.start()
+
+# Carrega em segundo plano o índice de links já salvos de cada usuário
+@app.on_event("startup")
+async def warm_known_links():
+    try:
+        from backend.db.known_links import known_links
+        from backend.db.users import list_all_users
+    except ImportError:
+        from db.known_links import known_links
+        from db.users import list_all_users
+
+    def warm():
+        try:
+            known_links.warm(user["id"] for user in list_all_users(include_pending=False))
+            stats = known_links.stats()
+            write_log(f"🧠 Índice de links carregado: {stats['keys']} convites de {stats['users']} usuários")
+        except Exception as e:
+            write_log(f"⚠️ Erro ao carregar índice de links: {e}")
+
+    threading.Thread(target=warm, name="known-links-warmup", daemon=True).start()
+
+@app.on_event("startup")
+async def start_scheduler():
+    try:
+        from backend.services.execution import run_blocking
+    except ImportError:
+        from services.execution import run_blocking
+    try:
+        # Bloqueante: no Supabase consulta se a migração 007 existe
+        mode = await run_blocking(register_scheduler_tasks)
+        scheduler_service.start()
+        write_log(f"🚀 [Scheduler] Agendador iniciado ({mode})")
+    except Exception as e:
+        print(f"Erro ao iniciar agendador: {e}")
+        write_log(f"Erro ao iniciar agendador: {e}")
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    scheduler_service.shutdown()
+
+# Dá alguns segundos para as notificações na fila saírem
+@app.on_event("shutdown")
+async def stop_notifications():
+    try:
+        from backend.services.notifications.telegram import dispatcher
+        from backend.services.execution import run_blocking
+    except ImportError:
+        from services.notifications.telegram import dispatcher
+        from services.execution import run_blocking
+    await run_blocking(dispatcher.stop, 5.0)
+
+# Grava os logs que ainda estão na fila
+@app.on_event("shutdown")
+async def flush_logs():
+    try:
+        from backend.services.execution import run_blocking
+    except ImportError:
+        from services.execution import run_blocking
+    await run_blocking(log_writer.flush)
+
 # Webhook Telegram (Simplificado para evitar crashes)
 @app.post("/api/telegram/bot-webhook")
 async def telegram_bot_webhook(data: dict):
@@ -11,6 +11,9 @@ class LinkResponse(BaseModel):
     url: str
     source: str
     found_at: str
+    id: Optional[int] = None  # usado como cursor da paginação
+    link_type: Optional[str] = None
+    is_relaunch: Optional[bool] = None
 
 class PageRequest(BaseModel):
     """Modelo de requisição para criar/atualizar uma página"""
@@ -34,4 +37,22 @@ class ScraperResponse(BaseModel):
     links_found: int
     links: List[dict]
     message: str
+    pages_skipped: int = 0  # páginas sem mudança desde a última coleta (304 ou mesmo hash)
 
+
+class JobResponse(BaseModel):
+    """Modelo de resposta de um job da fila de coletas (ver services/jobs.py)"""
+    id: int
+    kind: str
+    lane: str
+    status: str  # queued, running, succeeded, failed, cancelled, timed_out
+    user_id: Optional[int] = None
+    progress_done: int = 0
+    progress_total: int = 0
+    cancel_requested: bool = False
+    attempts: int = 0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
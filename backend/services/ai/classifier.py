@@ -1,43 +1,246 @@
-from typing import Dict, Optional
+"""
+Classificação de páginas por IA.
+
+Várias páginas vão num único prompt (AI_BATCH_SIZE) e os lotes rodam em
+paralelo (AI_CONCURRENCY) dentro de um limite de requisições por minuto por
+chave. Um LRU em memória fica na frente do cache persistente (tabela ai_cache),
+então só páginas nunca vistas chegam à API.
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from backend.db import ai_cache
 from backend.services.ai.google_gemini import get_gemini_service
-from backend.db.supabase_client import get_client
+from backend.services.collectors.engine import canonical_page_url
+from backend.services.notifications.dispatcher import TokenBucket
+from backend.storage.cache import TTLCache
+
+# Páginas por prompt e prompts ao mesmo tempo
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "10"))
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "4"))
+# Streaming (SSE): um lote incompleto é classificado depois de esperar no máximo isto
+AI_STREAM_FLUSH_SECONDS = float(os.getenv("AI_STREAM_FLUSH_SECONDS", "3"))
+# Requisições por minuto por chave (plano gratuito do Gemini Flash: 15)
+AI_REQUESTS_PER_MINUTE = float(os.getenv("AI_REQUESTS_PER_MINUTE", "15"))
+# Novas tentativas quando a API limita a taxa (espera dobra até o máximo, em segundos)
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+AI_BACKOFF_BASE = float(os.getenv("AI_BACKOFF_BASE", "4"))
+AI_BACKOFF_MAX = float(os.getenv("AI_BACKOFF_MAX", "60"))
+# Validade das análises no cache persistente e no LRU (segundos)
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", str(30 * 86400)))
+AI_LRU_SIZE = int(os.getenv("AI_LRU_SIZE", "5000"))
+AI_LRU_TTL = int(os.getenv("AI_LRU_TTL", "3600"))
+
+# Caracteres do HTML enviados por página (economiza tokens)
+SNIPPET_CHARS = 2000
+SUPPORTED_PROVIDERS = {"gemini"}
+
+_executor = ThreadPoolExecutor(max_workers=max(1, AI_CONCURRENCY), thread_name_prefix="ai-classifier")
+_lru = TTLCache(maxsize=AI_LRU_SIZE, ttl=AI_LRU_TTL)
+
+_limit_lock = threading.Lock()
+_buckets: Dict[str, TokenBucket] = {}
+_paused_until: Dict[str, float] = {}
+
+_stats_lock = threading.Lock()
+_stats = {
+    "pages": 0, "lru_hits": 0, "cache_hits": 0, "classified": 0,
+    "calls": 0, "retries": 0, "rate_limited": 0, "errors": 0,
+}
+
+
+class RateLimited(Exception):
+    """A API recusou a chamada por limite de taxa"""
+
 
-def classify_page(url: str, title: str, html_content: str) -> Dict:
+def _count(key: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def _key_id(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def _acquire(key_id: str) -> None:
+    """Bloqueia até a chave poder fazer mais uma requisição."""
+    while True:
+        with _limit_lock:
+            now = time.monotonic()
+            bucket = _buckets.get(key_id)
+            if bucket is None:
+                bucket = _buckets[key_id] = TokenBucket(AI_REQUESTS_PER_MINUTE / 60.0, max(1, AI_CONCURRENCY))
+            wait = max(_paused_until.get(key_id, 0.0) - now, bucket.wait_time(now))
+            if wait <= 0:
+                bucket.take(now)
+                return
+        time.sleep(wait)
+
+
+def _pause(key_id: str, seconds: float) -> None:
+    with _limit_lock:
+        _paused_until[key_id] = max(_paused_until.get(key_id, 0.0), time.monotonic() + seconds)
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    # ResourceExhausted (429) do google-api-core; versões antigas só mudam a mensagem
+    name = type(error).__name__
+    return name in ("ResourceExhausted", "TooManyRequests", "RateLimited") or "429" in str(error)
+
+
+def _classify_chunk(api_key: str, chunk: List[Dict]) -> Dict[str, Dict]:
+    """Um prompt com várias páginas; id -> análise (ou {"error"})."""
+    key_id = _key_id(api_key)
+    service = get_gemini_service(api_key)
+    for attempt in range(AI_MAX_RETRIES + 1):
+        _acquire(key_id)
+        _count("calls")
+        try:
+            found = service.classify_pages(chunk)
+            break
+        except Exception as e:
+            if not _is_rate_limit(e):
+                _count("errors")
+                return {p["id"]: {"error": str(e)} for p in chunk}
+            _count("rate_limited")
+            if attempt == AI_MAX_RETRIES:
+                return {p["id"]: {"error": "Limite de requisições da IA atingido"} for p in chunk}
+            _count("retries")
+            _pause(key_id, min(AI_BACKOFF_MAX, AI_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.75, 1.25))
+
+    results = {}
+    for page in chunk:
+        item = found.get(page["id"])
+        if item is None:
+            results[page["id"]] = {"error": "Página ausente na resposta da IA"}
+            continue
+        results[page["id"]] = {
+            "is_capture_page": bool(item.get("is_capture_page")),
+            "confidence": float(item.get("confidence") or 0),
+            "niche": item.get("niche"),
+            "product_name": item.get("product_name"),
+            "reasoning": item.get("reasoning"),
+        }
+    return results
+
+
+def ai_status(analysis: Dict, min_confidence: float) -> str:
+    """"approved", "rejected" ou "review" (confiança baixa ou erro)."""
+    if "error" in analysis or analysis.get("confidence", 0) < min_confidence:
+        return "review"
+    return "approved" if analysis.get("is_capture_page") else "rejected"
+
+
+def classify_batch(
+    pages: List[Dict],
+    api_key: str,
+    provider: str = "gemini",
+    min_confidence: float = 0.65,
+) -> List[Dict]:
     """
-    Classifica uma página de destino usando IA com Cache no Supabase.
+    Classifica páginas da descoberta com poucas chamadas à IA.
+
+    Args:
+        pages: Dicts com url e name/title (html_content opcional)
+
+    Returns:
+        Cópias das páginas com "ai" (a análise) e "ai_status".
     """
-    client = get_client()
-    
-    # 1. Verificar Cache
-    try:
-        cached = client.table("ai_cache").select("*").eq("url", url).execute()
-        if cached.data:
-            return cached.data[0]["analysis"]
-    except Exception:
-        # Tabela de cache pode não existir
-        pass
-
-    # 2. Se não estiver no cache, analisar com Gemini
-    gemini = get_gemini_service()
-    # Pega apenas os primeiros 2000 caracteres do HTML para economizar tokens
-    snippet = html_content[:2000]
-    
-    analysis = gemini.analyze_page(title, snippet)
-    
-    # 3. Salvar no Cache (se a análise foi bem sucedida)
-    if "error" not in analysis:
+    if not pages:
+        return []
+    _count("pages", len(pages))
+    keys = [canonical_page_url(p["url"]) for p in pages]
+    analyses: Dict[str, Dict] = {}
+
+    missing = []
+    for key in dict.fromkeys(keys):
+        cached = _lru.get(key)
+        if cached is not None:
+            analyses[key] = cached
+            _count("lru_hits")
+        else:
+            missing.append(key)
+
+    if missing:
         try:
-            client.table("ai_cache").insert({
-                "url": url,
-                "analysis": analysis
-            }).execute()
+            stored = ai_cache.get_analyses(missing, max_age=AI_CACHE_TTL)
+        except Exception:
+            # Tabela de cache pode não existir
+            stored = {}
+        for key, analysis in stored.items():
+            analyses[key] = analysis
+            _lru.set(key, analysis)
+        _count("cache_hits", len(stored))
+
+    pending: Dict[str, Dict] = {}
+    for page, key in zip(pages, keys):
+        if key not in analyses and key not in pending:
+            html = page.get("html_content") or ""
+            pending[key] = {
+                "id": str(len(pending)),
+                "url": page["url"],
+                "title": page.get("name") or page.get("title") or page["url"],
+                "snippet": html[:SNIPPET_CHARS],
+            }
+
+    if pending and provider not in SUPPORTED_PROVIDERS:
+        for key in pending:
+            analyses[key] = {"error": f"Provedor de IA não suportado: {provider}"}
+    elif pending:
+        items = list(pending.items())
+        chunks = [items[i : i + AI_BATCH_SIZE] for i in range(0, len(items), max(1, AI_BATCH_SIZE))]
+        futures = [_executor.submit(_classify_chunk, api_key, [item for _, item in chunk]) for chunk in chunks]
+        fresh: Dict[str, Dict] = {}
+        for chunk, future in zip(chunks, futures):
+            results = future.result()
+            for key, item in chunk:
+                analysis = results[item["id"]]
+                analyses[key] = analysis
+                if "error" not in analysis:
+                    fresh[key] = analysis
+                    _lru.set(key, analysis)
+        _count("classified", len(fresh))
+        try:
+            ai_cache.save_analyses(fresh)
         except Exception:
             pass
-            
-    return analysis
+
+    return [
+        {**page, "ai": analyses[key], "ai_status": ai_status(analyses[key], min_confidence)}
+        for page, key in zip(pages, keys)
+    ]
+
+
+def classify_page(
+    url: str,
+    title: str,
+    html_content: str = "",
+    api_key: Optional[str] = None,
+    provider: str = "gemini",
+) -> Dict:
+    """
+    Classifica uma página de destino usando IA (mesmos caches de classify_batch).
+    """
+    page = {"url": url, "name": title, "html_content": html_content}
+    return classify_batch([page], api_key=api_key or os.getenv("GEMINI_API_KEY", ""), provider=provider)[0]["ai"]
+
 
 def is_valid_launch(analysis: Dict) -> bool:
     """
     Verifica se a análise da IA indica que é um lançamento válido.
     """
-    return analysis.get("is_launch", False) and analysis.get("confidence", 0) > 0.6
+    return analysis.get("is_capture_page", analysis.get("is_launch", False)) and analysis.get("confidence", 0) > 0.6
+
+
+def get_classifier_stats() -> dict:
+    """Páginas classificadas, acertos dos caches e limites de taxa neste processo"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["lru"] = _lru.stats()
+    return stats
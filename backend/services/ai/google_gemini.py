@@ -1,13 +1,18 @@
+import json
 import os
+import threading
 import google.generativeai as genai
-from typing import Optional, Dict
+from google.ai import generativelanguage as glm
+from typing import Optional, Dict, List
 
 class GeminiService:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if self.api_key:
-            genai.configure(api_key=self.api_key)
             self.model = genai.GenerativeModel('gemini-1.5-flash')
+            # Cliente próprio da chave: genai.configure() é global ao processo,
+            # e o modelo usaria (e cobraria) a última chave configurada
+            self.model._client = glm.GenerativeServiceClient(client_options={"api_key": self.api_key})
         else:
             self.model = None
 
@@ -51,11 +56,61 @@ class GeminiService:
         except Exception as e:
             return {"error": str(e)}
 
-# Singleton instance
-_instance = None
+    def classify_pages(self, pages: List[Dict]) -> Dict[str, Dict]:
+        """
+        Classifica várias páginas numa única chamada (saída estruturada em JSON).
+
+        Args:
+            pages: Dicts com id, url, title e snippet (opcional)
+
+        Returns:
+            id -> {is_capture_page, confidence, niche, product_name, reasoning}.
+            Páginas que faltarem na resposta ficam de fora; erros da API sobem.
+        """
+        if not self.model:
+            raise RuntimeError("Gemini API key not configured")
+
+        items = json.dumps(
+            [{"id": p["id"], "url": p["url"], "title": p.get("title", ""), "content": p.get("snippet", "")} for p in pages],
+            ensure_ascii=False,
+        )
+        prompt = f"""
+        Classifique cada uma das páginas abaixo: ela é uma página de captura de leads
+        (grupo VIP de WhatsApp, lista de espera, inscrição em aula/evento gratuito)
+        de um lançamento de infoproduto brasileiro?
+
+        Sinais de lançamento: "entrar no grupo vip", "workshop gratuito", "aula exclusiva",
+        "masterclass", "intensivo", "maratona", "evento online", "lista de espera",
+        "inscrição gratuita", "vagas limitadas", plataformas como Hotmart e Kiwify.
+
+        Páginas (JSON): {items}
+
+        Responda com um objeto JSON {{"results": [...]}}, um item por página, com:
+        - id (string): o id recebido
+        - is_capture_page (boolean)
+        - confidence (float de 0 a 1)
+        - niche (string): nicho do produto (Finanças, Marketing, Saúde, ...)
+        - product_name (string)
+        - reasoning (string): uma frase com o motivo
+        """
+
+        response = self.model.generate_content(
+            prompt, generation_config={"response_mime_type": "application/json"}
+        )
+        text = response.text.strip()
+        if text.startswith("```json"):
+            text = text[7:-3].strip()
+        data = json.loads(text)
+        items = data.get("results", []) if isinstance(data, dict) else data
+        return {str(item.get("id")): item for item in items if isinstance(item, dict) and "id" in item}
+
+# Uma instância (e um cliente) por chave
+_instances: Dict[str, GeminiService] = {}
+_instances_lock = threading.Lock()
 
-def get_gemini_service():
-    global _instance
-    if _instance is None:
-        _instance = GeminiService()
-    return _instance
+def get_gemini_service(api_key: Optional[str] = None):
+    key = api_key or os.getenv("GEMINI_API_KEY") or ""
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = GeminiService(api_key=key or None)
+        return _instances[key]
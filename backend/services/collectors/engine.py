@@ -0,0 +1,204 @@
+"""
+Asyncio collection engine
+Runs page collection concurrently with a global limit and a per-host limit,
+so one slow host cannot stall the whole run. Pages monitored by several users
+are fetched once per run and the outcome is fanned out to every subscriber.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from backend.services.collectors.requests_collector import collect_from_page_conditional
+
+# Limits can be tuned per deployment without code changes
+MAX_CONCURRENCY = int(os.getenv("SCRAPER_MAX_CONCURRENCY", "16"))
+MAX_PER_HOST = int(os.getenv("SCRAPER_MAX_PER_HOST", "2"))
+
+# Collectors are blocking (requests), so they run on a dedicated pool sized to
+# the global limit instead of the loop's default executor
+_executor = ThreadPoolExecutor(max_workers=max(1, MAX_CONCURRENCY), thread_name_prefix="collector")
+
+
+def collect_page(page: dict) -> dict:
+    """Default collector: conditional fetch using the validators stored on the page"""
+    return collect_from_page_conditional(
+        page["url"],
+        etag=page.get("etag"),
+        last_modified=page.get("last_modified"),
+        content_hash=page.get("content_hash"),
+    )
+
+
+# Validators sent with a shared fetch; they are only used when every
+# subscriber of the URL stored the same ones
+VALIDATOR_FIELDS = ("etag", "last_modified", "content_hash")
+
+_stats_lock = threading.Lock()
+_stats = {"runs": 0, "pages": 0, "fetches": 0, "fetches_saved": 0}
+
+
+def canonical_page_url(url: str) -> str:
+    """Key used to share one fetch: lowercase scheme/host, no default port, no fragment"""
+    try:
+        parsed = urlparse(url.strip())
+    except Exception:
+        return url
+    scheme = parsed.scheme.lower()
+    host = parsed.netloc.lower()
+    if (scheme, host.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")):
+        host = host.rsplit(":", 1)[0]
+    return parsed._replace(scheme=scheme, netloc=host, path=parsed.path or "/", fragment="").geturl()
+
+
+def _shared_fetch(subscribers: List[dict]) -> dict:
+    """The page actually fetched for a group of subscribers of the same URL"""
+    first = subscribers[0]
+    validators = {field: first.get(field) for field in VALIDATOR_FIELDS}
+    if any(page.get(field) != validators[field] for page in subscribers for field in VALIDATOR_FIELDS):
+        # Subscribers disagree (one added the page later): fetch in full once,
+        # afterwards all of them store the same validators again
+        validators = dict.fromkeys(VALIDATOR_FIELDS)
+    return {"url": first["url"], **validators}
+
+
+def _fan_out(page: dict, shared: dict) -> dict:
+    """Subscriber's result: its own page keys plus the shared outcome"""
+    result = {**page, **{k: v for k, v in shared.items() if k != "url"}}
+    if (
+        result["status"] == "modified"
+        and page.get("content_hash")
+        and page["content_hash"] == shared.get("content_hash")
+    ):
+        # Full fetch for the group, but this subscriber already had this body
+        result.update(status="unchanged", links=[], has_form=False, is_thanks=False)
+    return result
+
+
+def get_engine_stats() -> dict:
+    """Pages requested vs. fetches made across runs in this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["saved_ratio"] = round(stats["fetches_saved"] / stats["pages"], 3) if stats["pages"] else 0.0
+    return stats
+
+
+def _host_of(url: str) -> str:
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ""
+
+
+class CollectionEngine:
+    """
+    Collects many pages concurrently
+
+    Semaphores are created per run() call, so one engine instance can be used
+    from the FastAPI event loop and from the scheduler's own loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_per_host: int = MAX_PER_HOST,
+        collector: Optional[Callable[[dict], dict]] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_host = max(1, max_per_host)
+        self.collector = collector or collect_page
+
+    async def _collect_one(
+        self,
+        page: dict,
+        global_limit: asyncio.Semaphore,
+        host_limits: Dict[str, asyncio.Semaphore],
+        on_result: Optional[Callable[[dict], None]] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+    ) -> dict:
+        url = page["url"]
+        host = _host_of(url)
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(self.max_per_host)
+
+        loop = asyncio.get_running_loop()
+        result = {**page, "status": "error", "links": [], "has_form": False, "is_thanks": False, "error": None}
+        # Host slot first: a task waiting on a busy host must not hold a global slot
+        async with host_limits[host]:
+            async with global_limit:
+                # Checked once a slot is free: pages still waiting are skipped,
+                # pages already fetching finish normally
+                if should_cancel is not None and should_cancel():
+                    result["status"] = "cancelled"
+                    return result
+                try:
+                    outcome = await loop.run_in_executor(_executor, self.collector, page)
+                    result.update(outcome)
+                except Exception as e:
+                    result["error"] = str(e)
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    async def run(
+        self,
+        pages: List[dict],
+        on_result: Optional[Callable[[dict], None]] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+    ) -> List[dict]:
+        """
+        Collect every page and return one result per page, in input order
+
+        Pages with the same canonical URL (several users monitoring it) are
+        fetched and parsed once; each of them gets its own result.
+
+        Args:
+            pages: List of dicts with at least a 'url' key (extra keys are kept)
+            on_result: Called on the loop with each result as soon as its page is done
+            should_cancel: Polled before each page starts; once it returns True the
+                remaining pages get status 'cancelled' without being fetched
+
+        Returns:
+            List of dicts with the page keys updated with the collector's
+            outcome (status, links, has_form, is_thanks, validators) and error
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, page in enumerate(pages):
+            groups.setdefault(canonical_page_url(page["url"]), []).append(index)
+        with _stats_lock:
+            _stats["runs"] += 1
+            _stats["pages"] += len(pages)
+            _stats["fetches"] += len(groups)
+            _stats["fetches_saved"] += len(pages) - len(groups)
+
+        results: List[Optional[dict]] = [None] * len(pages)
+
+        def fan_out(indexes: List[int], shared: dict) -> None:
+            for index in indexes:
+                results[index] = _fan_out(pages[index], shared)
+                if on_result is not None:
+                    on_result(results[index])
+
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        shared_results = await asyncio.gather(
+            *(
+                self._collect_one(
+                    _shared_fetch([pages[i] for i in indexes]),
+                    global_limit,
+                    host_limits,
+                    lambda shared, indexes=indexes: fan_out(indexes, shared),
+                    should_cancel,
+                )
+                for indexes in groups.values()
+            )
+        )
+        # Cancelled fetches never reach on_result
+        for indexes, shared in zip(groups.values(), shared_results):
+            for index in indexes:
+                if results[index] is None:
+                    results[index] = _fan_out(pages[index], shared)
+        return results
@@ -0,0 +1,78 @@
+"""
+Group metadata resolver
+Resolves invite links to group names through a persistent TTL + LRU cache,
+fetching cache misses concurrently
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from backend.services.collectors.requests_collector import fetch_group_metadata
+from backend.services.processing.cleaning import canonical_invite_key
+from backend.storage.cache import TTLCache
+
+CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "data", "group_metadata_cache.json")
+CACHE_TTL = int(os.getenv("GROUP_METADATA_TTL", str(7 * 24 * 3600)))
+CACHE_MAXSIZE = int(os.getenv("GROUP_METADATA_CACHE_SIZE", "20000"))
+RESOLVE_CONCURRENCY = int(os.getenv("GROUP_METADATA_CONCURRENCY", "8"))
+
+# Names that mean the lookup failed are not cached
+UNAVAILABLE = "Nome Indisponível"
+
+_cache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL, path=os.path.abspath(CACHE_FILE))
+_cache.load()
+_executor = ThreadPoolExecutor(max_workers=max(1, RESOLVE_CONCURRENCY), thread_name_prefix="group-metadata")
+
+
+def invite_key(url: str) -> str:
+    """Cache key for an invite link: the same canonical key used by storage"""
+    return canonical_invite_key(url) or ""
+
+
+def get_cached_name(url: str) -> Optional[str]:
+    return _cache.get(invite_key(url))
+
+
+async def resolve_group_names(urls: List[str]) -> Dict[str, str]:
+    """
+    Resolve group names for many invite links
+
+    Cached names are returned directly; misses are fetched concurrently (at most
+    GROUP_METADATA_CONCURRENCY at a time) and the cache is saved once at the end.
+
+    Returns:
+        Dict url -> group name
+    """
+    names: Dict[str, str] = {}
+    misses: Dict[str, List[str]] = {}
+    for url in dict.fromkeys(urls):
+        key = invite_key(url)
+        cached = _cache.get(key)
+        if cached is not None:
+            names[url] = cached
+        else:
+            misses.setdefault(key, []).append(url)
+
+    if not misses:
+        return names
+
+    loop = asyncio.get_running_loop()
+    keys = list(misses)
+    fetched = await asyncio.gather(
+        *(loop.run_in_executor(_executor, fetch_group_metadata, misses[key][0]) for key in keys)
+    )
+
+    for key, name in zip(keys, fetched):
+        if name != UNAVAILABLE:
+            _cache.set(key, name)
+        for url in misses[key]:
+            names[url] = name
+
+    await loop.run_in_executor(_executor, _cache.save)
+    return names
+
+
+def get_cache_stats() -> dict:
+    return _cache.stats()
@@ -1,59 +1,164 @@
 """
 Requests-based collector for scraping WhatsApp links from pages
-Uses requests library with BeautifulSoup for HTML parsing
+Uses requests library; pages are scanned as a byte stream by default, the
+buffered mode does a single parser pass (lxml when installed, html.parser
+otherwise) and BeautifulSoup is kept for metadata pages
 """
 
-import requests
 from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 from urllib.parse import urljoin
+import hashlib
+import os
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+from backend.services import http_client
+from backend.services.collectors.streaming import check_content_type, scan_response
 
 USER_AGENT = "Mozilla/5.0 (compatible; LinkMonitor/1.0)"
+# "stream" scans bytes as they arrive; "buffered" downloads the page and parses it
+FETCH_MODE = os.getenv("SCRAPER_FETCH_MODE", "stream").strip().lower()
 
 def fetch_html(url: str, timeout: int = 15) -> Tuple[str, str]:
     """Fetch HTML from URL and return (final_url, html)"""
     headers = {"User-Agent": USER_AGENT}
-    resp = requests.get(url, headers=headers, timeout=timeout)
+    resp = http_client.get(url, headers=headers, timeout=timeout)
     resp.raise_for_status()
     return resp.url, resp.text
 
+# Every link the extractor keeps contains "whatsapp", so a document without
+# that word can skip parsing entirely
+INVITE_SIGNAL_RE = re.compile(r'whatsapp', re.IGNORECASE)
+FORM_RE = re.compile(r'<form[\s>/]', re.IGNORECASE)
+HEAD_END_RE = re.compile(rb'</head\s*>', re.IGNORECASE)
+# Invite pages without </head> are read at most up to this size
+METADATA_MAX_BYTES = 256 * 1024
+ONCLICK_URL_RE = re.compile(r'(https?://[^\s\'\"]+)')
+SCRIPT_URL_RE = re.compile(r'(https?://[^\s\'\"]*whatsapp[^\s\'\"]*)', re.IGNORECASE)
+
+
+class _InviteLinkTarget:
+    """
+    Parser target that collects invite links and form presence in one pass
+
+    Follows lxml's parser-target interface (start/end/data/close); the stdlib
+    fallback below drives the same callbacks.
+    """
+
+    def __init__(self):
+        self.links = set()
+        self.has_form = False
+        self._script_parts: Optional[List[str]] = None
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        if tag == 'form':
+            self.has_form = True
+        elif tag == 'script':
+            self._script_parts = []
+
+        href = attrib.get('href')
+        if tag == 'a' and href is not None:
+            href = href.strip()
+            if 'whatsapp' in href.lower():
+                self.links.add(href)
+
+        onclick = attrib.get('onclick')
+        if onclick:
+            for m in ONCLICK_URL_RE.findall(onclick):
+                if 'whatsapp' in m.lower():
+                    self.links.add(m)
+
+    def end(self, tag):
+        if tag.lower() == 'script' and self._script_parts is not None:
+            self.links.update(SCRIPT_URL_RE.findall("".join(self._script_parts)))
+            self._script_parts = None
+
+    def data(self, data):
+        if self._script_parts is not None:
+            self._script_parts.append(data)
+
+    def close(self):
+        return self
+
+
+class _StdlibInviteParser(HTMLParser):
+    """Feeds html.parser events into an _InviteLinkTarget"""
+
+    def __init__(self, target: _InviteLinkTarget):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {k: v for k, v in attrs if v is not None})
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, {k: v for k, v in attrs if v is not None})
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _parse_invite_links(html: str) -> _InviteLinkTarget:
+    target = _InviteLinkTarget()
+    if lxml_etree is not None:
+        try:
+            parser = lxml_etree.HTMLParser(target=target)
+            parser.feed(html)
+            return parser.close()
+        except Exception:
+            # lxml rejects a few malformed documents; html.parser is more lenient
+            target = _InviteLinkTarget()
+    parser = _StdlibInviteParser(target)
+    parser.feed(html)
+    parser.close()
+    return target
+
+
+def extract_page_signals(html: str) -> Tuple[List[str], bool]:
+    """
+    Extract WhatsApp links and form presence from HTML in a single pass
+
+    Documents without any invite-host signal are answered with two regex
+    scans and never parsed.
+
+    Returns:
+        Tuple of (links, has_form)
+    """
+    if not INVITE_SIGNAL_RE.search(html):
+        return [], bool(FORM_RE.search(html))
+    target = _parse_invite_links(html)
+    return list(target.links), target.has_form
+
 def extract_whatsapp_links_from_html(html: str) -> List[str]:
     """Extract WhatsApp links from HTML content"""
-    soup = BeautifulSoup(html, 'html.parser')
-    links = set()
-
-    # anchor tags
-    for a in soup.find_all('a', href=True):
-        href = a['href'].strip()
-        if 'whatsapp' in href.lower():
-            links.add(href)
-
-    # onclicks / scripts
-    for tag in soup.find_all(onclick=True):
-        onclick = tag['onclick']
-        matches = re.findall(r'(https?://[^\s\'\"]+)', onclick)
-        for m in matches:
-            if 'whatsapp' in m.lower():
-                links.add(m)
-
-    for script in soup.find_all('script'):
-        s = script.string or ""
-        matches = re.findall(r'(https?://[^\s\'\"]*whatsapp[^\s\'\"]*)', s, re.IGNORECASE)
-        for m in matches:
-            links.add(m)
-
-    return list(links)
+    return extract_page_signals(html)[0]
 
 def fetch_group_metadata(url: str) -> str:
     """Acessa o link de convite do WhatsApp/Telegram e tenta extrair o Nome (og:title)"""
     headers = {"User-Agent": USER_AGENT}
     try:
         # Aumentamos o timeout para 10s para evitar travamentos
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        html = resp.text
-        soup = BeautifulSoup(html, 'html.parser')
+        # O og:title fica no <head>: lê só até </head> em vez da página inteira
+        with http_client.get(url, headers=headers, timeout=10, stream=True) as resp:
+            resp.raise_for_status()
+            head = b""
+            for chunk in resp.iter_content(chunk_size=8192):
+                head += chunk
+                if HEAD_END_RE.search(head, max(0, len(head) - len(chunk) - 8)) or len(head) >= METADATA_MAX_BYTES:
+                    break
+        # bytes: o BeautifulSoup detecta o charset pelo <meta> do próprio head
+        soup = BeautifulSoup(head, 'html.parser')
         
         # Procura por og:title (padrão de convites)
         og_title = soup.find('meta', property='og:title') or soup.find('meta', attrs={"name": "og:title"})
@@ -72,6 +177,9 @@ def fetch_group_metadata(url: str) -> str:
     except Exception:
         return "Nome Indisponível"
 
+def _is_thanks_url(url: str) -> bool:
+    return any(kw in url.lower() for kw in ['obrigado', 'thank', 'success', 'confirmacao'])
+
 def collect_from_page(url: str) -> Tuple[List[str], bool, bool]:
     """
     Collect WhatsApp links from a page
@@ -83,17 +191,75 @@ def collect_from_page(url: str) -> Tuple[List[str], bool, bool]:
         Tuple of (links, has_form, is_thank_you)
     """
     try:
-        final, html = fetch_html(url)
+        result = collect_from_page_conditional(url)
     except Exception:
         return [], False, False
+    return result["links"], result["has_form"], result["is_thanks"]
+
+def collect_from_page_conditional(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    timeout: int = 15,
+    stream: Optional[bool] = None,
+) -> dict:
+    """
+    Collect WhatsApp links from a page, skipping extraction when it did not change
+
+    Sends If-None-Match / If-Modified-Since with the validators from the last
+    run and compares the body hash before parsing. In streaming mode (the
+    default, see SCRAPER_FETCH_MODE) the body is scanned chunk by chunk up to
+    SCRAPER_MAX_BYTES and never held in memory as a whole.
 
-    soup = BeautifulSoup(html, 'html.parser')
+    Returns:
+        Dict with status ('modified', 'not_modified', 'unchanged'), links,
+        has_form, is_thanks, truncated and the new etag, last_modified, content_hash
+    """
+    if stream is None:
+        stream = FETCH_MODE == "stream"
 
-    # simple heuristics
-    has_form = bool(soup.find('form'))
-    is_thanks = any(kw in final.lower() for kw in ['obrigado', 'thank', 'success', 'confirmacao'])
+    headers = {"User-Agent": USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with http_client.get(url, headers=headers, timeout=timeout, stream=stream) as resp:
+        result = {
+            "status": "not_modified",
+            "links": [],
+            "has_form": False,
+            "is_thanks": False,
+            "truncated": False,
+            "etag": resp.headers.get("ETag") or etag,
+            "last_modified": resp.headers.get("Last-Modified") or last_modified,
+            "content_hash": content_hash,
+        }
+        if resp.status_code == 304:
+            return result
+        resp.raise_for_status()
 
-    links = extract_whatsapp_links_from_html(html)
-    return links, has_form, is_thanks
+        if stream:
+            scan = scan_response(resp)
+            links, has_form, body_hash = scan.links, scan.has_form, scan.content_hash
+            result["truncated"] = scan.truncated
+        else:
+            check_content_type(resp)
+            body_hash = hashlib.sha256(resp.content).hexdigest()
+            links, has_form = None, False
 
+        result["content_hash"] = body_hash
+        if content_hash and body_hash == content_hash:
+            result["status"] = "unchanged"
+            return result
 
+        if links is None:
+            links, has_form = extract_page_signals(resp.text)
+        result.update(
+            status="modified",
+            links=links,
+            has_form=has_form,
+            is_thanks=_is_thanks_url(resp.url),
+        )
+        return result
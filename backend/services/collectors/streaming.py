@@ -0,0 +1,107 @@
+"""
+Streaming page scanner
+Scans the raw response bytes for invite links while they arrive, so memory per
+in-flight page stays bounded by chunk size + overlap, whatever the page size
+"""
+
+import hashlib
+import html
+import os
+import re
+from typing import List, Optional
+
+import requests
+
+# Pages above this size are only scanned up to the cap
+MAX_BYTES = int(os.getenv("SCRAPER_MAX_BYTES", str(5 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+# Bytes carried from one chunk to the next; longer than any link we keep
+OVERLAP = 2048
+
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Same rule as the DOM extractor: URLs that mention whatsapp, anywhere in the page
+INVITE_BYTES_RE = re.compile(
+    rb'(?:https?:)?//[^\s\'"<>\\]{0,512}?whatsapp[^\s\'"<>\\]{0,1024}',
+    re.IGNORECASE,
+)
+FORM_BYTES_RE = re.compile(rb'<form[\s>/]', re.IGNORECASE)
+
+
+class UnsupportedContentType(Exception):
+    """Raised when a page is not HTML and was not downloaded"""
+
+
+class StreamScanResult:
+    """Outcome of a streamed scan"""
+
+    def __init__(self):
+        self.links: List[str] = []
+        self.has_form = False
+        self.content_hash: Optional[str] = None
+        self.bytes_read = 0
+        self.truncated = False
+
+
+def _decode_link(raw: bytes) -> str:
+    link = html.unescape(raw.decode("utf-8", errors="ignore")).strip()
+    if link.startswith("//"):
+        link = "https:" + link
+    return link
+
+
+def check_content_type(resp: requests.Response) -> None:
+    content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in ALLOWED_CONTENT_TYPES:
+        raise UnsupportedContentType(f"Content-Type não suportado: {content_type}")
+
+
+def scan_response(resp: requests.Response, max_bytes: int = MAX_BYTES) -> StreamScanResult:
+    """
+    Scan a streamed response (requested with stream=True) chunk by chunk
+
+    Matches touching the end of the current window may be cut in half, so they
+    are left for the next window, which starts with the last OVERLAP bytes.
+
+    Args:
+        resp: Response opened with stream=True; the caller closes it
+        max_bytes: Stop reading after this many (decoded) bytes
+
+    Returns:
+        StreamScanResult with links, has_form, hash of the bytes read and size info
+    """
+    check_content_type(resp)
+
+    result = StreamScanResult()
+    digest = hashlib.sha256()
+    links = {}
+    carry = b""
+
+    def scan(window: bytes, final: bool) -> None:
+        if not result.has_form and FORM_BYTES_RE.search(window):
+            result.has_form = True
+        for m in INVITE_BYTES_RE.finditer(window):
+            if not final and m.end() == len(window):
+                continue
+            links.setdefault(_decode_link(m.group(0)), None)
+
+    for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+        if not chunk:
+            continue
+        remaining = max_bytes - result.bytes_read
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            result.truncated = True
+        result.bytes_read += len(chunk)
+        digest.update(chunk)
+
+        window = carry + chunk
+        scan(window, final=False)
+        carry = window[-OVERLAP:]
+        if result.truncated:
+            break
+
+    scan(carry, final=True)
+    result.links = list(links)
+    result.content_hash = digest.hexdigest()
+    return result
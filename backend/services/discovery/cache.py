@@ -0,0 +1,78 @@
+"""
+Caches da descoberta, compartilhados entre usuários e persistidos em JSON.
+
+- Buscas: (fonte, termo, quantidade) → resultados brutos da busca
+  (DuckDuckGo, YouTube, Facebook Ad Library), por DISCOVERY_QUERY_TTL.
+- Verificações: URL → (has_whatsapp, title, verified_at). Páginas com
+  WhatsApp valem por DISCOVERY_VERIFY_TTL; sem WhatsApp, por menos tempo
+  (DISCOVERY_VERIFY_NEGATIVE_TTL), porque o link do grupo costuma entrar
+  perto da abertura do lançamento.
+
+Falhas (busca vazia, página que não abriu) não entram no cache.
+"""
+
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from backend.services.collectors.engine import canonical_page_url
+from backend.storage.cache import TTLCache
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+QUERY_CACHE_FILE = os.path.abspath(os.path.join(DATA_DIR, "discovery_query_cache.json"))
+VERIFY_CACHE_FILE = os.path.abspath(os.path.join(DATA_DIR, "discovery_verify_cache.json"))
+
+QUERY_TTL = int(os.getenv("DISCOVERY_QUERY_TTL", str(6 * 3600)))
+QUERY_CACHE_SIZE = int(os.getenv("DISCOVERY_QUERY_CACHE_SIZE", "2000"))
+VERIFY_TTL = int(os.getenv("DISCOVERY_VERIFY_TTL", str(24 * 3600)))
+VERIFY_NEGATIVE_TTL = int(os.getenv("DISCOVERY_VERIFY_NEGATIVE_TTL", str(6 * 3600)))
+VERIFY_CACHE_SIZE = int(os.getenv("DISCOVERY_VERIFY_CACHE_SIZE", "20000"))
+
+_queries = TTLCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_TTL, path=QUERY_CACHE_FILE)
+_queries.load()
+_verifications = TTLCache(maxsize=VERIFY_CACHE_SIZE, ttl=VERIFY_TTL, path=VERIFY_CACHE_FILE)
+_verifications.load()
+
+
+def _query_key(source: str, query: str, max_results: int) -> str:
+    return f"{source}|{max_results}|{' '.join(query.lower().split())}"
+
+
+def get_query_results(source: str, query: str, max_results: int) -> Optional[List[dict]]:
+    """Resultados guardados da busca, ou None"""
+    return _queries.get(_query_key(source, query, max_results))
+
+
+def set_query_results(source: str, query: str, max_results: int, results: List[dict]) -> None:
+    if results:
+        _queries.set(_query_key(source, query, max_results), results)
+
+
+def get_verification(url: str) -> Optional[dict]:
+    """{has_whatsapp, title, verified_at} da última verificação da URL, ou None"""
+    return _verifications.get(canonical_page_url(url))
+
+
+def set_verification(url: str, has_whatsapp: bool, title: str) -> dict:
+    entry = {
+        "has_whatsapp": has_whatsapp,
+        "title": title,
+        "verified_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    _verifications.set(canonical_page_url(url), entry, ttl=VERIFY_TTL if has_whatsapp else VERIFY_NEGATIVE_TTL)
+    return entry
+
+
+def save() -> None:
+    """Grava os dois caches (uma vez por execução da descoberta)"""
+    _queries.save()
+    _verifications.save()
+
+
+def new_run_stats() -> dict:
+    """Contadores de uma execução, devolvidos na resposta da descoberta"""
+    return {"queries_cached": 0, "queries_fetched": 0, "verifications_cached": 0, "verifications_fetched": 0}
+
+
+def get_discovery_cache_stats() -> dict:
+    return {"queries": _queries.stats(), "verifications": _verifications.stats()}
@@ -9,11 +9,30 @@ Como obter o token:
   4. Cole o token nas configurações do LinkPulse
 
 Documentação: https://developers.facebook.com/docs/marketing-api/reference/ads_archive
+
+Sincronização incremental: cada termo segue os cursores (paging.next) até
+FB_MAX_PAGES_PER_TERM páginas, com vários termos em paralelo dentro do limite
+de chamadas da Graph API. Um índice persistente de ids (db/facebook_ads.py)
+separa os anúncios novos, e a marca d'água de cada termo (ad_delivery_start_time
+mais recente) vira ad_delivery_date_min da próxima sincronização.
 """
 
+import hashlib
+import json
+import os
+import random
 import re
+import threading
+import time
 import requests
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import List, Dict, Optional, Tuple
+
+from backend.db import facebook_ads as ads_db
+from backend.services import http_client
+from backend.services.discovery import cache as discovery_cache
+from backend.services.notifications.dispatcher import TokenBucket
 
 GRAPH_API_VERSION = "v21.0"
 ADS_ARCHIVE_URL = f"https://graph.facebook.com/{GRAPH_API_VERSION}/ads_archive"
@@ -46,6 +65,154 @@ AD_FIELDS = ",".join([
     "ad_delivery_start_time",
 ])
 
+# Termos buscados ao mesmo tempo
+FB_TERM_CONCURRENCY = int(os.getenv("FB_TERM_CONCURRENCY", "3"))
+# Páginas (cursores) seguidas por termo em cada sincronização
+FB_MAX_PAGES_PER_TERM = int(os.getenv("FB_MAX_PAGES_PER_TERM", "5"))
+# Chamadas por hora e rajada por token (a Ad Library permite ~200/hora)
+FB_CALLS_PER_HOUR = float(os.getenv("FB_CALLS_PER_HOUR", "180"))
+FB_RATE_BURST = float(os.getenv("FB_RATE_BURST", "10"))
+# Uso (%) informado nos cabeçalhos x-app-usage / x-business-use-case-usage
+# a partir do qual as chamadas do token param por FB_USAGE_PAUSE_SECONDS
+FB_USAGE_PAUSE = float(os.getenv("FB_USAGE_PAUSE", "90"))
+FB_USAGE_PAUSE_SECONDS = float(os.getenv("FB_USAGE_PAUSE_SECONDS", "60"))
+# Novas tentativas quando a API limita a taxa (espera dobra até o máximo, em segundos)
+FB_MAX_RETRIES = int(os.getenv("FB_MAX_RETRIES", "3"))
+FB_BACKOFF_BASE = float(os.getenv("FB_BACKOFF_BASE", "5"))
+FB_BACKOFF_MAX = float(os.getenv("FB_BACKOFF_MAX", "120"))
+# Recuo (dias) da marca d'água: anúncios do mesmo dia entram em qualquer ordem
+FB_WATERMARK_OVERLAP_DAYS = int(os.getenv("FB_WATERMARK_OVERLAP_DAYS", "1"))
+
+# Códigos de erro da Graph API para limite de chamadas
+RATE_LIMIT_CODES = {4, 17, 32, 613, 80000, 80004}
+
+_executor = ThreadPoolExecutor(max_workers=max(1, FB_TERM_CONCURRENCY), thread_name_prefix="fb-discovery")
+
+_stats_lock = threading.Lock()
+_stats = {"runs": 0, "calls": 0, "pages": 0, "retries": 0, "rate_limited": 0, "usage_pauses": 0, "ads_new": 0}
+
+
+def _count(key: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += amount
+
+
+class RateLimited(Exception):
+    """A Graph API recusou a chamada por limite de taxa"""
+
+    def __init__(self, message: str, wait: Optional[float] = None):
+        super().__init__(message)
+        self.wait = wait
+
+
+class GraphRateLimiter:
+    """
+    Limite de chamadas por token: um token bucket e uma pausa (cooldown)
+    compartilhados pelas threads do processo. A pausa vem dos cabeçalhos de uso
+    e das respostas de limite, que refletem o uso somado de todos os workers.
+    """
+
+    def __init__(self, calls_per_hour: float, burst: float):
+        self.rate = calls_per_hour / 3600.0
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._paused_until: Dict[str, float] = {}
+
+    def acquire(self, key: str) -> None:
+        """Bloqueia até o token poder fazer mais uma chamada."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+                wait = max(self._paused_until.get(key, 0.0) - now, bucket.wait_time(now))
+                if wait <= 0:
+                    bucket.take(now)
+                    return
+            time.sleep(wait)
+
+    def pause(self, key: str, seconds: float) -> None:
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._paused_until[key] = max(self._paused_until.get(key, 0.0), until)
+
+    def paused_seconds(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            return max([until - now for until in self._paused_until.values()] + [0.0])
+
+
+_limiter = GraphRateLimiter(FB_CALLS_PER_HOUR, FB_RATE_BURST)
+
+
+def _token_key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+
+def _usage_from_headers(headers) -> Tuple[float, float]:
+    """
+    (maior % de uso, segundos até recuperar o acesso) dos cabeçalhos
+    x-app-usage e x-business-use-case-usage; (0, 0) se ausentes.
+    """
+    usage, regain = 0.0, 0.0
+    try:
+        app = json.loads(headers.get("x-app-usage") or "{}")
+        usage = max([usage] + [float(v) for v in app.values() if isinstance(v, (int, float))])
+        buc = json.loads(headers.get("x-business-use-case-usage") or "{}")
+        for entries in buc.values():
+            for entry in entries:
+                usage = max(usage, *(float(entry.get(k) or 0) for k in ("call_count", "total_cputime", "total_time")))
+                regain = max(regain, float(entry.get("estimated_time_to_regain_access") or 0) * 60)
+    except (ValueError, TypeError, AttributeError):
+        pass
+    return usage, regain
+
+
+def _fetch_page(url: str, params: Optional[Dict], key: str) -> Dict:
+    """
+    Uma chamada à Ad Library dentro do limite do token, com novas tentativas
+    quando a API limita a taxa. Outros erros viram RuntimeError.
+    """
+    for attempt in range(FB_MAX_RETRIES + 1):
+        _limiter.acquire(key)
+        _count("calls")
+        try:
+            resp = http_client.get(url, params=params, timeout=15)
+            usage, regain = _usage_from_headers(resp.headers)
+            if usage >= FB_USAGE_PAUSE:
+                _count("usage_pauses")
+                _limiter.pause(key, regain or FB_USAGE_PAUSE_SECONDS)
+            error = {}
+            if resp.status_code >= 400:
+                try:
+                    error = resp.json().get("error", {}) or {}
+                except Exception:
+                    pass
+                if error.get("code") in RATE_LIMIT_CODES or resp.status_code == 429:
+                    raise RateLimited(error.get("message", f"HTTP {resp.status_code}"), regain or None)
+            resp.raise_for_status()
+            return resp.json()
+        except RateLimited as e:
+            _count("rate_limited")
+            if attempt == FB_MAX_RETRIES:
+                raise
+            _count("retries")
+            delay = min(FB_BACKOFF_MAX, FB_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.75, 1.25)
+            _limiter.pause(key, max(delay, e.wait or 0.0))
+        except requests.exceptions.HTTPError as e:
+            error_body = {}
+            try:
+                error_body = e.response.json()
+            except Exception:
+                pass
+            error_msg = error_body.get("error", {}).get("message", str(e))
+            raise RuntimeError(f"Erro na API do Facebook: {error_msg}")
+        except Exception as e:
+            raise RuntimeError(f"Erro ao conectar ao Facebook: {str(e)}")
+    raise RateLimited("limite de chamadas")
+
 
 def _extract_urls_from_text(texts: List[str]) -> List[str]:
     """Extrai URLs encontradas no texto dos anúncios."""
@@ -86,91 +253,228 @@ def _reconstruct_url_from_caption(caption: str) -> Optional[str]:
     return None
 
 
+def _parse_ads(ads: List[Dict], term: str, seen_ids: set) -> List[Dict]:
+    """Converte os anúncios da API nos dicts da descoberta (ignora ids já vistos)."""
+    results: List[Dict] = []
+    for ad in ads:
+        ad_id = ad.get("id")
+        if ad_id in seen_ids:
+            continue
+        seen_ids.add(ad_id)
+
+        bodies = ad.get("ad_creative_bodies") or []
+        captions = ad.get("ad_creative_link_captions") or []
+        titles = ad.get("ad_creative_link_titles") or []
+
+        landing_urls = _extract_urls_from_text(bodies)
+        whatsapp_in_ad = _extract_whatsapp_from_text(bodies)
+
+        # Tenta reconstruir URL a partir da caption
+        if not landing_urls:
+            for cap in captions:
+                url = _reconstruct_url_from_caption(cap)
+                if url:
+                    landing_urls.append(url)
+
+        ad_name = (
+            " | ".join(titles[:1])
+            or " | ".join(captions[:1])
+            or ad.get("page_name", f"Anúncio {ad_id}")
+        )[:100]
+
+        results.append({
+            "ad_id": ad_id,
+            "page_name": ad.get("page_name", ""),
+            "page_id": ad.get("page_id", ""),
+            "name": ad_name,
+            "landing_urls": landing_urls,
+            "whatsapp_direct": whatsapp_in_ad,
+            "snapshot_url": ad.get("ad_snapshot_url", ""),
+            "ad_text": bodies[:1][0][:200] if bodies else "",
+            "search_term": term,
+            "start_date": ad.get("ad_delivery_start_time", ""),
+        })
+
+    return results
+
+
+def _term_key(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+def _delivery_day(ad: Dict) -> str:
+    """YYYY-MM-DD de ad_delivery_start_time ('' se ausente)"""
+    return (ad.get("ad_delivery_start_time") or "")[:10]
+
+
+def _harvest_term(
+    access_token: str,
+    term: str,
+    limit: int,
+    max_pages: int,
+    date_min: Optional[str],
+    stop_on_known: bool,
+) -> Dict:
+    """
+    Segue os cursores de um termo até max_pages páginas. Com stop_on_known,
+    para na primeira página em que todos os anúncios já estão no índice.
+
+    Returns:
+        {ads, pages, complete}: complete indica que o termo foi lido até o
+        fim (sem próxima página) ou até alcançar anúncios já conhecidos.
+    """
+    key = _token_key(access_token)
+    params: Optional[Dict] = {
+        "access_token": access_token,
+        "ad_type": "ALL",
+        "ad_reached_countries": "BR",
+        "ad_active_status": "ACTIVE",
+        "search_terms": term,
+        "fields": AD_FIELDS,
+        "limit": limit,
+    }
+    if date_min:
+        params["ad_delivery_date_min"] = date_min
+
+    url = ADS_ARCHIVE_URL
+    ads: List[Dict] = []
+    pages = 0
+    while pages < max_pages:
+        data = _fetch_page(url, params, key)
+        pages += 1
+        _count("pages")
+        page_ads = data.get("data", [])
+        ads.extend(page_ads)
+        next_url = (data.get("paging") or {}).get("next")
+        if not page_ads or not next_url:
+            return {"ads": ads, "pages": pages, "complete": True}
+        if stop_on_known:
+            ids = [ad.get("id") for ad in page_ads]
+            if len(ads_db.get_known_ad_ids(ids)) == len(set(ids)):
+                return {"ads": ads, "pages": pages, "complete": True}
+        # O cursor já leva token e filtros na URL
+        url, params = next_url, None
+    return {"ads": ads, "pages": pages, "complete": False}
+
+
 def search_active_ads(
     access_token: str,
     search_terms: Optional[List[str]] = None,
     limit_per_query: int = 20,
+    stats: Optional[Dict] = None,
+    max_pages: int = FB_MAX_PAGES_PER_TERM,
+    incremental: bool = True,
 ) -> List[Dict]:
     """
     Busca anúncios ATIVOS no Brasil via Facebook Ad Library API.
 
+    Os termos rodam em paralelo (FB_TERM_CONCURRENCY) e cada um segue até
+    max_pages páginas de limit_per_query anúncios. Termos buscados dentro de
+    DISCOVERY_QUERY_TTL vêm do cache.
+
+    Com incremental, cada termo começa na sua marca d'água e só os anúncios
+    que ainda não estão no índice são devolvidos; sem incremental, devolve
+    todos (o índice e as marcas são atualizados nos dois casos). A marca só
+    avança para termos lidos até o fim, para que anúncios além de max_pages
+    não fiquem para trás. Termos que esgotam as novas tentativas por limite
+    de taxa ficam para a próxima sincronização (stats["deferred_terms"]).
+
+    Args:
+        stats: Opcional; recebe os acertos de cache (discovery_cache.new_run_stats())
+               e pages_fetched, ads_known, ads_new, deferred_terms
+
     Returns:
         Lista de dicts com informações de cada anúncio encontrado.
     """
     if not search_terms:
         search_terms = FB_SEARCH_QUERIES
+    if stats is None:
+        stats = discovery_cache.new_run_stats()
+    stats.update({"pages_fetched": 0, "ads_known": 0, "ads_new": 0, "deferred_terms": []})
+    _count("runs")
+    max_pages = max(1, max_pages)
 
-    seen_ids: set = set()
-    results: List[Dict] = []
+    terms = list(dict.fromkeys(search_terms))
+    marks = ads_db.get_watermarks([_term_key(t) for t in terms])
+    date_mins: Dict[str, Optional[str]] = {}
+    for term in terms:
+        mark = marks.get(_term_key(term))
+        date_mins[term] = (
+            (date.fromisoformat(mark) - timedelta(days=FB_WATERMARK_OVERLAP_DAYS)).isoformat()
+            if mark and incremental else None
+        )
 
-    for term in search_terms:
-        params = {
-            "access_token": access_token,
-            "ad_type": "ALL",
-            "ad_reached_countries": "BR",
-            "ad_active_status": "ACTIVE",
-            "search_terms": term,
-            "fields": AD_FIELDS,
-            "limit": limit_per_query,
-        }
+    def cache_query(term: str) -> str:
+        return f"{term}|{date_mins[term] or '-'}|p{max_pages}"
 
-        try:
-            resp = requests.get(ADS_ARCHIVE_URL, params=params, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-        except requests.exceptions.HTTPError as e:
-            error_body = {}
-            try:
-                error_body = e.response.json()
-            except Exception:
-                pass
-            error_msg = error_body.get("error", {}).get("message", str(e))
-            raise RuntimeError(f"Erro na API do Facebook: {error_msg}")
-        except Exception as e:
-            raise RuntimeError(f"Erro ao conectar ao Facebook: {str(e)}")
+    harvests: Dict[str, Dict] = {}
+    pending = []
+    for term in terms:
+        ads = discovery_cache.get_query_results("facebook", cache_query(term), limit_per_query)
+        if ads is not None:
+            stats["queries_cached"] += 1
+            harvests[term] = {"ads": ads, "pages": 0, "complete": False}
+        else:
+            pending.append(term)
 
-        for ad in data.get("data", []):
-            ad_id = ad.get("id")
-            if ad_id in seen_ids:
+    futures = {
+        term: _executor.submit(
+            _harvest_term, access_token, term, limit_per_query, max_pages,
+            date_mins[term], incremental and date_mins[term] is not None,
+        )
+        for term in pending
+    }
+    try:
+        for term, future in futures.items():
+            try:
+                harvests[term] = future.result()
+            except RateLimited:
+                stats["deferred_terms"].append(term)
                 continue
-            seen_ids.add(ad_id)
-
-            bodies = ad.get("ad_creative_bodies") or []
-            captions = ad.get("ad_creative_link_captions") or []
-            titles = ad.get("ad_creative_link_titles") or []
-
-            landing_urls = _extract_urls_from_text(bodies)
-            whatsapp_in_ad = _extract_whatsapp_from_text(bodies)
-
-            # Tenta reconstruir URL a partir da caption
-            if not landing_urls:
-                for cap in captions:
-                    url = _reconstruct_url_from_caption(cap)
-                    if url:
-                        landing_urls.append(url)
-
-            ad_name = (
-                " | ".join(titles[:1])
-                or " | ".join(captions[:1])
-                or ad.get("page_name", f"Anúncio {ad_id}")
-            )[:100]
-
-            results.append({
-                "ad_id": ad_id,
-                "page_name": ad.get("page_name", ""),
-                "page_id": ad.get("page_id", ""),
-                "name": ad_name,
-                "landing_urls": landing_urls,
-                "whatsapp_direct": whatsapp_in_ad,
-                "snapshot_url": ad.get("ad_snapshot_url", ""),
-                "ad_text": bodies[:1][0][:200] if bodies else "",
-                "search_term": term,
-                "start_date": ad.get("ad_delivery_start_time", ""),
-            })
+            stats["queries_fetched"] += 1
+            stats["pages_fetched"] += harvests[term]["pages"]
+            discovery_cache.set_query_results("facebook", cache_query(term), limit_per_query, harvests[term]["ads"])
+    finally:
+        for future in futures.values():
+            future.cancel()
+        discovery_cache.save()
 
+    all_ids = [ad.get("id") for h in harvests.values() for ad in h["ads"]]
+    known = ads_db.get_known_ad_ids(all_ids)
+
+    seen_ids: set = set()
+    results: List[Dict] = []
+    new_rows: Dict[str, Dict] = {}
+    new_marks: Dict[str, str] = {}
+    for term in terms:
+        harvest = harvests.get(term)
+        if harvest is None:
+            continue
+        fresh = [ad for ad in harvest["ads"] if ad.get("id") and ad["id"] not in known]
+        for ad in fresh:
+            new_rows.setdefault(ad["id"], {"ad_id": ad["id"], "search_term": term, "delivery_start": _delivery_day(ad)})
+        results.extend(_parse_ads(fresh if incremental else harvest["ads"], term, seen_ids))
+        if harvest["complete"]:
+            days = [_delivery_day(ad) for ad in harvest["ads"] if _delivery_day(ad)]
+            if days:
+                new_marks[_term_key(term)] = max(days)
+
+    stats["ads_new"] = len(new_rows)
+    stats["ads_known"] = len(set(all_ids) & known)
+    _count("ads_new", len(new_rows))
+    ads_db.save_ads(list(new_rows.values()))
+    ads_db.save_watermarks(new_marks)
     return results
 
 
+def get_facebook_harvest_stats() -> dict:
+    """Chamadas, páginas e pausas por limite de taxa da Ad Library neste processo"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["cooldown_seconds"] = round(_limiter.paused_seconds(), 1)
+    return stats
+
+
 def validate_token(access_token: str) -> Dict:
     """
     Valida se o token tem acesso à Ad Library API.
@@ -186,7 +490,7 @@ def validate_token(access_token: str) -> Dict:
             "fields": "id",
             "limit": 1,
         }
-        resp = requests.get(ADS_ARCHIVE_URL, params=params, timeout=10)
+        resp = http_client.get(ADS_ARCHIVE_URL, params=params, timeout=10)
         data = resp.json()
 
         if "error" in data:
@@ -4,10 +4,18 @@ Usa DuckDuckGo (gratuito, sem API key) para encontrar páginas
 de lançamentos brasileiros que potencialmente contêm links de grupos WhatsApp.
 """
 
+import asyncio
+import os
+import random
 import re
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+
+from backend.services import http_client
+from backend.services.discovery import cache as discovery_cache
 
 # Termos de busca pré-configurados focados em lançamentos brasileiros
 DEFAULT_QUERIES = [
@@ -40,36 +48,239 @@ WHATSAPP_PATTERN = re.compile(
 
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
+# Buscas simultâneas no DuckDuckGo (ele limita por IP: poucas bastam)
+DDG_SEARCH_CONCURRENCY = int(os.getenv("DDG_SEARCH_CONCURRENCY", "3"))
+# Páginas verificadas ao mesmo tempo
+DDG_VERIFY_CONCURRENCY = int(os.getenv("DDG_VERIFY_CONCURRENCY", "8"))
+DDG_VERIFY_TIMEOUT = int(os.getenv("DDG_VERIFY_TIMEOUT", "12"))
+# Tentativas por busca quando o DuckDuckGo responde com limite de taxa;
+# a espera dobra a cada tentativa (com variação aleatória) até DDG_BACKOFF_MAX
+DDG_MAX_RETRIES = int(os.getenv("DDG_MAX_RETRIES", "3"))
+DDG_BACKOFF_BASE = float(os.getenv("DDG_BACKOFF_BASE", "2.0"))
+DDG_BACKOFF_MAX = float(os.getenv("DDG_BACKOFF_MAX", "30"))
+
+# Buscas e verificações são bloqueantes: pool próprio, do tamanho dos dois limites
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, DDG_SEARCH_CONCURRENCY) + max(1, DDG_VERIFY_CONCURRENCY),
+    thread_name_prefix="ddg-discovery",
+)
+
+# Limite de taxa vale para o processo todo: enquanto durar, nenhuma busca sai
+_cooldown_lock = threading.Lock()
+_cooldown_until = 0.0
+
+_stats_lock = threading.Lock()
+_stats = {"runs": 0, "searches": 0, "retries": 0, "rate_limited": 0, "search_errors": 0, "verified": 0}
+
 
 def _has_whatsapp_signal_in_html(html: str) -> bool:
     """Verifica se o HTML contém padrões de link de grupo WhatsApp."""
     return bool(WHATSAPP_PATTERN.search(html))
 
 
-def quick_verify_page(url: str, timeout: int = 12) -> Tuple[bool, str]:
+def _inspect_html(url: str, html: str) -> Tuple[bool, str]:
+    soup = BeautifulSoup(html, 'html.parser')
+    title = ""
+    if soup.title and soup.title.string:
+        title = soup.title.string.strip()[:100]
+    if not title:
+        title = url
+    return _has_whatsapp_signal_in_html(html), title
+
+
+def verify_page_cached(url: str, timeout: int = 12) -> Tuple[Dict, bool]:
     """
-    Faz uma requisição rápida para verificar se a página contém
-    links de grupos WhatsApp.
+    Verifica se a página contém links de grupos WhatsApp, passando pelo cache
+    de verificações (compartilhado entre usuários)
 
     Returns:
-        (has_whatsapp, page_title)
+        ({has_whatsapp, title, verified_at}, veio_do_cache). Páginas que não
+        abriram (erro ou status >= 400) não são guardadas e têm verified_at None.
     """
+    cached = discovery_cache.get_verification(url)
+    if cached is not None:
+        return cached, True
     try:
         headers = {"User-Agent": USER_AGENT}
-        resp = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-        html = resp.text
-
-        soup = BeautifulSoup(html, 'html.parser')
-        title = ""
-        if soup.title and soup.title.string:
-            title = soup.title.string.strip()[:100]
-        if not title:
-            title = url
-
-        has_wa = _has_whatsapp_signal_in_html(html)
-        return has_wa, title
+        resp = http_client.get(url, headers=headers, timeout=timeout, allow_redirects=True)
+        has_wa, title = _inspect_html(url, resp.text)
     except Exception:
-        return False, url
+        return {"has_whatsapp": False, "title": url, "verified_at": None}, False
+    if resp.status_code >= 400:
+        return {"has_whatsapp": has_wa, "title": title, "verified_at": None}, False
+    return discovery_cache.set_verification(url, has_wa, title), False
+
+
+def _load_ddgs():
+    """Classe DDGS da biblioteca instalada (ddgs ou duckduckgo_search)"""
+    try:
+        from ddgs import DDGS
+    except ImportError:
+        try:
+            from duckduckgo_search import DDGS
+        except ImportError:
+            raise RuntimeError(
+                "Biblioteca 'ddgs' não instalada. "
+                "Execute: pip install ddgs"
+            )
+    return DDGS
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    # RatelimitException nas duas bibliotecas; versões antigas só mudam a mensagem
+    return "ratelimit" in type(error).__name__.lower() or "ratelimit" in str(error).lower()
+
+
+def _count(key: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def _search(query: str, max_results: int) -> List[dict]:
+    """Uma busca, com instância própria de DDGS (não é segura entre threads)"""
+    DDGS = _load_ddgs()
+    with DDGS() as ddgs:
+        return list(ddgs.text(query, max_results=max_results))
+
+
+async def _search_with_backoff(query: str, max_results: int) -> List[dict]:
+    """
+    Busca com novas tentativas quando o DuckDuckGo limita a taxa
+    Outros erros descartam a busca (lista vazia), como antes
+    """
+    global _cooldown_until
+    loop = asyncio.get_running_loop()
+    for attempt in range(DDG_MAX_RETRIES + 1):
+        # Espera o fim de um limite de taxa visto por qualquer busca
+        with _cooldown_lock:
+            wait = _cooldown_until - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            _count("searches")
+            return await loop.run_in_executor(_executor, _search, query, max_results)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            if not _is_rate_limit(e) or attempt == DDG_MAX_RETRIES:
+                _count("search_errors")
+                return []
+            _count("rate_limited")
+            _count("retries")
+            delay = min(DDG_BACKOFF_MAX, DDG_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.75, 1.25)
+            with _cooldown_lock:
+                _cooldown_until = max(_cooldown_until, time.monotonic() + delay)
+    return []
+
+
+async def stream_discovered_pages(
+    queries: Optional[List[str]] = None,
+    max_results_per_query: int = 5,
+    verify: bool = True,
+    only_with_whatsapp: bool = True,
+    stats: Optional[Dict] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Descobre páginas de lançamento e as entrega conforme ficam prontas.
+
+    As buscas rodam em paralelo (até DDG_SEARCH_CONCURRENCY) e cada URL nova
+    já entra na verificação (até DDG_VERIFY_CONCURRENCY), sem esperar as
+    outras buscas terminarem. Parar de consumir cancela o que falta.
+    Buscas e verificações recentes vêm do cache (ver discovery/cache.py).
+
+    Args: os mesmos de discover_pages, mais
+        stats: Dict de discovery_cache.new_run_stats(), preenchido com os
+            acertos de cache desta execução
+
+    Yields:
+        Dicts {url, name, has_whatsapp, verified, verified_at, cached, query},
+        na ordem em que terminam
+    """
+    _load_ddgs()  # falha antes de começar se a biblioteca não existir
+    if queries is None:
+        queries = DEFAULT_QUERIES
+    _count("runs")
+    if stats is None:
+        stats = discovery_cache.new_run_stats()
+
+    loop = asyncio.get_running_loop()
+    search_limit = asyncio.Semaphore(max(1, DDG_SEARCH_CONCURRENCY))
+    verify_limit = asyncio.Semaphore(max(1, DDG_VERIFY_CONCURRENCY))
+    ready: asyncio.Queue = asyncio.Queue()
+    seen: set = set()
+    verifications: List[asyncio.Task] = []
+
+    def emit(page: dict) -> None:
+        if not only_with_whatsapp or page.get('has_whatsapp') is True:
+            ready.put_nowait(page)
+
+    async def verify_one(page: dict) -> None:
+        async with verify_limit:
+            entry, cached = await loop.run_in_executor(
+                _executor, verify_page_cached, page['url'], DDG_VERIFY_TIMEOUT
+            )
+        if cached:
+            stats["verifications_cached"] += 1
+        else:
+            stats["verifications_fetched"] += 1
+            _count("verified")
+        page['has_whatsapp'] = entry['has_whatsapp']
+        page['verified'] = True
+        page['verified_at'] = entry['verified_at']
+        page['cached'] = cached
+        title = entry['title']
+        if title and title != page['url']:
+            page['name'] = title
+        emit(page)
+
+    async def search_one(query: str) -> None:
+        results = discovery_cache.get_query_results("ddg", query, max_results_per_query)
+        if results is not None:
+            stats["queries_cached"] += 1
+        else:
+            async with search_limit:
+                results = await _search_with_backoff(query, max_results_per_query)
+            stats["queries_fetched"] += 1
+            discovery_cache.set_query_results("ddg", query, max_results_per_query, results)
+        for r in results:
+            url = r.get('href', '').strip()
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            page = {
+                'url': url,
+                'name': r.get('title', url)[:100],
+                'has_whatsapp': None,
+                'verified': False,
+                'verified_at': None,
+                'cached': False,
+                'query': query,
+            }
+            if verify:
+                verifications.append(asyncio.ensure_future(verify_one(page)))
+            else:
+                emit(page)
+
+    async def run_all() -> None:
+        try:
+            await asyncio.gather(*(search_one(q) for q in queries))
+            # Todas as verificações já foram criadas pelas buscas
+            await asyncio.gather(*verifications)
+            await loop.run_in_executor(_executor, discovery_cache.save)
+        finally:
+            ready.put_nowait(None)
+
+    runner = asyncio.ensure_future(run_all())
+    try:
+        while True:
+            page = await ready.get()
+            if page is None:
+                break
+            yield page
+        await runner  # propaga um erro das buscas (ex.: biblioteca ausente)
+    finally:
+        for task in [runner, *verifications]:
+            task.cancel()
 
 
 def discover_pages(
@@ -77,67 +288,36 @@ def discover_pages(
     max_results_per_query: int = 5,
     verify: bool = True,
     only_with_whatsapp: bool = True,
+    stats: Optional[Dict] = None,
 ) -> List[Dict]:
     """
     Descobre páginas de lançamento usando buscas no DuckDuckGo.
+    Versão bloqueante de stream_discovered_pages (para scripts e threads).
 
     Args:
         queries: Lista de termos de busca. Se None, usa DEFAULT_QUERIES.
         max_results_per_query: Máximo de resultados por query.
         verify: Se True, acessa cada página para confirmar presença de WhatsApp.
         only_with_whatsapp: Se True, retorna apenas páginas com links WhatsApp confirmados.
+        stats: Opcional; recebe os acertos de cache (discovery_cache.new_run_stats())
 
     Returns:
-        Lista de dicts: {url, name, has_whatsapp, verified}
+        Lista de dicts: {url, name, has_whatsapp, verified, verified_at, cached}
     """
-    try:
-        from ddgs import DDGS
-    except ImportError:
-        try:
-            from duckduckgo_search import DDGS
-        except ImportError:
-            raise RuntimeError(
-                "Biblioteca 'ddgs' não instalada. "
-                "Execute: pip install ddgs"
+    async def collect() -> List[Dict]:
+        return [
+            page async for page in stream_discovered_pages(
+                queries, max_results_per_query, verify, only_with_whatsapp, stats
             )
+        ]
 
-    if queries is None:
-        queries = DEFAULT_QUERIES
-
-    found: Dict[str, dict] = {}
-
-    with DDGS() as ddgs:
-        for query in queries:
-            try:
-                results = list(ddgs.text(query, max_results=max_results_per_query))
-                for r in results:
-                    url = r.get('href', '').strip()
-                    title = r.get('title', url)[:100]
-
-                    if not url or url in found:
-                        continue
-
-                    found[url] = {
-                        'url': url,
-                        'name': title,
-                        'has_whatsapp': None,
-                        'verified': False,
-                        'query': query,
-                    }
-            except Exception:
-                continue
-
-    pages = list(found.values())
-
-    if verify:
-        for page in pages:
-            has_wa, title = quick_verify_page(page['url'])
-            page['has_whatsapp'] = has_wa
-            page['verified'] = True
-            if title and title != page['url']:
-                page['name'] = title
+    return asyncio.run(collect())
 
-    if only_with_whatsapp:
-        pages = [p for p in pages if p.get('has_whatsapp') is True]
 
-    return pages
+def get_discovery_stats() -> dict:
+    """Buscas, novas tentativas por limite de taxa e verificações neste processo"""
+    with _stats_lock:
+        stats = dict(_stats)
+    with _cooldown_lock:
+        stats["cooldown_seconds"] = round(max(0.0, _cooldown_until - time.monotonic()), 1)
+    return stats
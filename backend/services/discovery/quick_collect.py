@@ -63,13 +63,13 @@ def collect_url_now(
             cleaned.append(normalized)
 
     if cleaned:
-        save_links(cleaned, source=name, user_id=user_id)
+        new_links = save_links(cleaned, source=name, user_id=user_id)
 
         if send_telegram:
             try:
-                from backend.main import send_telegram_message
-                for link in cleaned:
-                    send_telegram_message(link, name)
+                from backend.main import send_telegram_links
+                # Só notifica convites que ainda não estavam salvos (um resumo por página)
+                send_telegram_links(name, [{"url": link} for link in new_links])
             except Exception:
                 pass
 
@@ -10,11 +10,24 @@ Como obter a API Key:
   4. Cole a chave nas Configurações do LinkPulse
 
 Quota gratuita: 10.000 unidades/dia (≈ 100 buscas)
+
+A descoberta é incremental: cada busca do usuário guarda o publishedAt mais
+recente já processado e a próxima pede só vídeos posteriores (publishedAfter).
+Vídeos já processados ficam num índice com os links extraídos, então
+videos.list só é chamado para ids novos. Um ledger soma as unidades gastas
+por chave e por dia e adia as buscas que passariam do orçamento.
 """
 
+import hashlib
+import os
 import re
-import requests
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from backend.db import youtube as youtube_store
+from backend.services import http_client
+from backend.services.discovery import cache as discovery_cache
 
 SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
 VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
@@ -26,6 +39,22 @@ URL_RE = re.compile(r'https?://[^\s\'"<>()\[\]]+', re.IGNORECASE)
 
 SKIP_DOMAINS = ["youtube.com", "youtu.be", "google.com", "goo.gl", "bit.ly", "t.co"]
 
+TUTORIAL_KEYWORDS = ["tutorial", "como fazer", "passo a passo", "aula 1"]
+
+# Custo de cada chamada em unidades de quota
+SEARCH_COST = 100
+VIDEOS_COST = 1
+# Quota diária da chave e quanto dela as buscas deixam livre (validação da
+# chave, outras ferramentas). A quota zera à meia-noite do Pacífico
+YOUTUBE_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+YOUTUBE_QUOTA_RESERVE = int(os.getenv("YOUTUBE_QUOTA_RESERVE", "500"))
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+# Vídeos entram no índice de busca com atraso: a marca d'água recua esse
+# tanto (segundos) e os repetidos são descartados pela própria marca
+YOUTUBE_WATERMARK_OVERLAP = int(os.getenv("YOUTUBE_WATERMARK_OVERLAP", "3600"))
+# Páginas com vídeos novos seguidas por busca incremental até chegar à marca (cada uma custa uma busca)
+YOUTUBE_MAX_PAGES = int(os.getenv("YOUTUBE_MAX_PAGES", "3"))
+
 YT_DEFAULT_QUERIES = [
     "grupo whatsapp lançamento 2026",
     "entrar no grupo whatsapp curso lançamento",
@@ -49,8 +78,96 @@ def _extract_urls(text: str) -> Dict[str, List[str]]:
     return {"whatsapp": whatsapp, "landing": landing}
 
 
-def _search_videos(api_key: str, query: str, max_results: int) -> List[Dict]:
-    """Faz uma busca no YouTube e retorna os itens encontrados."""
+class QuotaExceeded(Exception):
+    """A API respondeu que a quota diária da chave acabou."""
+
+
+class QuotaLedger:
+    """
+    Unidades gastas por uma chave no dia (compartilhado entre processos via banco)
+
+    reserve() soma o custo antes da chamada e recusa se passar do orçamento;
+    a chave é guardada só como hash.
+    """
+
+    def __init__(self, api_key: str, daily_quota: int = YOUTUBE_DAILY_QUOTA, reserve: int = YOUTUBE_QUOTA_RESERVE):
+        self.key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        self.daily_quota = daily_quota
+        self.search_budget = max(0, daily_quota - reserve)
+        self.spent_now = 0
+
+    @staticmethod
+    def today() -> str:
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def reserve(self, units: int, budget: Optional[int] = None) -> bool:
+        """Reserva units; False se o dia passaria de budget (padrão: a quota inteira)."""
+        total = youtube_store.reserve_quota_units(
+            self.key_hash, self.today(), units, self.daily_quota if budget is None else budget
+        )
+        if total is None:
+            return False
+        self.spent_now += units
+        return True
+
+    def reserve_search(self) -> bool:
+        return self.reserve(SEARCH_COST, self.search_budget)
+
+    def record(self, units: int) -> None:
+        """Registra um gasto que já aconteceu (sem limite)."""
+        youtube_store.reserve_quota_units(self.key_hash, self.today(), units, None)
+        self.spent_now += units
+
+    def exhaust(self) -> None:
+        """A API recusou por quota: o resto do dia fica bloqueado."""
+        youtube_store.set_quota_units(self.key_hash, self.today(), self.daily_quota)
+
+    def usage(self) -> Dict:
+        used = youtube_store.get_quota_units(self.key_hash, self.today())
+        return {
+            "day": self.today(),
+            "used": used,
+            "daily_quota": self.daily_quota,
+            "search_budget": self.search_budget,
+            "remaining": max(0, self.daily_quota - used),
+            "searches_left": max(0, self.search_budget - used) // SEARCH_COST,
+        }
+
+
+def _api_error(resp) -> Dict:
+    try:
+        return resp.json().get("error", {}) or {}
+    except Exception:
+        return {}
+
+
+def _is_quota_error(error: Dict) -> bool:
+    return any(e.get("reason") in ("quotaExceeded", "dailyLimitExceeded") for e in error.get("errors", []))
+
+
+def _query_key(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _parse_published(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _rfc3339(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _search_videos(
+    api_key: str,
+    query: str,
+    max_results: int,
+    published_after: Optional[str] = None,
+    page_token: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """Faz uma busca no YouTube e retorna (itens encontrados, token da próxima página)."""
     params = {
         "key": api_key,
         "q": query,
@@ -61,23 +178,35 @@ def _search_videos(api_key: str, query: str, max_results: int) -> List[Dict]:
         "relevanceLanguage": "pt",
         "regionCode": "BR",
     }
-    resp = requests.get(SEARCH_URL, params=params, timeout=12)
+    if published_after:
+        params["publishedAfter"] = published_after
+    if page_token:
+        params["pageToken"] = page_token
+    resp = http_client.get(SEARCH_URL, params=params, timeout=12)
 
+    if resp.status_code == 403 and _is_quota_error(_api_error(resp)):
+        raise QuotaExceeded()
     if resp.status_code == 400:
-        error = resp.json().get("error", {})
+        error = _api_error(resp)
         raise RuntimeError(f"Erro na API do YouTube: {error.get('message', 'chave inválida')}")
     resp.raise_for_status()
-    return resp.json().get("items", [])
+    data = resp.json()
+    return data.get("items", []), data.get("nextPageToken")
 
 
-def _get_full_descriptions(api_key: str, video_ids: List[str]) -> Dict[str, str]:
-    """Busca descrições completas dos vídeos (a busca só retorna 100 chars)."""
+def _get_full_descriptions(api_key: str, video_ids: List[str], ledger: Optional[QuotaLedger] = None) -> Dict[str, str]:
+    """
+    Busca descrições completas dos vídeos (a busca só retorna 100 chars).
+    Lotes de 50 ids (1 unidade cada); sem quota, os lotes restantes ficam de fora.
+    """
     descriptions = {}
     for i in range(0, len(video_ids), 50):
         batch = video_ids[i : i + 50]
+        if ledger is not None and not ledger.reserve(VIDEOS_COST):
+            break
         params = {"key": api_key, "id": ",".join(batch), "part": "snippet"}
         try:
-            resp = requests.get(VIDEOS_URL, params=params, timeout=12)
+            resp = http_client.get(VIDEOS_URL, params=params, timeout=12)
             resp.raise_for_status()
             for item in resp.json().get("items", []):
                 descriptions[item["id"]] = item["snippet"].get("description", "")
@@ -87,10 +216,14 @@ def _get_full_descriptions(api_key: str, video_ids: List[str]) -> Dict[str, str]
 
 
 def validate_api_key(api_key: str) -> Dict:
-    """Valida se a chave da YouTube API está funcionando."""
+    """Valida se a chave da YouTube API está funcionando (gasta uma busca da quota)."""
     try:
         params = {"key": api_key, "q": "test", "type": "video", "part": "id", "maxResults": 1}
-        resp = requests.get(SEARCH_URL, params=params, timeout=10)
+        resp = http_client.get(SEARCH_URL, params=params, timeout=10)
+        try:
+            QuotaLedger(api_key).record(SEARCH_COST)
+        except Exception:
+            pass
         data = resp.json()
         if "error" in data:
             return {"valid": False, "message": data["error"].get("message", "Chave inválida")}
@@ -99,36 +232,133 @@ def validate_api_key(api_key: str) -> Dict:
         return {"valid": False, "message": str(e)}
 
 
+def get_quota_usage(api_key: str) -> Dict:
+    """Quota gasta hoje pela chave (dia do Pacífico) e quantas buscas ainda cabem."""
+    return QuotaLedger(api_key).usage()
+
+
+def _has_unseen(items: List[Dict]) -> bool:
+    """Algum vídeo da página ainda fora do índice youtube_videos"""
+    ids = [item["id"].get("videoId") for item in items if item["id"].get("videoId")]
+    return len(youtube_store.get_seen_videos(ids)) < len(ids)
+
+
+def _is_tutorial(title: str, description: str) -> bool:
+    low_title = title.lower()
+    low_desc = description.lower()
+    return any(kw in low_title or kw in low_desc for kw in TUTORIAL_KEYWORDS)
+
+
 def discover_from_youtube(
     api_key: str,
     queries: Optional[List[str]] = None,
     max_results_per_query: int = 10,
     filter_tutorials: bool = True,
     only_with_links: bool = False,
+    stats: Optional[Dict] = None,
+    user_id: Optional[int] = None,
+    incremental: bool = True,
+    quota: Optional[Dict] = None,
 ) -> List[Dict]:
     """
     Busca vídeos de lançamentos no YouTube e extrai links WhatsApp e landing pages.
+    Buscas repetidas dentro de DISCOVERY_QUERY_TTL vêm do cache (cada busca
+    custa 100 unidades da quota diária).
+
+    Args:
+        stats: Opcional; recebe os acertos de cache (discovery_cache.new_run_stats())
+        user_id: Dono das marcas d'água; sem ele a busca não é incremental
+        incremental: Se True, cada busca traz só vídeos publicados depois da
+            última execução do usuário (False ignora as marcas nesta execução).
+            Segue até YOUTUBE_MAX_PAGES páginas para chegar à marca; se não
+            chegar, a marca não avança
+        quota: Opcional; recebe o uso da quota ({used, remaining, ...}), as
+            unidades gastas nesta execução (spent) e as buscas adiadas (deferred_queries)
 
     Returns:
         Lista de dicts com info do vídeo + links extraídos.
     """
     if not queries:
         queries = YT_DEFAULT_QUERIES
+    if stats is None:
+        stats = discovery_cache.new_run_stats()
+    if quota is None:
+        quota = {}
 
+    ledger = QuotaLedger(api_key)
+    keys = {query: _query_key(query) for query in queries}
+    marks: Dict[str, str] = {}
+    if incremental and user_id is not None:
+        marks = youtube_store.get_watermarks(user_id, list(dict.fromkeys(keys.values())))
+    new_marks: Dict[str, str] = {}
+    deferred: List[str] = []
+    quota_exhausted = False
+
+    per_page = min(max_results_per_query, 50)
     seen_ids: set = set()
     results: List[Dict] = []
 
     for query in queries:
+        mark = marks.get(keys[query])
+        mark_at = _parse_published(mark) if mark else None
+        published_after = (
+            _rfc3339(mark_at - timedelta(seconds=YOUTUBE_WATERMARK_OVERLAP)) if mark_at else None
+        )
         try:
-            items = _search_videos(api_key, query, max_results_per_query)
+            # A marca entra na chave: outra janela de tempo, outro resultado
+            cache_query = f"{query} after:{published_after or ''}"
+            items = discovery_cache.get_query_results("youtube", cache_query, max_results_per_query)
+            complete = False
+            if items is not None:
+                stats["queries_cached"] += 1
+            else:
+                if quota_exhausted or not ledger.reserve_search():
+                    # Fica para a próxima execução (a marca não avança)
+                    deferred.append(query)
+                    continue
+                try:
+                    items, page_token = _search_videos(api_key, query, max_results_per_query, published_after)
+                except QuotaExceeded:
+                    ledger.exhaust()
+                    quota_exhausted = True
+                    deferred.append(query)
+                    continue
+                stats["queries_fetched"] += 1
+                # Página cheia (order=date): pode haver vídeos entre ela e a marca
+                complete = len(items) < per_page or not page_token
+                if mark_at is not None:
+                    # Páginas só com vídeos já indexados (lidas numa execução que
+                    # não chegou à marca) não contam no limite; a quota continua valendo
+                    pages = 1 if _has_unseen(items) else 0
+                    while not complete and pages < YOUTUBE_MAX_PAGES and ledger.reserve_search():
+                        try:
+                            page_items, page_token = _search_videos(
+                                api_key, query, max_results_per_query, published_after, page_token
+                            )
+                        except QuotaExceeded:
+                            ledger.exhaust()
+                            quota_exhausted = True
+                            break
+                        items.extend(page_items)
+                        complete = len(page_items) < per_page or not page_token
+                        if _has_unseen(page_items):
+                            pages += 1
+                discovery_cache.set_query_results("youtube", cache_query, max_results_per_query, items)
+
+            newest = mark_at
             for item in items:
                 video_id = item["id"].get("videoId", "")
+                snippet = item["snippet"]
+                published_at = _parse_published(snippet.get("publishedAt", ""))
+                if published_at is not None:
+                    newest = max(newest, published_at) if newest else published_at
                 if not video_id or video_id in seen_ids:
                     continue
                 seen_ids.add(video_id)
 
-                snippet = item["snippet"]
                 results.append({
+                    # Dentro do recuo da marca: pode ter sido processado na execução anterior
+                    "_overlap": bool(mark_at and published_at and published_at <= mark_at),
                     "video_id": video_id,
                     "title": snippet.get("title", ""),
                     "channel": snippet.get("channelTitle", ""),
@@ -140,31 +370,55 @@ def discover_from_youtube(
                     "whatsapp_links": [],
                     "landing_urls": [],
                 })
+            # Com marca, só avança se a busca chegou até ela; sem marca, a primeira
+            # execução começa do vídeo mais novo
+            if newest is not None and newest != mark_at and (mark_at is None or complete):
+                key = keys[query]
+                new_marks[key] = max(new_marks.get(key, ""), _rfc3339(newest))
         except RuntimeError:
             raise
         except Exception:
             continue
 
+    discovery_cache.save()
+
+    filtered_results: List[Dict] = []
     if results:
-        video_ids = [r["video_id"] for r in results]
-        descriptions = _get_full_descriptions(api_key, video_ids)
+        # Só ids fora do índice vão para videos.list
+        known = youtube_store.get_seen_videos(r["video_id"] for r in results)
+        # No recuo da marca, vídeos já indexados foram entregues antes; os que
+        # não estão no índice são os indexados com atraso
+        results = [r for r in results if not (r.pop("_overlap") and r["video_id"] in known)]
+        unseen = [r["video_id"] for r in results if r["video_id"] not in known]
+        descriptions = _get_full_descriptions(api_key, unseen, ledger) if unseen else {}
+        stats["videos_known"] = len(results) - len(unseen)
+        stats["videos_fetched"] = len(descriptions)
 
-        filtered_results = []
+        processed = []
         for r in results:
-            full_desc = descriptions.get(r["video_id"], r["description"])
-            
+            video = known.get(r["video_id"])
+            if video is None:
+                full_desc = descriptions.get(r["video_id"])
+                extracted = _extract_urls(full_desc if full_desc is not None else r["description"])
+                video = {
+                    "video_id": r["video_id"],
+                    "description": (full_desc if full_desc is not None else r["description"])[:400],
+                    "whatsapp_links": extracted["whatsapp"],
+                    "landing_urls": extracted["landing"],
+                    "is_tutorial": _is_tutorial(r["title"], full_desc if full_desc is not None else r["description"]),
+                }
+                # Sem a descrição completa (quota), o vídeo é processado de novo depois
+                if full_desc is not None:
+                    processed.append(video)
+
             # Filtro de Tutoriais (opcional)
-            if filter_tutorials:
-                low_title = r["title"].lower()
-                low_desc = full_desc.lower()
-                if any(kw in low_title or kw in low_desc for kw in ["tutorial", "como fazer", "passo a passo", "aula 1"]):
-                    # Se for tutorial/aula, provavelmente não é um "lançamento" novo
-                    continue
+            if filter_tutorials and video["is_tutorial"]:
+                # Se for tutorial/aula, provavelmente não é um "lançamento" novo
+                continue
 
-            r["description"] = full_desc[:400]
-            extracted = _extract_urls(full_desc)
-            r["whatsapp_links"] = extracted["whatsapp"]
-            r["landing_urls"] = extracted["landing"]
+            r["description"] = video["description"]
+            r["whatsapp_links"] = video["whatsapp_links"]
+            r["landing_urls"] = video["landing_urls"]
 
             # Filtro de Links (opcional)
             if only_with_links:
@@ -172,7 +426,13 @@ def discover_from_youtube(
                     continue
 
             filtered_results.append(r)
-        
-        return filtered_results
 
-    return results
+        youtube_store.save_seen_videos(processed)
+
+    if incremental and user_id is not None:
+        youtube_store.save_watermarks(user_id, new_marks)
+
+    quota.update(ledger.usage())
+    quota["spent"] = ledger.spent_now
+    quota["deferred_queries"] = deferred
+    return filtered_results
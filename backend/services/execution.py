@@ -0,0 +1,179 @@
+"""
+Execution layer for blocking work called from async code
+Route handlers are async, but storage (Supabase/SQLite), password hashing,
+outbound HTTP and file reads are blocking. They run here, in bounded thread
+pools, so the event loop keeps serving other requests. A lag monitor measures
+how late the loop wakes up, which is the number that proves it.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Threads for blocking storage, HTTP and file calls made by request handlers
+IO_WORKERS = int(os.getenv("EXEC_IO_WORKERS", "32"))
+# Discovery/quick-collect requests fetch many pages; they get their own pool
+# so a slow crawl cannot starve logins and dashboard queries
+NETWORK_WORKERS = int(os.getenv("EXEC_NETWORK_WORKERS", "8"))
+# bcrypt is CPU bound (~0.2s per call); more concurrent hashes than cores only
+# adds latency to all of them
+BCRYPT_MAX_CONCURRENCY = int(os.getenv("BCRYPT_MAX_CONCURRENCY", str(max(1, (os.cpu_count() or 2) // 2))))
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+LOOP_LAG_WINDOW = 600
+# Lag above this is counted as a stall
+LOOP_STALL_THRESHOLD = 0.1
+
+_pools: Dict[str, ThreadPoolExecutor] = {
+    "io": ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="blocking-io"),
+    "network": ThreadPoolExecutor(max_workers=NETWORK_WORKERS, thread_name_prefix="blocking-net"),
+}
+_stats_lock = threading.Lock()
+_pool_stats: Dict[str, Dict[str, float]] = {
+    name: {"submitted": 0, "in_flight": 0, "completed": 0, "failed": 0, "busy_seconds": 0.0}
+    for name in _pools
+}
+
+_bcrypt_slots = threading.BoundedSemaphore(BCRYPT_MAX_CONCURRENCY)
+_bcrypt_stats = {"calls": 0, "waiting": 0, "wait_seconds": 0.0}
+
+
+class bcrypt_slot:
+    """
+    Context manager that limits concurrent bcrypt calls process-wide
+
+    Used inside auth.jwt, so every caller is covered (routes, scripts, scheduler).
+    """
+
+    def __enter__(self):
+        started = time.perf_counter()
+        with _stats_lock:
+            _bcrypt_stats["waiting"] += 1
+        _bcrypt_slots.acquire()
+        with _stats_lock:
+            _bcrypt_stats["waiting"] -= 1
+            _bcrypt_stats["calls"] += 1
+            _bcrypt_stats["wait_seconds"] += time.perf_counter() - started
+        return self
+
+    def __exit__(self, *exc):
+        _bcrypt_slots.release()
+        return False
+
+
+def _tracked(pool: str, func: Callable[..., Any]) -> Callable[[], Any]:
+    def call():
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = func()
+            ok = True
+            return result
+        finally:
+            with _stats_lock:
+                stats = _pool_stats[pool]
+                stats["in_flight"] -= 1
+                stats["completed" if ok else "failed"] += 1
+                stats["busy_seconds"] += time.perf_counter() - started
+    return call
+
+
+async def _run(pool: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    with _stats_lock:
+        _pool_stats[pool]["submitted"] += 1
+        _pool_stats[pool]["in_flight"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pools[pool], _tracked(pool, functools.partial(func, *args, **kwargs)))
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking storage/file/crypto call off the event loop"""
+    return await _run("io", func, *args, **kwargs)
+
+
+async def run_network(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a long blocking crawl (discovery, quick collect) off the event loop"""
+    return await _run("network", func, *args, **kwargs)
+
+
+class LoopLagMonitor:
+    """
+    Sleeps for a fixed interval and records how late it wakes up
+
+    Anything that blocks the loop (a sync call in an async handler) shows up
+    as lag, so this is a direct measure of event-loop responsiveness.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval
+        self.samples: deque = deque(maxlen=window)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= LOOP_STALL_THRESHOLD:
+                self.stalls += 1
+
+    def stats(self) -> dict:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"running": self._task is not None, "samples": 0}
+
+        def pct(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": self.interval * 1000,
+            "samples": len(samples),
+            "last_ms": round(self.samples[-1] * 1000, 2),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+            "max_ms": round(self.max_lag * 1000, 2),
+            "stalls_over_100ms": self.stalls,
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
+
+
+def get_execution_stats() -> dict:
+    """Pool usage, bcrypt limiter and event-loop lag"""
+    with _stats_lock:
+        pools = {
+            name: {
+                "max_workers": _pools[name]._max_workers,
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()},
+            }
+            for name, stats in _pool_stats.items()
+        }
+        bcrypt = {
+            "max_concurrency": BCRYPT_MAX_CONCURRENCY,
+            "calls": _bcrypt_stats["calls"],
+            "waiting": _bcrypt_stats["waiting"],
+            "wait_seconds": round(_bcrypt_stats["wait_seconds"], 3),
+        }
+    return {"pools": pools, "bcrypt": bcrypt, "loop_lag": loop_lag_monitor.stats()}
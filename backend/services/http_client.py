@@ -0,0 +1,180 @@
+"""
+Shared HTTP client
+One pooled requests.Session for every outbound call (collectors, discovery,
+notifications), so connections, DNS and TLS sessions are reused across requests
+"""
+
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+# Number of host pools kept alive per adapter and connections per host
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "64"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+
+# Retries apply to idempotent methods only (a retried Telegram POST would
+# send the same alert twice)
+RETRY_TOTAL = int(os.getenv("HTTP_RETRY_TOTAL", "2"))
+RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# HTTP/2 needs the 'h2' package and is experimental in urllib3, so it is opt-in
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "").strip().lower() in ("1", "true", "yes")
+
+# Hosts that receive many parallel requests get a bigger pool than the default
+HOST_POOL_SIZES: Dict[str, int] = {
+    "chat.whatsapp.com": 16,
+    "api.telegram.org": 8,
+    "www.googleapis.com": 8,
+    "graph.facebook.com": 8,
+}
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_requests_by_host: Dict[str, int] = defaultdict(int)
+_errors_by_host: Dict[str, int] = defaultdict(int)
+_http2_active = False
+
+
+def _build_retry() -> Retry:
+    return Retry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=RETRY_TOTAL,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+        respect_retry_after_header=True,
+        # Return the last response instead of raising, callers decide what to do
+        raise_on_status=False,
+    )
+
+
+def _build_adapter(pool_maxsize: int) -> HTTPAdapter:
+    return HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize,
+        max_retries=_build_retry(),
+    )
+
+
+def _enable_http2() -> bool:
+    try:
+        import urllib3.http2
+        urllib3.http2.inject_into_urllib3()
+        return True
+    except Exception as e:
+        print(f"⚠️ [HTTP] HTTP/2 indisponível, usando HTTP/1.1: {e}")
+        return False
+
+
+def _build_session() -> requests.Session:
+    global _http2_active
+    if HTTP2_ENABLED and not _http2_active:
+        _http2_active = _enable_http2()
+
+    session = requests.Session()
+    # Advertises br/zstd only when the decoders are installed
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+    default_adapter = _build_adapter(POOL_MAXSIZE)
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+    for host, size in HOST_POOL_SIZES.items():
+        session.mount(f"https://{host}/", _build_adapter(size))
+    return session
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session
+
+    Accepts the same keyword arguments as requests.request.
+    """
+    host = urlparse(url).netloc.lower()
+    with _stats_lock:
+        _requests_by_host[host] += 1
+    try:
+        return get_session().request(method, url, **kwargs)
+    except Exception:
+        with _stats_lock:
+            _errors_by_host[host] += 1
+        raise
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def get_pool_stats() -> dict:
+    """
+    Snapshot of the connection pools and request counters
+
+    Returns:
+        Dict with config, per-host pool usage and per-host request/error counts
+    """
+    pools = []
+    session = _session
+    if session is not None:
+        seen = set()
+        for prefix, adapter in session.adapters.items():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            manager = getattr(adapter, "poolmanager", None)
+            if manager is None:
+                continue
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+                pools.append({
+                    "adapter": prefix,
+                    "host": pool.host,
+                    "scheme": pool.scheme,
+                    "maxsize": adapter._pool_maxsize,
+                    "connections_opened": pool.num_connections,
+                    "requests_sent": pool.num_requests,
+                    "idle_connections": idle,
+                })
+
+    with _stats_lock:
+        requests_by_host = dict(_requests_by_host)
+        errors_by_host = dict(_errors_by_host)
+
+    return {
+        "http2": _http2_active,
+        "accept_encoding": ACCEPT_ENCODING,
+        "pool_connections": POOL_CONNECTIONS,
+        "pool_maxsize": POOL_MAXSIZE,
+        "host_pool_sizes": HOST_POOL_SIZES,
+        "retry_total": RETRY_TOTAL,
+        "retry_backoff": RETRY_BACKOFF,
+        "pools": pools,
+        "requests_by_host": requests_by_host,
+        "errors_by_host": errors_by_host,
+    }
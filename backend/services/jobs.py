@@ -0,0 +1,471 @@
+"""
+Background job runner for collection work
+Scrapes (manual and scheduled) and quick collects are submitted as jobs instead
+of running inside the HTTP request, so a run outlives the proxy timeout. Jobs
+are persisted (db/jobs.py), run on a dedicated event-loop thread, emit one
+progress event per page, can be cancelled and can carry a deadline.
+
+Lanes are priorities: interactive quick collects run ahead of manual scrapes,
+which run ahead of scheduled bulk runs. A reserved worker only takes
+interactive jobs, so a quick collect never waits behind a long bulk run.
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from backend.db import jobs as job_store
+from backend.services.execution import run_blocking
+
+LANES = {"interactive": 0, "manual": 1, "scheduled": 2}
+
+# Workers shared by all lanes (highest priority first)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Extra workers that only run interactive jobs
+JOB_INTERACTIVE_WORKERS = int(os.getenv("JOB_INTERACTIVE_WORKERS", "1"))
+# Events, progress and the heartbeat of running jobs are written in batches
+JOB_SYNC_INTERVAL = float(os.getenv("JOB_SYNC_INTERVAL", "1.0"))
+# How often queued jobs in storage (other processes, restarts) are picked up
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "15"))
+# A running job without a heartbeat for this long belonged to a dead process
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))
+# Unchanged progress is still written this often, as the heartbeat
+JOB_HEARTBEAT_INTERVAL = JOB_STALE_AFTER / 4
+# How often a running job reads its cancel flag from storage (cancels from other processes)
+JOB_CANCEL_CHECK_INTERVAL = float(os.getenv("JOB_CANCEL_CHECK_INTERVAL", "5"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _log(message: str) -> None:
+    try:
+        try:
+            from backend.main import write_log
+        except ImportError:
+            from main import write_log
+        write_log(message)
+    except Exception:
+        pass
+
+
+def _deadline_of(job: dict) -> Optional[datetime]:
+    value = (job.get("payload") or {}).get("deadline_at")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class JobCancelled(Exception):
+    """Raised by a handler that stops early because the job was cancelled"""
+
+
+class _LiveJob:
+    """State of a job running in this process"""
+
+    def __init__(self, job: dict, last_seq: int):
+        self.job = job
+        self.id = job["id"]
+        self.seq = last_seq
+        # Events up to last_seq (queued, earlier attempts) are only in storage
+        self.stored_seq = last_seq
+        self.events: List[dict] = []
+        self.pending: List[dict] = []
+        self.progress_done = 0
+        self.progress_total = 0
+        self.cancel_requested = bool(job.get("cancel_requested"))
+        self.deadline = _deadline_of(job)
+        self.timed_out = False
+        self.sync_lock = asyncio.Lock()
+        # What _sync last wrote / read, so unchanged progress is not rewritten every second
+        self.synced_progress = (0, 0)
+        self.synced_at = time.monotonic()
+        self.cancel_checked_at = time.monotonic()
+
+
+class JobContext:
+    """What a handler gets: the job payload, progress reporting and the cancel flag"""
+
+    def __init__(self, manager: "JobManager", live: _LiveJob):
+        self._manager = manager
+        self._live = live
+
+    @property
+    def job_id(self) -> int:
+        return self._live.id
+
+    @property
+    def user_id(self) -> Optional[int]:
+        return self._live.job.get("user_id")
+
+    @property
+    def payload(self) -> dict:
+        return self._live.job.get("payload") or {}
+
+    def cancelled(self) -> bool:
+        """True once the job was cancelled or ran past its deadline; handlers stop early"""
+        live = self._live
+        if not live.timed_out and live.deadline is not None and datetime.now(timezone.utc) >= live.deadline:
+            live.timed_out = True
+        return live.cancel_requested or live.timed_out
+
+    def set_total(self, total: int) -> None:
+        self._live.progress_total = total
+        self.emit("progress", progress_done=self._live.progress_done, progress_total=total)
+
+    def emit(self, event_type: str, **data) -> None:
+        self._manager._emit(self._live, event_type, **data)
+
+    def page_done(self, **data) -> None:
+        """Count one finished page and emit its result"""
+        self._live.progress_done += 1
+        self.emit(
+            "page",
+            progress_done=self._live.progress_done,
+            progress_total=self._live.progress_total,
+            **data,
+        )
+
+
+Handler = Callable[[JobContext], Awaitable[Optional[dict]]]
+
+
+class JobManager:
+    """
+    Persistent priority queue of jobs with a pool of async workers
+
+    submit() and cancel() are blocking (they write to storage) and thread-safe;
+    call them through run_blocking from async code.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, interactive_workers: int = JOB_INTERACTIVE_WORKERS):
+        self.workers = max(1, workers)
+        self.interactive_workers = max(0, interactive_workers)
+        self._handlers: Dict[str, Handler] = {}
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._interactive_queue: Optional[asyncio.PriorityQueue] = None
+        self._order = itertools.count()
+        # job_id -> lane of jobs waiting in the local queues
+        self._queued: Dict[int, str] = {}
+        self._live: Dict[int, _LiveJob] = {}
+        self._stats = {
+            lane: {
+                "submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "timed_out": 0,
+                "wait_seconds": 0.0, "run_seconds": 0.0,
+            }
+            for lane in LANES
+        }
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """Register the coroutine that runs jobs of this kind"""
+        self._handlers[kind] = handler
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the runner thread (idempotent); queued jobs in storage are picked up"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,), name="job-runner", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._interactive_queue = asyncio.PriorityQueue()
+        for _ in range(self.workers):
+            loop.create_task(self._worker(self._queue))
+        for _ in range(self.interactive_workers):
+            loop.create_task(self._worker(self._interactive_queue))
+        loop.create_task(self._sync_loop())
+        loop.create_task(self._poll_loop())
+        ready.set()
+        loop.run_forever()
+
+    # ── submit / cancel / status ─────────────────────────────────────────────
+
+    def submit(
+        self,
+        kind: str,
+        payload: Optional[dict] = None,
+        lane: str = "manual",
+        user_id: Optional[int] = None,
+        dedupe: bool = False,
+        deadline_at: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Persist a job and queue it
+
+        With dedupe=True an active job of the same kind, user and lane is
+        returned instead of creating a second one. A job still queued at
+        deadline_at never starts; a running one stops before its next page.
+        Both end as 'timed_out'.
+        """
+        if lane not in LANES:
+            raise ValueError(f"unknown lane: {lane}")
+        if dedupe:
+            existing = job_store.find_active_job(kind, user_id, lane)
+            if existing is not None:
+                return self.snapshot(existing)
+
+        payload = dict(payload or {})
+        if deadline_at is not None:
+            payload["deadline_at"] = deadline_at.astimezone(timezone.utc).isoformat()
+        job = job_store.create_job(kind, lane, payload, user_id=user_id)
+        job_store.append_job_events(job["id"], [
+            {"seq": 1, "type": "queued", "data": {"kind": kind, "lane": lane}, "created_at": job["created_at"]},
+        ])
+        with self._lock:
+            self._stats[lane]["submitted"] += 1
+        self.start()
+        self._loop.call_soon_threadsafe(self._enqueue, job["id"], lane)
+        return job
+
+    def cancel(self, job_id: int) -> Optional[dict]:
+        """Cancel a queued job now, or stop a running one before its next page"""
+        job = job_store.request_job_cancel(job_id)
+        with self._lock:
+            live = self._live.get(job_id)
+            if live is not None:
+                live.cancel_requested = True
+        return self.snapshot(job) if job else None
+
+    def get_job(self, job_id: int) -> Optional[dict]:
+        job = job_store.get_job(job_id)
+        return self.snapshot(job) if job else None
+
+    def snapshot(self, job: dict) -> dict:
+        """Stored job with the live progress of this process on top"""
+        with self._lock:
+            live = self._live.get(job["id"])
+            if live is not None and job["status"] == "running":
+                job = {
+                    **job,
+                    "progress_done": live.progress_done,
+                    "progress_total": live.progress_total,
+                    "cancel_requested": job["cancel_requested"] or live.cancel_requested,
+                }
+        return job
+
+    def live_events(self, job_id: int, after_seq: int = 0) -> Optional[List[dict]]:
+        """
+        Events of a job running in this process, from memory
+
+        None when the job is not running here or the caller still needs older
+        events from storage.
+        """
+        with self._lock:
+            live = self._live.get(job_id)
+            if live is None or after_seq < live.stored_seq:
+                return None
+            return [e for e in live.events if e["seq"] > after_seq]
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = {lane: 0 for lane in LANES}
+            for lane in self._queued.values():
+                queued[lane] += 1
+            lanes = {}
+            for lane, stats in self._stats.items():
+                finished = stats["succeeded"] + stats["failed"] + stats["cancelled"] + stats["timed_out"]
+                lanes[lane] = {
+                    "queued": queued[lane],
+                    **{k: v for k, v in stats.items() if not isinstance(v, float)},
+                    "avg_wait_seconds": round(stats["wait_seconds"] / finished, 3) if finished else None,
+                    "avg_run_seconds": round(stats["run_seconds"] / finished, 3) if finished else None,
+                }
+            return {
+                "running": self._thread is not None,
+                "workers": self.workers,
+                "interactive_workers": self.interactive_workers,
+                "active_jobs": sorted(self._live),
+                "lanes": lanes,
+            }
+
+    # ── runner internals (job-runner thread) ─────────────────────────────────
+
+    def _enqueue(self, job_id: int, lane: str) -> None:
+        if job_id in self._queued or job_id in self._live:
+            return
+        with self._lock:
+            self._queued[job_id] = lane
+        item = (LANES[lane], next(self._order), job_id)
+        self._queue.put_nowait(item)
+        if lane == "interactive" and self.interactive_workers:
+            self._interactive_queue.put_nowait(item)
+
+    async def _worker(self, queue: asyncio.PriorityQueue) -> None:
+        while True:
+            _, _, job_id = await queue.get()
+            with self._lock:
+                lane = self._queued.pop(job_id, None)
+            if lane is None:
+                # Already taken from the other queue
+                continue
+            try:
+                await self._execute(job_id)
+            except Exception as e:
+                _log(f"🚨 [Jobs] Erro interno no job #{job_id}: {e}")
+
+    def _emit(self, live: _LiveJob, event_type: str, **data) -> None:
+        with self._lock:
+            live.seq += 1
+            event = {"seq": live.seq, "type": event_type, "data": data, "created_at": _now_iso()}
+            live.events.append(event)
+            live.pending.append(event)
+
+    async def _execute(self, job_id: int) -> None:
+        job = await run_blocking(job_store.get_job, job_id)
+        if job is None or job["status"] != "queued":
+            return
+        if job["attempts"] >= JOB_MAX_ATTEMPTS:
+            await run_blocking(
+                job_store.update_job, job_id, status="failed", finished_at=_now_iso(),
+                error=f"Interrompido {job['attempts']} vez(es) antes de terminar",
+            )
+            return
+        deadline = _deadline_of(job)
+        if deadline is not None and datetime.now(timezone.utc) >= deadline:
+            await run_blocking(
+                job_store.update_job, job_id, status="timed_out", finished_at=_now_iso(),
+                error="Prazo esgotado antes de começar",
+            )
+            with self._lock:
+                self._stats[job["lane"]]["timed_out"] += 1
+            return
+        # Another process may have claimed it first
+        if not await run_blocking(job_store.claim_job, job_id, job["attempts"] + 1):
+            return
+
+        live = _LiveJob(job, await run_blocking(job_store.get_last_job_event_seq, job_id))
+        with self._lock:
+            self._live[job_id] = live
+        lane = job["lane"]
+        try:
+            created = datetime.fromisoformat(str(job["created_at"]).replace("Z", "+00:00"))
+            wait_seconds = max(0.0, (datetime.now(timezone.utc) - created).total_seconds())
+        except ValueError:
+            wait_seconds = 0.0
+        started = time.monotonic()
+        self._emit(live, "started", attempt=job["attempts"] + 1)
+        _log(f"🧵 [Jobs] Job #{job_id} ({job['kind']}/{lane}) iniciado")
+
+        result, error = None, None
+        try:
+            handler = self._handlers.get(job["kind"])
+            if handler is None:
+                raise ValueError(f"Tipo de job desconhecido: {job['kind']}")
+            result = await handler(JobContext(self, live))
+            if live.cancel_requested:
+                status = "cancelled"
+            elif live.timed_out:
+                status, error = "timed_out", "Prazo esgotado; páginas restantes não foram visitadas"
+            else:
+                status = "succeeded"
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", str(e)
+
+        run_seconds = time.monotonic() - started
+        self._emit(
+            live, "done", status=status, error=error,
+            progress_done=live.progress_done, progress_total=live.progress_total,
+        )
+        try:
+            try:
+                await self._sync(live, check_cancel=False)
+            except Exception as e:
+                _log(f"⚠️ [Jobs] Falha ao gravar eventos do job #{job_id}: {e}")
+            await run_blocking(
+                job_store.update_job, job_id, status=status, result=result, error=error,
+                progress_done=live.progress_done, progress_total=live.progress_total,
+                finished_at=_now_iso(),
+            )
+        finally:
+            with self._lock:
+                self._live.pop(job_id, None)
+                stats = self._stats[lane]
+                stats[status] += 1
+                stats["wait_seconds"] += wait_seconds
+                stats["run_seconds"] += run_seconds
+        _log(f"🧵 [Jobs] Job #{job_id} ({job['kind']}/{lane}) terminou: {status} em {run_seconds:.1f}s")
+
+    async def _sync(self, live: _LiveJob, check_cancel: bool = True) -> None:
+        """
+        Write pending events, and progress when it changed (or the heartbeat is
+        due); every JOB_CANCEL_CHECK_INTERVAL pick up cancels from other processes
+        """
+        async with live.sync_lock:
+            with self._lock:
+                pending, live.pending = live.pending, []
+            if pending:
+                try:
+                    await run_blocking(job_store.append_job_events, live.id, pending)
+                except Exception:
+                    with self._lock:
+                        live.pending = pending + live.pending
+                    raise
+            now = time.monotonic()
+            progress = (live.progress_done, live.progress_total)
+            if progress != live.synced_progress or now - live.synced_at >= JOB_HEARTBEAT_INTERVAL:
+                await run_blocking(
+                    job_store.update_job, live.id,
+                    progress_done=progress[0], progress_total=progress[1],
+                )
+                live.synced_progress, live.synced_at = progress, now
+            if check_cancel and not live.cancel_requested and now - live.cancel_checked_at >= JOB_CANCEL_CHECK_INTERVAL:
+                live.cancel_checked_at = now
+                stored = await run_blocking(job_store.get_job, live.id)
+                if stored and stored["cancel_requested"]:
+                    live.cancel_requested = True
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_SYNC_INTERVAL)
+            with self._lock:
+                live_jobs = list(self._live.values())
+            for live in live_jobs:
+                try:
+                    await self._sync(live)
+                except Exception as e:
+                    _log(f"⚠️ [Jobs] Falha ao gravar progresso do job #{live.id}: {e}")
+
+    async def _poll_loop(self) -> None:
+        """Requeue jobs orphaned by a dead process and pick up queued jobs from storage"""
+        while True:
+            try:
+                stale_before = datetime.now(timezone.utc) - timedelta(seconds=JOB_STALE_AFTER)
+                requeued = await run_blocking(job_store.requeue_stale_jobs, stale_before.isoformat())
+                if requeued:
+                    _log(f"♻️ [Jobs] {requeued} job(s) interrompido(s) voltaram para a fila")
+                for job in await run_blocking(job_store.list_queued_jobs):
+                    self._enqueue(job["id"], job["lane"] if job["lane"] in LANES else "scheduled")
+            except Exception as e:
+                _log(f"⚠️ [Jobs] Falha ao ler a fila: {e}")
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+job_manager = JobManager()
+
+
+def get_job_stats() -> dict:
+    return job_manager.stats()
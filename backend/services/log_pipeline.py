@@ -0,0 +1,213 @@
+"""
+Application log pipeline
+write() only queues the line; a background thread appends queued lines in
+batches and rotates the file by size. Readers never load the whole file:
+tail_lines() seeks backwards from the end and follow() reads only the bytes
+appended since the last call.
+
+All workers append to the same file, so appends and rotation happen under an
+advisory file lock (when the platform has fcntl), and readers detect rotation
+by the file's inode.
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+# Rotate once the file passes this size; keep this many old files (.1, .2, ...)
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "3"))
+# How long a line may wait in memory before it is written
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+# Lines beyond this many waiting are dropped (and counted) instead of blocking
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_READ_BLOCK = 8192
+
+# (inode, offset) of the next byte to read in follow()
+FollowPosition = Tuple[int, int]
+
+
+class LogWriter:
+    """Buffered, size-rotated appends to one log file"""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        queue_size: int = LOG_QUEUE_SIZE,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats = {"written": 0, "batches": 0, "dropped": 0, "rotations": 0, "errors": 0}
+
+    def write(self, line: str) -> None:
+        """Queue one line (without the trailing newline); never blocks"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self._stats["dropped"] += 1
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until every queued line is on disk (or timeout)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Collect whatever else arrives within the flush interval
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._append("".join(f"{line}\n" for line in batch))
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+            except Exception:
+                self._stats["errors"] += 1
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _append(self, text: str) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(text)
+                    size = f.tell()
+                if self.max_bytes > 0 and size >= self.max_bytes:
+                    self._rotate()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _rotate(self) -> None:
+        # Same scheme as logging.handlers.RotatingFileHandler: logs.txt -> .1 -> .2 ...
+        if self.backup_count <= 0:
+            open(self.path, "w").close()
+        else:
+            for n in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{n}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{n + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._stats["rotations"] += 1
+
+    def stats(self) -> dict:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        return {
+            **self._stats,
+            "queued": self._queue.qsize(),
+            "file_bytes": size,
+            "max_bytes": self.max_bytes,
+            "backup_count": self.backup_count,
+        }
+
+
+def snapshot(path: str, count: int) -> Tuple[List[str], Optional[FollowPosition]]:
+    """
+    Last count complete lines, reading backwards from the end, and the
+    follow() position right after them (one read: nothing lost or repeated)
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return [], None
+    with f:
+        stat = os.fstat(f.fileno())
+        position = stat.st_size
+        data = b""
+        # count + 1 newlines guarantee count complete lines
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(_READ_BLOCK, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+        data = data[: stat.st_size - position]
+    # A partial last line (still being written) is left for follow()
+    end = data.rfind(b"\n") + 1
+    lines = data[:end].decode("utf-8", errors="replace").splitlines() if count > 0 else []
+    return [line.strip() for line in lines[-count:]] if lines else [], (stat.st_ino, position + end)
+
+
+def tail_lines(path: str, count: int) -> List[str]:
+    """Last count lines of the file, reading backwards from the end"""
+    return snapshot(path, count)[0]
+
+
+def _read_complete_lines(f, offset: int) -> Tuple[List[str], int]:
+    f.seek(offset)
+    data = f.read()
+    end = data.rfind(b"\n") + 1
+    lines = data[:end].decode("utf-8", errors="replace").splitlines()
+    return [line.strip() for line in lines], offset + end
+
+
+def follow(path: str, position: Optional[FollowPosition]) -> Tuple[List[str], Optional[FollowPosition]]:
+    """
+    Complete lines appended since position, and the position to resume from
+
+    position None (the file did not exist yet) reads from the beginning.
+    After a rotation the rest of the rotated file (.1) is read first, then
+    the new file from its beginning.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return [], position
+    with f:
+        stat = os.fstat(f.fileno())
+        inode, offset = position or (stat.st_ino, 0)
+        lines: List[str] = []
+        if inode != stat.st_ino:
+            try:
+                with open(f"{path}.1", "rb") as rotated:
+                    if os.fstat(rotated.fileno()).st_ino == inode:
+                        lines, _ = _read_complete_lines(rotated, offset)
+            except FileNotFoundError:
+                pass
+            offset = 0
+        elif stat.st_size < offset:
+            # Truncated in place (no backups kept)
+            offset = 0
+        new_lines, offset = _read_complete_lines(f, offset)
+    return lines + new_lines, (stat.st_ino, offset)
@@ -0,0 +1,215 @@
+"""
+Background notification dispatcher
+Messages are queued per chat and delivered by one background thread, so
+collectors never wait on a notification API. Each chat has a token bucket
+(plus one global bucket for the bot), a rate-limit answer pauses the chat for
+the time the API asked for, and other failures are retried with exponential
+backoff. Messages of the same chat are always delivered in order.
+
+Buckets are per process: with several workers the API's retry_after keeps
+the combined rate in check.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+
+class RetryAfter(Exception):
+    """The API rate-limited the chat; retry after the given seconds"""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"retry after {seconds}s")
+        self.seconds = max(0.0, float(seconds))
+
+
+class PermanentFailure(Exception):
+    """The API rejected the message; retrying would not help"""
+
+
+class TokenBucket:
+    """rate tokens per second, up to burst tokens saved up"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = max(rate, 1e-6)
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if one is available now)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+# Delivers one message; raises RetryAfter, PermanentFailure or any other error
+SendFunc = Callable[[str, str], None]
+
+
+class NotificationDispatcher:
+    """Per-chat queues drained by a background thread within the rate limits"""
+
+    def __init__(
+        self,
+        send: SendFunc,
+        chat_rate: float,
+        chat_burst: float,
+        global_rate: float,
+        max_attempts: int = 5,
+        max_backoff: float = 60.0,
+        max_pending: int = 1000,
+        name: str = "notifications",
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self._send = send
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max(1, max_attempts)
+        self.max_backoff = max_backoff
+        self.max_pending = max_pending
+        self.name = name
+        self._log = log or print
+        self._global = TokenBucket(global_rate, global_rate)
+        self._queues: Dict[str, Deque[dict]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._stats = {
+            "queued": 0, "sent": 0, "failed": 0, "dropped": 0, "retried": 0, "rate_limited": 0,
+            "wait_seconds": 0.0,
+        }
+
+    def submit(self, chat_id: str, text: str) -> bool:
+        """Queue a message; False when the queue is full or the dispatcher is stopping"""
+        with self._cond:
+            if self._stopping or self._pending >= self.max_pending:
+                self._stats["dropped"] += 1
+                return False
+            if chat_id not in self._queues:
+                self._queues[chat_id] = deque()
+                self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            now = time.monotonic()
+            self._queues[chat_id].append({"text": text, "attempts": 0, "not_before": 0.0, "queued_at": now})
+            self._pending += 1
+            self._stats["queued"] += 1
+            self._cond.notify()
+            self._ensure_started()
+        return True
+
+    def _ensure_started(self) -> None:
+        # Called with the condition held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop accepting messages and give the queued ones up to timeout seconds to go out"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _next_ready(self, now: float) -> Tuple[Optional[str], Optional[float]]:
+        """Chat whose head message can go first, and how long until it can"""
+        best_chat, best_wait = None, None
+        for chat_id, queue in self._queues.items():
+            if not queue:
+                continue
+            wait = max(
+                self._paused_until.get(chat_id, 0.0) - now,
+                queue[0]["not_before"] - now,
+                self._buckets[chat_id].wait_time(now),
+                0.0,
+            )
+            if best_wait is None or wait < best_wait:
+                best_chat, best_wait = chat_id, wait
+        if best_chat is not None:
+            best_wait = max(best_wait, self._global.wait_time(now))
+        return best_chat, best_wait
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping and self._pending == 0:
+                        return
+                    now = time.monotonic()
+                    chat_id, wait = self._next_ready(now)
+                    if chat_id is not None and wait <= 0:
+                        message = self._queues[chat_id].popleft()
+                        self._pending -= 1
+                        self._buckets[chat_id].take(now)
+                        self._global.take(now)
+                        break
+                    self._cond.wait(timeout=wait)
+            self._deliver(chat_id, message)
+
+    def _requeue(self, chat_id: str, message: dict) -> None:
+        # Back at the head of its chat so later messages do not overtake it
+        with self._cond:
+            self._queues[chat_id].appendleft(message)
+            self._pending += 1
+            self._cond.notify()
+
+    def _deliver(self, chat_id: str, message: dict) -> None:
+        started = time.monotonic()
+        try:
+            self._send(chat_id, message["text"])
+        except RetryAfter as e:
+            with self._cond:
+                self._paused_until[chat_id] = time.monotonic() + e.seconds
+                self._stats["rate_limited"] += 1
+            self._log(f"⏳ [{self.name}] Limite atingido no chat {chat_id}; aguardando {e.seconds:.0f}s")
+            self._requeue(chat_id, message)
+            return
+        except PermanentFailure as e:
+            with self._cond:
+                self._stats["failed"] += 1
+            self._log(f"🚨 [{self.name}] Mensagem recusada: {e}")
+            return
+        except Exception as e:
+            message["attempts"] += 1
+            if message["attempts"] >= self.max_attempts:
+                with self._cond:
+                    self._stats["failed"] += 1
+                self._log(f"🚨 [{self.name}] Falha ao enviar após {message['attempts']} tentativas: {e}")
+                return
+            message["not_before"] = time.monotonic() + min(self.max_backoff, 2 ** message["attempts"])
+            with self._cond:
+                self._stats["retried"] += 1
+            self._requeue(chat_id, message)
+            return
+        with self._cond:
+            self._stats["sent"] += 1
+            self._stats["wait_seconds"] += started - message["queued_at"]
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            stats = dict(self._stats)
+            total_wait = stats.pop("wait_seconds")
+            return {
+                **stats,
+                "pending": self._pending,
+                "avg_wait_seconds": round(total_wait / stats["sent"], 3) if stats["sent"] else 0.0,
+                "paused_chats": {
+                    chat_id: round(until - now, 1)
+                    for chat_id, until in self._paused_until.items() if until > now
+                },
+                "limits": {"chat_rate": self.chat_rate, "chat_burst": self.chat_burst, "global_rate": self._global.rate},
+                "running": self._thread is not None and self._thread.is_alive(),
+            }
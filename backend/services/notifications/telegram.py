@@ -1,67 +1,200 @@
 """
 Telegram notification service
-Sends formatted notifications to Telegram when new links are found
+Sends formatted notifications to Telegram when new links are found.
+Messages go through a background dispatcher (see dispatcher.py): callers
+only queue them and never wait on the Bot API.
 """
 
-import requests
 from datetime import datetime
 import os
-from typing import Optional
+from typing import List
+
+from backend.services import http_client
+from backend.services.notifications.dispatcher import NotificationDispatcher, RetryAfter, PermanentFailure
 
 # Note: These should be loaded from environment variables or config
 # Keeping original structure for compatibility
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 
-def send_message(link: str, source: str = "unknown", link_type: str = "group", is_relaunch: bool = False) -> bool:
-    """
-    Send formatted notification to Telegram with specialized alerts.
-    """
+# Bot API limits: about 20 messages per minute in a group, 30 per second overall
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", str(20 / 60)))
+TELEGRAM_CHAT_BURST = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+TELEGRAM_MAX_ATTEMPTS = int(os.getenv("TELEGRAM_MAX_ATTEMPTS", "5"))
+TELEGRAM_MAX_PENDING = int(os.getenv("TELEGRAM_MAX_PENDING", "1000"))
+# One digest message per page instead of one message per new link
+TELEGRAM_DIGEST = os.getenv("TELEGRAM_DIGEST", "true").lower() in ("1", "true", "yes")
+
+# Bot API limit for a message text
+MAX_MESSAGE_LENGTH = 4096
+FOOTER = "Monitoramento LinkPulse IA ✔️"
+
+
+def _credentials():
     token = TELEGRAM_BOT_TOKEN or os.getenv("TELEGRAM_BOT_TOKEN", "")
     chat_id = TELEGRAM_CHAT_ID or os.getenv("TELEGRAM_CHAT_ID", "")
-    
-    if not token or not chat_id:
-        print("Telegram não configurado — pulando envio.")
-        return False
+    return token, chat_id
+
+
+def _post(chat_id: str, text: str) -> None:
+    """Deliver one message (runs on the dispatcher thread)"""
+    token, _ = _credentials()
+    url = f"https://api.telegram.org/bot{token}/sendMessage"
+    payload = {
+        "chat_id": chat_id,
+        "text": text,
+        "parse_mode": "Markdown",
+        "disable_web_page_preview": True,
+    }
+    response = http_client.post(url, json=payload, timeout=10)
+    if response.status_code == 400 and "parse" in response.text.lower():
+        # A campaign or group name broke the Markdown: send it as plain text
+        payload.pop("parse_mode")
+        response = http_client.post(url, json=payload, timeout=10)
+
+    if response.status_code == 429:
+        try:
+            retry_after = response.json().get("parameters", {}).get("retry_after")
+        except ValueError:
+            retry_after = None
+        raise RetryAfter(retry_after or response.headers.get("Retry-After") or 5)
+    if 400 <= response.status_code < 500:
+        raise PermanentFailure(f"{response.status_code} {response.text[:200]}")
+    response.raise_for_status()
+
+
+def _log(message: str) -> None:
+    try:
+        try:
+            from backend.main import write_log
+        except ImportError:
+            from main import write_log
+        write_log(message)
+    except Exception:
+        print(message)
 
+
+dispatcher = NotificationDispatcher(
+    _post,
+    chat_rate=TELEGRAM_CHAT_RATE,
+    chat_burst=TELEGRAM_CHAT_BURST,
+    global_rate=TELEGRAM_GLOBAL_RATE,
+    max_attempts=TELEGRAM_MAX_ATTEMPTS,
+    max_pending=TELEGRAM_MAX_PENDING,
+    name="Telegram",
+    log=_log,
+)
+
+
+def format_link_message(link: str, source: str = "unknown", link_type: str = "group", is_relaunch: bool = False) -> str:
+    """Alert for a single link"""
     timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
 
     # Ícones e Avisos
     header = "🚀 *Novo grupo encontrado!*"
     warning = ""
-    
+
     if is_relaunch:
         header = "🔄 *RELANÇAMENTO DETECTADO!*"
         warning += "\n⚠️ _Esta página já teve grupos antes. Um novo lançamento pode estar em andamento!_\n"
-        
+
     if link_type == 'community':
         header = "📢 *COMUNIDADE DETECTADA!*"
         warning += "\n🚩 *AVISO:* Este link é de uma Comunidade WhatsApp, não de um grupo comum.\n"
 
-    msg = (
+    return (
         f"{header}\n\n"
         f"📌 *Campanha:* `{source}`\n"
         f"🔗 *Link:* {link}\n"
         f"📅 *Encontrado:* {timestamp}\n"
         f"{warning}\n"
-        "Monitoramento LinkPulse IA ✔️"
+        f"{FOOTER}"
     )
 
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    
-    payload = {
-        "chat_id": chat_id,
-        "text": msg,
-        "parse_mode": "Markdown"
-    }
 
-    try:
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-        print(f"Mensagem enviada: {link}")
-        return True
-    except Exception as e:
-        print("Erro ao enviar para Telegram:", e)
+def format_digest(source: str, links: List[dict]) -> List[str]:
+    """
+    One alert with every new link of a page (same layout as
+    link_monitor_grupos_novos.py), split in parts when it exceeds the
+    Bot API message length
+
+    Args:
+        source: Page or campaign name
+        links: Dicts with url and optionally name, link_type, is_relaunch
+    """
+    timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    header = ["🆕 *GRUPO(S) NOVO(S) ENCONTRADO(S)!*\n", f"🎯 *{source}*", f"🕐 {timestamp}\n"]
+    if any(link.get("is_relaunch") for link in links):
+        header.append("🔄 _Esta página já teve grupos antes. Um novo lançamento pode estar em andamento!_\n")
+    footer = [f"\n📊 Total: {len(links)} grupo(s) novo(s)", f"📍 Fonte: {source}", FOOTER]
+
+    items = []
+    for i, link in enumerate(links, 1):
+        kind = "📢 Comunidade" if link.get("link_type") == "community" else "Link"
+        name = link.get("name") or "Grupo"
+        items.append(f"{i}. 🗣️ *{name}*\n   🔗 {kind}: {link['url']}\n")
+
+    budget = MAX_MESSAGE_LENGTH - len("\n".join(header + footer)) - 32
+    parts: List[List[str]] = [[]]
+    size = 0
+    for item in items:
+        if parts[-1] and size + len(item) + 1 > budget:
+            parts.append([])
+            size = 0
+        parts[-1].append(item)
+        size += len(item) + 1
+
+    messages = []
+    for n, part in enumerate(parts, 1):
+        lines = list(header)
+        if len(parts) > 1:
+            lines[1] = f"🎯 *{source}* ({n}/{len(parts)})"
+        messages.append("\n".join(lines + part + footer))
+    return messages
+
+
+def send_message(link: str, source: str = "unknown", link_type: str = "group", is_relaunch: bool = False) -> bool:
+    """
+    Queue a formatted notification with specialized alerts.
+    Returns False when Telegram is not configured or the queue is full.
+    """
+    token, chat_id = _credentials()
+    if not token or not chat_id:
+        print("Telegram não configurado — pulando envio.")
         return False
+    return dispatcher.submit(chat_id, format_link_message(link, source, link_type, is_relaunch))
+
+
+def send_links(source: str, links: List[dict]) -> int:
+    """
+    Queue the new links of one page: a single digest (TELEGRAM_DIGEST) or
+    one alert per link. Returns how many messages were queued.
+
+    Args:
+        source: Page or campaign name
+        links: Dicts with url and optionally name, link_type, is_relaunch
+    """
+    if not links:
+        return 0
+    token, chat_id = _credentials()
+    if not token or not chat_id:
+        print("Telegram não configurado — pulando envio.")
+        return 0
+    if TELEGRAM_DIGEST and len(links) > 1:
+        messages = format_digest(source, links)
+    else:
+        messages = [
+            format_link_message(
+                link["url"],
+                f"{link['name']} (via {source})" if link.get("name") else source,
+                link.get("link_type", "group"),
+                link.get("is_relaunch", False),
+            )
+            for link in links
+        ]
+    return sum(1 for text in messages if dispatcher.submit(chat_id, text))
 
 
+def get_dispatcher_stats() -> dict:
+    return {**dispatcher.stats(), "digest": TELEGRAM_DIGEST}
@@ -4,7 +4,19 @@ Handles WhatsApp link validation and normalization
 """
 
 import re
-from urllib.parse import urlparse, urljoin
+from typing import Optional
+from urllib.parse import urlparse, urljoin, parse_qs
+
+WHATSAPP_INVITE_RE = re.compile(r'^/(?:invite/)?([A-Za-z0-9]{10,})/?$')
+WHATSAPP_CHANNEL_RE = re.compile(r'^/channel/([A-Za-z0-9]+)/?$')
+WA_ME_RE = re.compile(r'^/(\+?\d+)/?$')
+TELEGRAM_INVITE_RE = re.compile(r'^/(?:joinchat/|\+)([A-Za-z0-9_-]+)/?$')
+TELEGRAM_NAME_RE = re.compile(r'^/([A-Za-z0-9_]{4,})/?$')
+NON_DIGIT_RE = re.compile(r'\D')
+
+WHATSAPP_HOSTS = ("chat.whatsapp.com", "whatsapp.com", "www.whatsapp.com")
+WHATSAPP_API_HOSTS = ("api.whatsapp.com", "web.whatsapp.com", "wa.me")
+TELEGRAM_HOSTS = ("t.me", "telegram.me", "www.t.me")
 
 def normalize_whatsapp_link(link: str) -> str:
     """
@@ -27,9 +39,64 @@ def normalize_whatsapp_link(link: str) -> str:
         link = m.group(1)
     # remove URL fragments and trailing params that are not useful
     parsed = urlparse(link)
+    host = parsed.netloc.lower()
+    # group invites: the code is the whole identity, scheme/query/slash are noise
+    if host == "chat.whatsapp.com":
+        m = WHATSAPP_INVITE_RE.match(parsed.path)
+        if m:
+            return f"https://chat.whatsapp.com/{m.group(1)}"
+    if host and parsed.scheme.lower() in ("http", "https"):
+        parsed = parsed._replace(scheme="https", netloc=host)
     clean = parsed._replace(fragment='').geturl()
     return clean
 
+def canonical_invite_key(link: str) -> Optional[str]:
+    """
+    Canonical identity of an invite link: platform plus invite code
+
+    Variants of the same invite (http/https, trailing slash, query string,
+    /invite/ prefix, wa.me vs api.whatsapp.com) map to the same key, so it can
+    be used as a dedup index in storage.
+
+    Args:
+        link: Raw or normalized link
+
+    Returns:
+        Key like 'whatsapp:<code>', 'whatsapp-channel:<id>', 'whatsapp-phone:<number>',
+        'telegram:<code>'; 'url:<normalized url>' for anything else; None for empty input
+    """
+    if not link:
+        return None
+    parsed = urlparse(normalize_whatsapp_link(link))
+    host = parsed.netloc.lower()
+    path = parsed.path
+
+    if host in WHATSAPP_HOSTS:
+        if host == "chat.whatsapp.com":
+            m = WHATSAPP_INVITE_RE.match(path)
+            if m:
+                return f"whatsapp:{m.group(1)}"
+        m = WHATSAPP_CHANNEL_RE.match(path)
+        if m:
+            return f"whatsapp-channel:{m.group(1)}"
+
+    if host in WHATSAPP_API_HOSTS:
+        phone = None
+        if host == "wa.me":
+            m = WA_ME_RE.match(path)
+            phone = m.group(1) if m else None
+        else:
+            phone = (parse_qs(parsed.query).get("phone") or [None])[0]
+        if phone:
+            return f"whatsapp-phone:{NON_DIGIT_RE.sub('', phone)}"
+
+    if host in TELEGRAM_HOSTS:
+        m = TELEGRAM_INVITE_RE.match(path) or TELEGRAM_NAME_RE.match(path)
+        if m:
+            return f"telegram:{m.group(1)}"
+
+    return "url:" + parsed._replace(scheme="https", netloc=host).geturl().rstrip("/")
+
 def is_group_link(link: str) -> bool:
     """
     Check if link is a WhatsApp group link
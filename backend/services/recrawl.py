@@ -0,0 +1,206 @@
+"""
+Adaptive recrawl scheduling
+Every page carries its own check interval and next-check time. The interval
+shrinks when a check finds new invite links or changed content and backs off
+exponentially when nothing changes, so pages in a live launch are checked
+every few minutes while dead pages drift towards the maximum interval.
+
+A min-heap ordered by next-check time picks the due pages; each scheduler tick
+claims them in storage and submits them as one scrape job.
+"""
+
+import heapq
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from backend.db.pages import list_page_schedule, claim_due_pages
+from backend.services.collectors.engine import canonical_page_url
+from backend.db.users import list_all_users
+
+# Opt-in (needs migration 007 on Supabase); off: the fixed full collection at 8h, 14h and 20h
+RECRAWL_ADAPTIVE = os.getenv("RECRAWL_ADAPTIVE", "false").lower() in ("1", "true", "yes")
+# Interval bounds and the starting interval of a page never checked before
+RECRAWL_MIN_INTERVAL = int(os.getenv("RECRAWL_MIN_INTERVAL", str(5 * 60)))
+RECRAWL_MAX_INTERVAL = int(os.getenv("RECRAWL_MAX_INTERVAL", str(7 * 24 * 3600)))
+RECRAWL_DEFAULT_INTERVAL = int(os.getenv("RECRAWL_DEFAULT_INTERVAL", str(6 * 3600)))
+# Content changes without new links shrink the interval only down to this
+# floor: pages with rotating markup would otherwise be polled every few minutes
+RECRAWL_CHANGED_MIN_INTERVAL = int(os.getenv("RECRAWL_CHANGED_MIN_INTERVAL", str(30 * 60)))
+# Pages taken per tick, and how long a claimed page stays reserved for its job
+RECRAWL_BATCH = int(os.getenv("RECRAWL_BATCH", "200"))
+RECRAWL_CLAIM_SECONDS = int(os.getenv("RECRAWL_CLAIM_SECONDS", str(30 * 60)))
+# The heap is rebuilt from storage this often (pages added or checked elsewhere)
+RECRAWL_REFRESH_SECONDS = int(os.getenv("RECRAWL_REFRESH_SECONDS", "300"))
+# Spread applied to each interval so pages added together drift apart. It is
+# derived from the URL, so users monitoring the same page stay on the same
+# schedule and keep sharing one fetch per run
+RECRAWL_JITTER = 0.1
+
+NEW_LINKS = "new_links"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+ERROR = "error"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def next_interval(current: Optional[int], outcome: str) -> int:
+    """
+    Interval after a check
+
+    new links: a quarter; changed content: half (not below the changed floor);
+    unchanged or error: double. Always within the min/max bounds.
+    """
+    interval = current or RECRAWL_DEFAULT_INTERVAL
+    if outcome == NEW_LINKS:
+        interval //= 4
+    elif outcome == CHANGED:
+        interval = max(min(interval, RECRAWL_CHANGED_MIN_INTERVAL), interval // 2)
+    else:
+        interval *= 2
+    return max(RECRAWL_MIN_INTERVAL, min(RECRAWL_MAX_INTERVAL, interval))
+
+
+def _jitter(url: str) -> float:
+    spread = zlib.crc32(canonical_page_url(url).encode("utf-8")) / 0xFFFFFFFF
+    return 1 - RECRAWL_JITTER + 2 * RECRAWL_JITTER * spread
+
+
+def schedule_after_check(
+    url: str, current: Optional[int], outcome: str, now: Optional[datetime] = None,
+) -> Tuple[int, str]:
+    """(new interval, next-check time as ISO) for a page that was just checked"""
+    interval = next_interval(current, outcome)
+    now = now or datetime.now(timezone.utc)
+    delay = interval * _jitter(url)
+    return interval, (now + timedelta(seconds=delay)).isoformat(timespec="seconds")
+
+
+def _parse_time(value) -> datetime:
+    if not value:
+        return _EPOCH
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return _EPOCH
+
+
+class RecrawlQueue:
+    """Min-heap of (next_check_at, user_id, url) over the pages of approved users"""
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._stats = {"ticks": 0, "due": 0, "claimed": 0, "jobs": 0}
+
+    def refresh(self) -> None:
+        """Rebuild the heap from storage"""
+        user_ids = [user["id"] for user in list_all_users(include_pending=False)]
+        heap = [
+            (_parse_time(row.get("next_check_at")), row["user_id"], row["url"])
+            for row in list_page_schedule(user_ids)
+        ]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+            self._refreshed_at = time.monotonic()
+
+    def pop_due(self, now: datetime, limit: int) -> List[Tuple[int, str]]:
+        """Remove and return up to limit pages due at now, earliest first"""
+        if time.monotonic() - self._refreshed_at >= RECRAWL_REFRESH_SECONDS:
+            self.refresh()
+        due = []
+        with self._lock:
+            while self._heap and len(due) < limit and self._heap[0][0] <= now:
+                _, user_id, url = heapq.heappop(self._heap)
+                due.append((user_id, url))
+        return due
+
+    def push(self, user_id: int, url: str, next_check_at) -> None:
+        with self._lock:
+            heapq.heappush(self._heap, (_parse_time(next_check_at), user_id, url))
+
+    def claim_due(self, limit: int = RECRAWL_BATCH) -> Dict[int, List[str]]:
+        """
+        Pop the due pages and reserve them in storage
+
+        Pages another process already checked are dropped (the next refresh
+        brings them back with their real time). Returns {user_id: [url, ...]}.
+        """
+        now = datetime.now(timezone.utc)
+        due = self.pop_due(now, limit)
+        lease_until = (now + timedelta(seconds=RECRAWL_CLAIM_SECONDS)).isoformat(timespec="seconds")
+        claimed = claim_due_pages(due, now.isoformat(timespec="seconds"), lease_until) if due else []
+        pages: Dict[int, List[str]] = {}
+        for user_id, url in claimed:
+            pages.setdefault(user_id, []).append(url)
+            # Back in the heap at the lease time in case the job never reports
+            self.push(user_id, url, lease_until)
+        with self._lock:
+            self._stats["ticks"] += 1
+            self._stats["due"] += len(due)
+            self._stats["claimed"] += len(claimed)
+        return pages
+
+    def record_job(self) -> None:
+        with self._lock:
+            self._stats["jobs"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            upcoming = heapq.nsmallest(5, self._heap)
+            return {
+                **self._stats,
+                "pages": len(self._heap),
+                "refreshed_seconds_ago": round(time.monotonic() - self._refreshed_at, 1) if self._refreshed_at else None,
+                "next_due": [
+                    {"user_id": user_id, "url": url, "next_check_at": when.isoformat()}
+                    for when, user_id, url in upcoming
+                ],
+                "intervals": {
+                    "min": RECRAWL_MIN_INTERVAL,
+                    "max": RECRAWL_MAX_INTERVAL,
+                    "default": RECRAWL_DEFAULT_INTERVAL,
+                    "changed_min": RECRAWL_CHANGED_MIN_INTERVAL,
+                },
+            }
+
+
+recrawl_queue = RecrawlQueue()
+
+
+def run_due_recrawl(deadline_at: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Scheduler tick: submit the due pages as one scheduled scrape job
+
+    Returns the job, or None when nothing is due or the previous recrawl job
+    is still active (ticks are every minute, so that is not an overflow).
+    The job runs until its pages' claim expires, not until the next tick.
+    """
+    from backend.services.jobs import job_manager
+    from backend.db.jobs import find_active_job
+
+    if find_active_job("scrape", None, "scheduled") is not None:
+        return None
+    pages = recrawl_queue.claim_due()
+    if not pages:
+        return None
+    recrawl_queue.record_job()
+    lease_deadline = datetime.now(timezone.utc) + timedelta(seconds=RECRAWL_CLAIM_SECONDS)
+    return job_manager.submit(
+        "scrape",
+        {"user_ids": list(pages), "pages": {str(user_id): urls for user_id, urls in pages.items()}},
+        lane="scheduled",
+        deadline_at=max(deadline_at, lease_deadline) if deadline_at else lease_deadline,
+    )
+
+
+def get_recrawl_stats() -> dict:
+    return recrawl_queue.stats()
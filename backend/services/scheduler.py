@@ -0,0 +1,234 @@
+"""
+Scheduler service for periodic tasks
+Every gunicorn/uvicorn worker runs its own APScheduler, so every tick first
+claims its slot in storage (db/scheduler.py) and only the process that wins
+runs it. Ticks run on a small bounded pool, hand a deadline to the work they
+start, and are recorded with their lag; /api/metrics/scheduler shows run
+durations and whether a run overflowed into the next slot.
+"""
+
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import pytz
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from backend.db import scheduler as run_store
+from backend.db.jobs import get_job
+
+SCHEDULER_TIMEZONE = os.getenv("SCHEDULER_TIMEZONE", "America/Sao_Paulo")
+# Threads that execute ticks (ticks only enqueue jobs, so this stays small)
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))
+# A tick that fires later than this (process asleep or busy) is dropped
+SCHEDULER_MISFIRE_GRACE = int(os.getenv("SCHEDULER_MISFIRE_GRACE", "600"))
+# Per-run deadline in seconds; 0 means "until the next slot of the same task"
+SCHEDULER_RUN_DEADLINE = int(os.getenv("SCHEDULER_RUN_DEADLINE", "0"))
+# Fallback deadline when a trigger has no next slot
+DEFAULT_RUN_DEADLINE = 6 * 3600
+
+# Identifies the process holding a tick in scheduler_runs.owner
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+# Receives the run deadline and returns the job it submitted (or None)
+TickFunc = Callable[[datetime], Optional[dict]]
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _log(message: str) -> None:
+    try:
+        try:
+            from backend.main import write_log
+        except ImportError:
+            from main import write_log
+        write_log(message)
+    except Exception:
+        pass
+
+
+class SchedulerService:
+    """Cron tasks that run once per slot across all processes"""
+
+    def __init__(self, tz_name: str = SCHEDULER_TIMEZONE, workers: int = SCHEDULER_WORKERS):
+        self.timezone = pytz.timezone(tz_name)
+        self.workers = max(1, workers)
+        self._tasks: Dict[str, dict] = {}
+        self._scheduler: Optional[BackgroundScheduler] = None
+        self._lock = threading.Lock()
+        self._stats = {"fired": 0, "claimed": 0, "lost": 0, "skipped": 0, "failed": 0, "unleased": 0}
+        self._lease_warned = False
+
+    def add_cron_task(self, name: str, func: TickFunc, **cron_fields) -> None:
+        """Register a task; takes the same fields as CronTrigger (hour, minute, ...)"""
+        trigger = CronTrigger(timezone=self.timezone, **cron_fields)
+        self._tasks[name] = {"func": func, "trigger": trigger, "cron": cron_fields}
+        if self._scheduler is not None:
+            self._add_job(name)
+
+    def _add_job(self, name: str) -> None:
+        self._scheduler.add_job(
+            self._tick, self._tasks[name]["trigger"], args=[name], id=name, replace_existing=True,
+        )
+
+    def start(self) -> None:
+        """Start the scheduler (idempotent)"""
+        with self._lock:
+            if self._scheduler is not None:
+                return
+            self._scheduler = BackgroundScheduler(
+                executors={"default": ThreadPoolExecutor(max_workers=self.workers)},
+                job_defaults={
+                    # One tick per task at a time; missed ticks collapse into one
+                    "max_instances": 1,
+                    "coalesce": True,
+                    "misfire_grace_time": SCHEDULER_MISFIRE_GRACE,
+                },
+                timezone=self.timezone,
+            )
+            for name in self._tasks:
+                self._add_job(name)
+            self._scheduler.start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._scheduler is not None:
+                self._scheduler.shutdown(wait=False)
+                self._scheduler = None
+
+    def run_now(self, name: str) -> None:
+        """Run a task's current slot right away (still claimed, so at most once per slot)"""
+        self._tick(name)
+
+    def _slot(self, trigger: CronTrigger, now: datetime) -> datetime:
+        # The fire time this tick belongs to: the latest slot inside the grace window
+        slot = trigger.get_next_fire_time(None, now - timedelta(seconds=SCHEDULER_MISFIRE_GRACE))
+        if slot is None or slot > now:
+            return now
+        while True:
+            following = trigger.get_next_fire_time(slot, slot + timedelta(seconds=1))
+            if following is None or following > now:
+                return slot
+            slot = following
+
+    def _tick(self, name: str) -> None:
+        task = self._tasks[name]
+        trigger = task["trigger"]
+        now = datetime.now(timezone.utc)
+        scheduled_for = self._slot(trigger, now)
+        next_run_at = trigger.get_next_fire_time(scheduled_for, scheduled_for + timedelta(seconds=1))
+        with self._lock:
+            self._stats["fired"] += 1
+
+        try:
+            run = run_store.claim_scheduler_run(name, scheduled_for, OWNER, next_run_at)
+        except Exception as e:
+            # Lease table unavailable (e.g. migration 006 missing): run the tick
+            # anyway, as before the lease existed; each process may then run it
+            with self._lock:
+                self._stats["unleased"] += 1
+                warn, self._lease_warned = not self._lease_warned, True
+            if warn:
+                _log(f"⚠️ [Scheduler] Sem registro de ticks ({e}); executando sem exclusividade entre processos")
+            run = {"id": None}
+        if run is None:
+            # Another process already runs this slot
+            with self._lock:
+                self._stats["lost"] += 1
+            return
+        if run["id"] is not None:
+            with self._lock:
+                self._stats["claimed"] += 1
+
+        if SCHEDULER_RUN_DEADLINE > 0:
+            deadline = scheduled_for + timedelta(seconds=SCHEDULER_RUN_DEADLINE)
+        else:
+            deadline = next_run_at or scheduled_for + timedelta(seconds=DEFAULT_RUN_DEADLINE)
+
+        try:
+            job = task["func"](deadline)
+        except Exception as e:
+            with self._lock:
+                self._stats["failed"] += 1
+            self._finish(run, "failed", error=str(e))
+            _log(f"🚨 [Scheduler] Erro em '{name}': {e}")
+            return
+
+        created = _parse_time(job.get("created_at")) if job else None
+        if job is not None and created is not None and created < scheduled_for:
+            # The previous slot's run is still active: this slot overflowed
+            with self._lock:
+                self._stats["skipped"] += 1
+            self._finish(run, "skipped", job_id=job["id"], error="Execução anterior ainda ativa")
+            _log(f"⚠️ [Scheduler] '{name}' ainda rodando desde o horário anterior (job #{job['id']}); tick ignorado")
+            return
+        self._finish(run, "submitted", job_id=job["id"] if job else None)
+
+    def _finish(self, run: dict, status: str, **fields) -> None:
+        # Unleased ticks have no row to update
+        if run["id"] is not None:
+            run_store.finish_scheduler_run(run["id"], status, **fields)
+
+    def _run_report(self, run: dict) -> dict:
+        """Run row plus queue wait, duration and overflow of the job it started"""
+        report = dict(run)
+        job = get_job(run["job_id"]) if run.get("job_id") else None
+        if job is None:
+            return report
+        created = _parse_time(job.get("created_at"))
+        started = _parse_time(job.get("started_at"))
+        finished = _parse_time(job.get("finished_at"))
+        next_run_at = _parse_time(run.get("next_run_at"))
+        end = finished or datetime.now(timezone.utc)
+        report.update(
+            job_status=job["status"],
+            queue_wait_seconds=round((started - created).total_seconds(), 3) if started and created else None,
+            duration_seconds=round((end - started).total_seconds(), 3) if started else None,
+            overflowed=bool(next_run_at and end > next_run_at),
+        )
+        return report
+
+    def stats(self, limit: int = 10) -> dict:
+        """Tasks, this process's counters and the latest runs (blocking: reads storage)"""
+        tasks: List[dict] = []
+        for name, task in self._tasks.items():
+            job = self._scheduler.get_job(name) if self._scheduler is not None else None
+            tasks.append({
+                "name": name,
+                "cron": task["cron"],
+                "next_run_at": job.next_run_time.isoformat() if job and job.next_run_time else None,
+            })
+        with self._lock:
+            counters = dict(self._stats)
+        try:
+            runs = [self._run_report(run) for run in run_store.list_scheduler_runs(limit=limit)]
+        except Exception:
+            runs = []
+        return {
+            "running": self._scheduler is not None,
+            "owner": OWNER,
+            "workers": self.workers,
+            "tasks": tasks,
+            "process": counters,
+            "runs": runs,
+        }
+
+
+scheduler_service = SchedulerService()
+
+
+def get_scheduler_stats() -> dict:
+    return scheduler_service.stats()
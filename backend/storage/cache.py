@@ -0,0 +1,119 @@
+"""
+In-process TTL + LRU cache
+Thread-safe, with hit/miss counters and optional persistence to a JSON file
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after a TTL
+
+    Args:
+        maxsize: Maximum number of entries; the least recently used is evicted
+        ttl: Default time to live in seconds
+        path: Optional JSON file used by load()/save() (keys must be strings)
+    """
+
+    def __init__(self, maxsize: int, ttl: float, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def load(self) -> int:
+        """Loads non-expired entries from self.path; returns how many were loaded"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception:
+            return 0
+        now = time.time()
+        with self._lock:
+            # File is written oldest-first, so insertion order restores the LRU order
+            for key, (value, expires_at) in raw.items():
+                if expires_at > now:
+                    self._data[key] = (value, expires_at)
+                    self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return len(self._data)
+
+    def save(self) -> bool:
+        """Writes non-expired entries to self.path atomically (temp file + rename)"""
+        if not self.path:
+            return False
+        now = time.time()
+        with self._lock:
+            snapshot = {k: [v, exp] for k, (v, exp) in self._data.items() if exp > now}
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
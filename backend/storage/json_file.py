@@ -0,0 +1,86 @@
+"""
+Cached JSON file
+The parsed content is kept in memory and re-read only when the file's
+mtime or size changes (another worker saved it); writes go to a temp file
+that replaces the original, so readers never see a half-written file
+"""
+
+import copy
+import json
+import os
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+
+class JsonFileStore:
+    """
+    One JSON document on disk, parsed once per change
+
+    Args:
+        path: JSON file
+        default: Factory for the content when the file is missing or invalid
+    """
+
+    def __init__(self, path: str, default: Callable[[], Any]):
+        self.path = path
+        self.default = default
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self.reads = 0
+        self.hits = 0
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> Any:
+        """Current content (a copy: callers may change it and pass it to save)"""
+        signature = self._stat()
+        with self._lock:
+            if signature is not None and signature == self._signature:
+                self.hits += 1
+                return copy.deepcopy(self._value)
+        if signature is None:
+            return self.default()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except Exception:
+            return self.default()
+        with self._lock:
+            self.reads += 1
+            self._value = value
+            self._signature = signature
+        return copy.deepcopy(value)
+
+    def save(self, value: Any, indent: Optional[int] = 4) -> None:
+        """Writes the content atomically (temp file + rename); raises on failure"""
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, indent=indent, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+                # rename keeps mtime and size: this is the signature of our content
+                stat = os.fstat(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._value = copy.deepcopy(value)
+            self._signature = (stat.st_mtime_ns, stat.st_size)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"path": self.path, "reads": self.reads, "hits": self.hits}
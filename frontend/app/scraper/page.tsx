@@ -1,8 +1,8 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { runScraper, getLastRun, ScraperResponse } from '@/lib/api';
-import { PlayCircle, CheckCircle, AlertCircle, Clock, Loader2 } from 'lucide-react';
+import { runScraper, cancelJob, getLastRun, ScraperResponse, Job, JobEvent } from '@/lib/api';
+import { PlayCircle, CheckCircle, AlertCircle, Clock, Loader2, XCircle } from 'lucide-react';
 import LogConsole from '@/components/LogConsole';
 
 export default function ScraperPage() {
@@ -10,6 +10,8 @@ export default function ScraperPage() {
   const [result, setResult] = useState<ScraperResponse | null>(null);
   const [lastRun, setLastRun] = useState<string>('');
   const [error, setError] = useState<string | null>(null);
+  const [job, setJob] = useState<Job | null>(null);
+  const [progress, setProgress] = useState<{ done: number; total: number } | null>(null);
 
   useEffect(() => {
     getLastRun().then((d) => setLastRun(d.last_run)).catch(() => {});
@@ -20,14 +22,30 @@ export default function ScraperPage() {
     setRunning(true);
     setError(null);
     setResult(null);
+    setProgress(null);
+    const onEvent = (event: JobEvent) => {
+      if (event.progress_total !== undefined) {
+        setProgress({ done: event.progress_done || 0, total: event.progress_total });
+      }
+    };
     try {
-      const response = await runScraper();
+      const response = await runScraper(onEvent, setJob);
       setResult(response);
       getLastRun().then((d) => setLastRun(d.last_run)).catch(() => {});
     } catch (err: any) {
       setError(err.message || 'Erro ao executar scraper');
     } finally {
       setRunning(false);
+      setJob(null);
+    }
+  };
+
+  const handleCancel = async () => {
+    if (!job) return;
+    try {
+      await cancelJob(job.id);
+    } catch (err: any) {
+      setError(err.message || 'Erro ao cancelar coleta');
     }
   };
 
@@ -67,7 +85,9 @@ export default function ScraperPage() {
             {running ? (
               <span className="flex items-center gap-2">
                 <Loader2 className="w-5 h-5 animate-spin" />
-                Executando...
+                {progress && progress.total > 0
+                  ? `Executando... ${progress.done}/${progress.total} páginas`
+                  : 'Na fila...'}
               </span>
             ) : (
               <span className="flex items-center gap-2">
@@ -76,6 +96,17 @@ export default function ScraperPage() {
               </span>
             )}
           </button>
+          {running && job && (
+            <button
+              onClick={handleCancel}
+              className="mt-4 px-4 py-2 rounded-lg text-sm font-medium text-red-600 hover:bg-red-50 dark:hover:bg-red-900/20 transition"
+            >
+              <span className="flex items-center gap-2">
+                <XCircle className="w-4 h-4" />
+                Cancelar coleta
+              </span>
+            </button>
+          )}
         </div>
       </div>
 
@@ -1,7 +1,7 @@
 'use client';
 
 import { useState, useEffect, useRef } from 'react';
-import { getRecentLogs } from '@/lib/api';
+import { getRecentLogs, streamLogs } from '@/lib/api';
 import { Terminal, Copy, Trash2, RefreshCw } from 'lucide-react';
 
 interface LogConsoleProps {
@@ -10,6 +10,9 @@ interface LogConsoleProps {
   maxHeight?: string;
 }
 
+// Linhas mantidas na tela enquanto o stream está aberto
+const MAX_LINES = 200;
+
 export default function LogConsole({ active, title = "Console de Operações", maxHeight = "300px" }: LogConsoleProps) {
   const [logs, setLogs] = useState<string[]>([]);
   const [loading, setLoading] = useState(false);
@@ -24,20 +27,40 @@ export default function LogConsole({ active, title = "Console de Operações", m
     }
   };
 
-  // Poll logs when active
+  // Stream logs when active (reconnects if the connection drops)
   useEffect(() => {
-    let interval: any;
-    if (active) {
-      setLoading(true);
-      fetchLogs().finally(() => setLoading(false));
-      interval = setInterval(fetchLogs, 2000);
-    } else {
+    if (!active) {
       // Fetch once when inactive to show the result
       fetchLogs();
+      return;
     }
 
+    const controller = new AbortController();
+    let stopped = false;
+    const run = async () => {
+      setLoading(true);
+      while (!stopped) {
+        try {
+          await streamLogs(
+            (recent) => {
+              setLogs(recent);
+              setLoading(false);
+            },
+            (line) => setLogs((prev) => [...prev, line].slice(-MAX_LINES)),
+            controller.signal,
+          );
+        } catch (err) {
+          if (stopped) break;
+          console.warn("Stream de logs interrompido, reconectando...", err);
+        }
+        if (!stopped) await new Promise((resolve) => setTimeout(resolve, 2000));
+      }
+    };
+    run();
+
     return () => {
-      if (interval) clearInterval(interval);
+      stopped = true;
+      controller.abort();
     };
   }, [active]);
 
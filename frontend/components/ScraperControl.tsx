@@ -1,13 +1,15 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { runScraper, getLastRun, ScraperResponse } from '@/lib/api';
+import { runScraper, cancelJob, getLastRun, ScraperResponse, Job, JobEvent } from '@/lib/api';
 
 export default function ScraperControl() {
   const [running, setRunning] = useState(false);
   const [result, setResult] = useState<ScraperResponse | null>(null);
   const [lastRun, setLastRun] = useState<string>('');
   const [error, setError] = useState<string | null>(null);
+  const [job, setJob] = useState<Job | null>(null);
+  const [progress, setProgress] = useState<{ done: number; total: number } | null>(null);
 
   const loadLastRun = async () => {
     try {
@@ -30,15 +32,32 @@ export default function ScraperControl() {
     setRunning(true);
     setError(null);
     setResult(null);
+    setProgress(null);
+
+    const onEvent = (event: JobEvent) => {
+      if (event.progress_total !== undefined) {
+        setProgress({ done: event.progress_done || 0, total: event.progress_total });
+      }
+    };
 
     try {
-      const response = await runScraper();
+      const response = await runScraper(onEvent, setJob);
       setResult(response);
       loadLastRun();
     } catch (err: any) {
       setError(err.message || 'Erro ao executar scraper');
     } finally {
       setRunning(false);
+      setJob(null);
+    }
+  };
+
+  const handleCancel = async () => {
+    if (!job) return;
+    try {
+      await cancelJob(job.id);
+    } catch (err: any) {
+      setError(err.message || 'Erro ao cancelar coleta');
     }
   };
 
@@ -59,9 +78,22 @@ export default function ScraperControl() {
               : 'bg-green-600 hover:bg-green-700 text-white'
           }`}
         >
-          {running ? 'Executando...' : '🚀 Executar Scraper Agora'}
+          {running
+            ? progress && progress.total > 0
+              ? `Executando... ${progress.done}/${progress.total} páginas`
+              : 'Na fila...'
+            : '🚀 Executar Scraper Agora'}
         </button>
 
+        {running && job && (
+          <button
+            onClick={handleCancel}
+            className="w-full px-4 py-2 rounded-md font-medium transition bg-red-100 hover:bg-red-200 text-red-700 dark:bg-red-900 dark:text-red-200"
+          >
+            Cancelar coleta
+          </button>
+        )}
+
         {error && (
           <div className="p-3 bg-red-100 dark:bg-red-900 border border-red-400 text-red-700 dark:text-red-300 rounded">
             {error}
@@ -77,7 +109,7 @@ export default function ScraperControl() {
               {result.message}
             </p>
             <p className="text-sm text-blue-700 dark:text-blue-300">
-              Páginas verificadas: {result.total_checked} | Links encontrados: {result.links_found}
+              Páginas verificadas: {result.total_checked} | Sem mudança: {result.pages_skipped ?? 0} | Links encontrados: {result.links_found}
             </p>
           </div>
         )}
@@ -1,7 +1,7 @@
 'use client';
 
-import { useState } from 'react';
-import { runDuckDuckGoDiscovery, addDiscoveredPage, DDGPage } from '@/lib/api';
+import { useEffect, useRef, useState } from 'react';
+import { streamDuckDuckGoDiscovery, addDiscoveredPage, DDGPage } from '@/lib/api';
 import { Search, CheckCircle, AlertCircle, Plus, ExternalLink, Loader2, Info } from 'lucide-react';
 
 export default function DuckDuckGoSection() {
@@ -12,18 +12,32 @@ export default function DuckDuckGoSection() {
   const [autoAdd, setAutoAdd] = useState(false);
   const [addedUrls, setAddedUrls] = useState<Set<string>>(new Set());
   const [addingUrl, setAddingUrl] = useState<string | null>(null);
+  const abortRef = useRef<AbortController | null>(null);
+
+  // Sair da tela fecha o stream (o backend cancela as buscas restantes)
+  useEffect(() => () => abortRef.current?.abort(), []);
 
   const handleSearch = async () => {
+    abortRef.current?.abort();
+    const controller = new AbortController();
+    abortRef.current = controller;
     setSearching(true);
     setError(null);
-    setResult(null);
+    setResult({ pages: [], message: 'Buscando e verificando páginas...' });
     setAddedUrls(new Set());
     try {
-      const res = await runDuckDuckGoDiscovery({ max_results_per_query: maxResults, verify: true, only_with_whatsapp: true, auto_add: autoAdd });
-      setResult(res);
-      if (autoAdd) setAddedUrls(new Set(res.pages.filter(p => p.added).map(p => p.url)));
+      // Cada página aparece assim que é verificada
+      const summary = await streamDuckDuckGoDiscovery(
+        { max_results_per_query: maxResults, verify: true, only_with_whatsapp: true, auto_add: autoAdd },
+        (page) => {
+          setResult(prev => ({ pages: [...(prev?.pages ?? []), page], message: prev?.message ?? '' }));
+          if (page.added) setAddedUrls(prev => new Set(prev).add(page.url));
+        },
+        controller.signal,
+      );
+      setResult(prev => ({ pages: prev?.pages ?? [], message: summary.message }));
     } catch (err: any) {
-      setError(err.message || 'Erro na busca');
+      if (err.name !== 'AbortError') setError(err.message || 'Erro na busca');
     } finally {
       setSearching(false);
     }
@@ -75,7 +89,7 @@ export default function DuckDuckGoSection() {
         className={`px-6 py-3 rounded-lg font-semibold transition-all flex items-center gap-2 ${
           searching ? 'bg-gray-400 cursor-not-allowed text-white'
           : 'bg-gradient-to-r from-emerald-500 to-teal-600 text-white hover:shadow-lg hover:scale-105 transform'}`}>
-        {searching ? <><Loader2 className="w-5 h-5 animate-spin" />Buscando... (1-2 min)</> : <><Search className="w-5 h-5" />Buscar Páginas</>}
+        {searching ? <><Loader2 className="w-5 h-5 animate-spin" />Buscando...</> : <><Search className="w-5 h-5" />Buscar Páginas</>}
       </button>
 
       {error && (
@@ -91,7 +105,7 @@ export default function DuckDuckGoSection() {
             <CheckCircle className="w-5 h-5 text-emerald-500" />
             <span className="font-semibold text-gray-900 dark:text-white">{result.message}</span>
           </div>
-          {result.pages.length === 0 ? (
+          {result.pages.length === 0 && !searching ? (
             <p className="text-center text-gray-500 py-8">Nenhuma página com grupos WhatsApp encontrada. Tente aumentar os resultados.</p>
           ) : (
             <div className="space-y-3">
@@ -50,6 +50,7 @@ export interface ScraperResponse {
   links_found: number;
   links: Link[];
   message: string;
+  pages_skipped?: number;
 }
 
 export interface TelegramConfig {
@@ -169,12 +170,148 @@ export async function deletePage(url: string): Promise<void> {
   });
 }
 
-export async function runScraper(): Promise<ScraperResponse> {
+// ─── JOBS (fila de coletas) ─────────────────────────────────────────────────
+
+export type JobStatus = 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled' | 'timed_out';
+
+export interface Job {
+  id: number;
+  kind: string;
+  lane: 'interactive' | 'manual' | 'scheduled';
+  status: JobStatus;
+  user_id?: number | null;
+  progress_done: number;
+  progress_total: number;
+  cancel_requested: boolean;
+  attempts: number;
+  result?: any;
+  error?: string | null;
+  created_at?: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+}
+
+export interface JobEvent {
+  type: 'queued' | 'started' | 'progress' | 'page' | 'done';
+  job_id: number;
+  progress_done?: number;
+  progress_total?: number;
+  url?: string;
+  name?: string;
+  status?: string;
+  links_found?: number;
+  error?: string | null;
+  [key: string]: any;
+}
+
+const FINAL_JOB_STATUSES: JobStatus[] = ['succeeded', 'failed', 'cancelled', 'timed_out'];
+
+export async function getJob(jobId: number): Promise<Job> {
+  return fetchApi(`/api/jobs/${jobId}`);
+}
+
+export async function cancelJob(jobId: number): Promise<Job> {
+  return fetchApi(`/api/jobs/${jobId}/cancel`, { method: 'POST' });
+}
+
+// Lê um stream SSE com fetch (EventSource não envia o header Authorization)
+async function readEventStream(
+  path: string,
+  onEvent: (type: string, data: any) => void,
+  signal?: AbortSignal,
+  body?: unknown,
+): Promise<void> {
+  const token = getToken();
+  const headers: Record<string, string> = { 'Accept': 'text/event-stream' };
+  if (token) {
+    headers['Authorization'] = `Bearer ${token}`;
+  }
+  if (body !== undefined) {
+    headers['Content-Type'] = 'application/json';
+  }
+
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: body !== undefined ? 'POST' : 'GET',
+    body: body !== undefined ? JSON.stringify(body) : undefined,
+    cache: 'no-store',
+    mode: 'cors',
+    headers,
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Erro ${response.status} ao abrir o stream`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let type = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) type = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      if (data) {
+        onEvent(type, JSON.parse(data));
+      }
+    }
+  }
+}
+
+export async function streamJobEvents(jobId: number, onEvent: (event: JobEvent) => void): Promise<void> {
+  await readEventStream(`/api/jobs/${jobId}/events`, (type, data) => onEvent({ type, ...data }));
+}
+
+// Acompanha o job pelo stream e devolve o job final (consulta o status se o stream cair)
+export async function waitForJob(jobId: number, onEvent?: (event: JobEvent) => void): Promise<Job> {
+  try {
+    await streamJobEvents(jobId, (event) => onEvent?.(event));
+  } catch (err) {
+    console.warn(`[API] Stream do job ${jobId} interrompido, consultando status`, err);
+  }
+  while (true) {
+    const job = await getJob(jobId);
+    if (FINAL_JOB_STATUSES.includes(job.status)) {
+      return job;
+    }
+    await new Promise((resolve) => setTimeout(resolve, 2000));
+  }
+}
+
+function jobError(job: Job): Error {
+  return new Error(job.status === 'cancelled' ? 'Coleta cancelada' : job.error || 'Erro ao executar o job');
+}
+
+export async function submitScraperJob(): Promise<Job> {
   return fetchApi('/api/scraper/run', {
     method: 'POST',
   });
 }
 
+// Enfileira a coleta e espera o resultado; onJob recebe o job (para cancelar)
+export async function runScraper(
+  onEvent?: (event: JobEvent) => void,
+  onJob?: (job: Job) => void,
+): Promise<ScraperResponse> {
+  const submitted = await submitScraperJob();
+  onJob?.(submitted);
+  const job = await waitForJob(submitted.id, onEvent);
+  const responses = Object.values(job.result?.users || {}) as ScraperResponse[];
+  if (responses.length === 0) {
+    throw jobError(job);
+  }
+  return responses[0];
+}
+
 export async function getLastRun(): Promise<{ last_run: string }> {
   return fetchApi('/api/scraper/last-run');
 }
@@ -238,16 +375,27 @@ export interface DDGPage {
   signals: string[];
   whatsapp_links: string[];
   verified: boolean;
+  verified_at?: string | null;
+  cached?: boolean;
   added: boolean;
   query: string | null;
 }
 
+// Acertos de cache de uma execução da descoberta
+export interface DiscoveryCacheStats {
+  queries_cached: number;
+  queries_fetched: number;
+  verifications_cached: number;
+  verifications_fetched: number;
+}
+
 export interface DDGResponse {
   success: boolean;
   pages_found: number;
   pages_added: number;
   pages: DDGPage[];
   message: string;
+  cache?: DiscoveryCacheStats;
 }
 
 export async function runDuckDuckGoDiscovery(opts: {
@@ -260,6 +408,32 @@ export async function runDuckDuckGoDiscovery(opts: {
   return fetchApi('/api/discovery/duckduckgo', { method: 'POST', body: JSON.stringify(opts) });
 }
 
+export interface DDGStreamSummary {
+  success: boolean;
+  pages_found: number;
+  pages_added: number;
+  message: string;
+  cache?: DiscoveryCacheStats;
+}
+
+// Recebe cada página assim que é verificada; devolve o resumo do fim
+export async function streamDuckDuckGoDiscovery(
+  opts: Parameters<typeof runDuckDuckGoDiscovery>[0],
+  onPage: (page: DDGPage) => void,
+  signal?: AbortSignal,
+): Promise<DDGStreamSummary> {
+  let summary: DDGStreamSummary | null = null;
+  let error: string | null = null;
+  await readEventStream('/api/discovery/duckduckgo/stream', (type, data) => {
+    if (type === 'page') onPage(data as DDGPage);
+    else if (type === 'done') summary = data as DDGStreamSummary;
+    else if (type === 'error') error = data.detail;
+  }, signal, opts ?? {});
+  if (error) throw new Error(error);
+  if (!summary) throw new Error('Busca interrompida');
+  return summary;
+}
+
 export async function getDDGQueries(): Promise<{ queries: string[] }> {
   return fetchApi('/api/discovery/duckduckgo/queries');
 }
@@ -290,6 +464,22 @@ export interface YoutubeDiscoveryResponse {
   pages_added: number;
   results: YoutubeVideoResult[];
   message: string;
+  cache?: DiscoveryCacheStats;
+  quota?: Partial<YoutubeQuota> & { spent?: number; deferred_queries?: string[] };
+}
+
+// Quota da YouTube API gasta hoje (dia do Pacífico) pela chave do usuário
+export interface YoutubeQuota {
+  day: string;
+  used: number;
+  daily_quota: number;
+  search_budget: number;
+  remaining: number;
+  searches_left: number;
+}
+
+export async function getYoutubeQuota(): Promise<YoutubeQuota> {
+  return fetchApi('/api/discovery/youtube/quota');
 }
 
 export interface YoutubeConfig {
@@ -316,6 +506,7 @@ export async function runYoutubeDiscovery(opts: {
   filter_tutorials?: boolean;
   only_with_links?: boolean;
   use_ai?: boolean;
+  incremental?: boolean;
 } = {}): Promise<YoutubeDiscoveryResponse> {
   return fetchApi('/api/discovery/youtube', { method: 'POST', body: JSON.stringify(opts) });
 }
@@ -418,12 +609,20 @@ export interface QuickResponse {
   message: string;
 }
 
-export async function runQuickCollect(data: {
-  urls: string[];
-  source_name?: string;
-  add_to_pages?: boolean;
-}): Promise<QuickResponse> {
-  return fetchApi('/api/discovery/quick', { method: 'POST', body: JSON.stringify(data) });
+export async function runQuickCollect(
+  data: {
+    urls: string[];
+    source_name?: string;
+    add_to_pages?: boolean;
+  },
+  onEvent?: (event: JobEvent) => void,
+): Promise<QuickResponse> {
+  const submitted: Job = await fetchApi('/api/discovery/quick', { method: 'POST', body: JSON.stringify(data) });
+  const job = await waitForJob(submitted.id, onEvent);
+  if (!job.result) {
+    throw jobError(job);
+  }
+  return job.result as QuickResponse;
 }
 
 export async function setTelegramWebhook(): Promise<{ success: boolean; message: string }> {
@@ -475,6 +674,19 @@ export async function getRecentLogs(lines: number = 50): Promise<{ logs: string[
   return fetchApi(`/api/logs/recent?lines=${lines}`);
 }
 
+// Stream dos logs: onSnapshot recebe as últimas linhas, onLine cada linha nova
+export async function streamLogs(
+  onSnapshot: (logs: string[]) => void,
+  onLine: (line: string) => void,
+  signal?: AbortSignal,
+  lines: number = 50,
+): Promise<void> {
+  await readEventStream(`/api/logs/stream?lines=${lines}`, (type, data) => {
+    if (type === 'snapshot') onSnapshot(data.logs);
+    else if (type === 'log') onLine(data.line);
+  }, signal);
+}
+
 // ─── YOUTUBE SETTINGS ─────────────────────────────────────────────────────────
 
 // Admin API